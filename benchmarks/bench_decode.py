@@ -0,0 +1,115 @@
+"""
+Micro-benchmark for response decoding on the board fixtures. Compares the
+original recursive, uncached decode_keys with the current one, and the
+decode() + dacite path with decode_into.
+
+    python benchmarks/bench_decode.py [--number N]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from dacite import from_dict
+from decode import decode, decode_into, decode_keys
+from game.models import Board
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+###############################################################################
+#
+# Reference copy of the original implementation
+#
+###############################################################################
+def _legacy_unpack(data):
+    if isinstance(data, dict):
+        return data.items()
+    return data
+
+
+def _legacy_snake_case(value):
+    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
+    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
+
+
+def _legacy_keys_to_snake_case(content):
+    return {_legacy_snake_case(key): value for key, value in content.items()}
+
+
+def legacy_decode_keys(data):
+    formatted = {}
+    for key, value in _legacy_unpack(_legacy_keys_to_snake_case(data)):
+        if isinstance(value, dict):
+            formatted[key] = legacy_decode_keys(value)
+        elif isinstance(value, list) and len(value) > 0:
+            formatted[key] = []
+            for _, val in enumerate(value):
+                formatted[key].append(legacy_decode_keys(val))
+        else:
+            formatted[key] = value
+    return formatted
+
+
+###############################################################################
+#
+# Benchmark
+#
+###############################################################################
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "board_*.json"))):
+        name = os.path.basename(path)[len("board_") : -len(".json")]
+        with open(path) as f:
+            fixtures[name] = json.load(f)["data"]
+    return fixtures
+
+
+def measure(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", default=200, type=int, action="store")
+    args = parser.parse_args()
+
+    print(
+        "{:<8} {:>14} {:>14} {:>8} {:>16} {:>14} {:>8}".format(
+            "board",
+            "legacy keys",
+            "decode_keys",
+            "speedup",
+            "decode + dacite",
+            "decode_into",
+            "speedup",
+        )
+    )
+    for name, payload in load_fixtures().items():
+        assert decode_keys(payload) == legacy_decode_keys(payload)
+        assert decode_into(Board, payload) == from_dict(Board, decode(payload))
+
+        legacy_keys = measure(lambda: legacy_decode_keys(payload), args.number)
+        keys = measure(lambda: decode_keys(payload), args.number)
+        dacite = measure(lambda: from_dict(Board, decode(payload)), args.number)
+        fused = measure(lambda: decode_into(Board, payload), args.number)
+        print(
+            "{:<8} {:>11.1f} us {:>11.1f} us {:>7.1f}x {:>13.1f} us {:>11.1f} us {:>7.1f}x".format(
+                name,
+                legacy_keys,
+                keys,
+                legacy_keys / keys,
+                dacite,
+                fused,
+                dacite / fused,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
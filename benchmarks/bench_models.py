@@ -0,0 +1,150 @@
+"""
+Allocation and construction benchmark for the board models on the board
+fixtures. Compares dict-backed dataclasses (a reference copy of the original
+models), the slotted models and slotted models with interned tuple positions.
+
+    python benchmarks/bench_models.py [--number N]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from decode import decode_into
+from game.models import COMPACT_POSITIONS, Board
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+###############################################################################
+#
+# Reference copy of the original, dict-backed models
+#
+###############################################################################
+@dataclass
+class LegacyPosition:
+    y: int
+    x: int
+
+
+@dataclass
+class LegacyBase(LegacyPosition): ...
+
+
+@dataclass
+class LegacyProperties:
+    points: Optional[int] = None
+    pair_id: Optional[str] = None
+    diamonds: Optional[int] = None
+    score: Optional[int] = None
+    name: Optional[str] = None
+    inventory_size: Optional[int] = None
+    can_tackle: Optional[bool] = None
+    milliseconds_left: Optional[int] = None
+    time_joined: Optional[str] = None
+    base: Optional[LegacyBase] = None
+
+
+@dataclass
+class LegacyGameObject:
+    id: int
+    position: LegacyPosition
+    type: str
+    properties: Optional[LegacyProperties] = None
+
+
+@dataclass
+class LegacyConfig:
+    generation_ratio: Optional[float] = None
+    min_ratio_for_generation: Optional[float] = None
+    red_ratio: Optional[float] = None
+    seconds: Optional[int] = None
+    pairs: Optional[int] = None
+    inventory_size: Optional[int] = None
+    can_tackle: Optional[bool] = None
+
+
+@dataclass
+class LegacyFeature:
+    name: str
+    config: Optional[LegacyConfig] = None
+
+
+@dataclass
+class LegacyBoard:
+    id: int
+    width: int
+    height: int
+    features: List[LegacyFeature]
+    minimum_delay_between_moves: int
+    game_objects: Optional[List[LegacyGameObject]]
+
+
+###############################################################################
+#
+# Benchmark
+#
+###############################################################################
+VARIANTS = {
+    "dict": lambda payload: decode_into(LegacyBoard, payload),
+    "slots": lambda payload: decode_into(Board, payload),
+    "slots+packed": lambda payload: decode_into(Board, payload, COMPACT_POSITIONS),
+}
+
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "board_*.json"))):
+        name = os.path.basename(path)[len("board_") : -len(".json")]
+        with open(path) as f:
+            fixtures[name] = json.load(f)["data"]
+    return fixtures
+
+
+def allocations(build, payload):
+    """
+    :return: (number of memory blocks, bytes) still held by one built board
+    """
+    build(payload)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    board = build(payload)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del board
+    return sum(stat.count_diff for stat in stats), sum(stat.size_diff for stat in stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", default=200, type=int, action="store")
+    args = parser.parse_args()
+
+    print(
+        "{:<8} {:<14} {:>8} {:>10} {:>12}".format(
+            "board", "models", "blocks", "bytes", "build time"
+        )
+    )
+    for name, payload in load_fixtures().items():
+        for variant, build in VARIANTS.items():
+            blocks, size = allocations(build, payload)
+            seconds = min(
+                timeit.repeat(lambda: build(payload), number=args.number, repeat=5)
+            )
+            print(
+                "{:<8} {:<14} {:>8} {:>10} {:>9.1f} us".format(
+                    name, variant, blocks, size, seconds / args.number * 1e6
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Decision latency benchmark for the logic controllers on the board fixtures.
+Replays the recorded games and the synthetic boards through every
+controller's next_move, once for every bot on the board, and reports p50,
+p99 and max latency plus the peak memory allocated per decision. The results
+are compared with a stored baseline and regressions are flagged. Timings are
+scaled by a fixed reference workload timed next to every case, so a slower or
+busier machine than the one that wrote the baseline is not flagged.
+
+    python benchmarks/bench_next_move.py [--repeat N] [--save-baseline]
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from decode import decode_into
+from game.controllers import CONTROLLERS, DEFAULT_CONTROLLERS
+from game.models import Board
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "next_move.json"
+)
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_REPEAT = 10
+# Metrics compared with the baseline and the smallest growth that counts, so
+# a few microseconds of noise on the small boards is not flagged. The maximum
+# is reported but too noisy to flag on.
+COMPARED = {"p50_us": 50.0, "p99_us": 100.0, "peak_kib": 1.0}
+# The p99 of fewer calls is one of the slowest few decisions, as noisy as
+# the maximum, so it is only compared on the recorded games
+MIN_P99_CALLS = 100
+TIMED_METRICS = ("p50_us", "p99_us")
+# Small corpora are repeated until they time at least this many decisions
+MIN_TIMED_DECISIONS = 200
+
+
+###############################################################################
+#
+# Corpus
+#
+###############################################################################
+def load_corpus():
+    """
+    :return: {name: [Board, ...]}; recorded games keep their tick order
+    """
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "game_*.jsonl"))):
+        name = os.path.basename(path)[: -len(".jsonl")]
+        with open(path) as f:
+            corpus[name] = [decode_into(Board, json.loads(line)["data"]) for line in f]
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "board_*.json"))):
+        name = os.path.basename(path)[: -len(".json")]
+        with open(path) as f:
+            corpus[name] = [decode_into(Board, json.load(f)["data"])]
+    return corpus
+
+
+###############################################################################
+#
+# Benchmark
+#
+###############################################################################
+def decisions(controller: str, boards: list):
+    """
+    Yield a (call, board_bot, board) for every bot on every board. Each bot
+    keeps one logic instance across the boards of a recorded game.
+    """
+    random.seed(0)
+    logics = {}
+    try:
+        for board in boards:
+            for board_bot in board.bots:
+                name = board_bot.properties.name
+                if name not in logics:
+                    logics[name] = CONTROLLERS[controller]()
+                yield logics[name].next_move, board_bot, board
+    finally:
+        for logic in logics.values():
+            logic.close()
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def reference_us() -> float:
+    """
+    Time a fixed pure Python workload, about as heavy as a large decision.
+    Timings are compared relative to it.
+    """
+    points = [(x * 7 % 50, x * 13 % 50) for x in range(100)]
+    started = time.perf_counter_ns()
+    nearest = {}
+    for x, y in points:
+        for tx, ty in points[:20]:
+            distance = abs(x - tx) + abs(y - ty)
+            if distance < nearest.get((tx, ty), 100):
+                nearest[(tx, ty)] = distance
+    return (time.perf_counter_ns() - started) / 1000
+
+
+def measure(controller: str, boards: list, repeat: int) -> dict:
+    # Every run replays the same decisions with fresh logic and the same
+    # random seed, so each decision keeps its fastest run, like timeit does.
+    # The reference is timed before every run, so it keeps its fastest run
+    # from the same stretch of time.
+    calls = sum(len(board.bots) for board in boards)
+    repeat = max(repeat, -(-MIN_TIMED_DECISIONS // calls))
+    runs = []
+    references = []
+    for _ in range(repeat):
+        references.append(reference_us())
+        run = []
+        for next_move, board_bot, board in decisions(controller, boards):
+            started = time.perf_counter_ns()
+            next_move(board_bot, board)
+            run.append((time.perf_counter_ns() - started) / 1000)
+        runs.append(run)
+    latencies = [min(decision) for decision in zip(*runs)]
+
+    # Allocations are measured on a separate pass, tracing slows every call
+    peaks = []
+    tracemalloc.start()
+    for next_move, board_bot, board in decisions(controller, boards):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        next_move(board_bot, board)
+        peaks.append((tracemalloc.get_traced_memory()[1] - current) / 1024)
+    tracemalloc.stop()
+
+    return {
+        "calls": len(latencies),
+        "p50_us": percentile(latencies, 0.5),
+        "p99_us": percentile(latencies, 0.99),
+        "max_us": max(latencies),
+        "peak_kib": sum(peaks) / len(peaks),
+        "max_peak_kib": max(peaks),
+        "reference_us": min(references),
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    :return: (corpus, controller, metric, baseline value, value) for every
+        compared metric that grew by more than the tolerance and its floor.
+        Baseline timings are scaled to this machine by the reference
+        workload timed with each case.
+    """
+    found = []
+    for corpus, by_controller in results.items():
+        for controller, metrics in by_controller.items():
+            previous = baseline.get(corpus, {}).get(controller)
+            if not previous:
+                continue
+            speed = 1.0
+            if previous.get("reference_us"):
+                speed = metrics["reference_us"] / previous["reference_us"]
+            for metric, floor in COMPARED.items():
+                if metric not in previous:
+                    continue
+                if metric == "p99_us" and min(metrics["calls"], previous["calls"]) < MIN_P99_CALLS:
+                    continue
+                expected = previous[metric] * speed if metric in TIMED_METRICS else previous[metric]
+                growth = metrics[metric] - expected
+                if growth > floor and growth > expected * tolerance:
+                    found.append((corpus, controller, metric, expected, metrics[metric]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", default=DEFAULT_REPEAT, type=int, action="store")
+    parser.add_argument(
+        "--controllers", nargs="+", default=DEFAULT_CONTROLLERS, choices=list(CONTROLLERS)
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, action="store")
+    parser.add_argument(
+        "--tolerance",
+        help="Flag a metric that exceeds the baseline by more than this fraction. Default: {}".format(
+            DEFAULT_TOLERANCE
+        ),
+        default=DEFAULT_TOLERANCE,
+        type=float,
+        action="store",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        help="Write the results to the baseline file instead of comparing",
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    print(
+        "{:<14} {:<12} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+            "corpus", "logic", "calls", "p50", "p99", "max", "peak", "max peak"
+        )
+    )
+    results = {}
+    for corpus, boards in load_corpus().items():
+        for controller in args.controllers:
+            metrics = measure(controller, boards, args.repeat)
+            results.setdefault(corpus, {})[controller] = metrics
+            print(
+                "{:<14} {:<12} {:>7} {:>7.1f} us {:>7.1f} us {:>7.1f} us {:>6.1f} KiB {:>6.1f} KiB".format(
+                    corpus,
+                    controller,
+                    metrics["calls"],
+                    metrics["p50_us"],
+                    metrics["p99_us"],
+                    metrics["max_us"],
+                    metrics["peak_kib"],
+                    metrics["max_peak_kib"],
+                )
+            )
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Wrote {}".format(args.baseline))
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}, run with --save-baseline".format(args.baseline))
+        return
+    with open(args.baseline) as f:
+        found = regressions(results, json.load(f), args.tolerance)
+    for corpus, controller, metric, previous, value in found:
+        print(
+            "REGRESSION {} {} {}: {:.1f} -> {:.1f} (+{:.0f}%)".format(
+                corpus, controller, metric, previous, value, (value / previous - 1) * 100
+            )
+        )
+    if found:
+        sys.exit(1)
+    print("No regressions against {} (tolerance {:.0%})".format(args.baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
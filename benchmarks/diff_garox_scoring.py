@@ -0,0 +1,93 @@
+"""
+Differential check of Garox's vectorized and grid pruned diamond scoring
+against the loop they replace. Every bot on every board of the fixtures, and
+of any given recordings, is played by one Garox instance per scoring path,
+with the same random state. Any difference in move or goal is reported and
+fails the run. Decision times of every path are printed as well.
+
+    python benchmarks/diff_garox_scoring.py [recording.jsonl.gz ...]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bench_next_move import load_corpus, percentile
+from game.logic.garox import Garox
+from game.recorder import recording_sessions
+
+
+# Path: (vectorized_scoring_min_diamonds, pruned_scoring_min_diamonds)
+PATHS = {"loop": (None, None), "pruned": (None, 0), "vectorized": (0, None)}
+
+
+def garox(path: str) -> Garox:
+    logic = Garox()
+    logic.vectorized_scoring_min_diamonds, logic.pruned_scoring_min_diamonds = PATHS[path]
+    return logic
+
+
+def compare(boards: list) -> dict:
+    """
+    Play both paths through a game, each bot keeping its two instances
+    """
+    result = {"decisions": 0, "mismatches": []}
+    result.update({path: [] for path in PATHS})
+    logics = {}
+    for tick, board in enumerate(boards):
+        for board_bot in board.bots:
+            name = board_bot.properties.name
+            if name not in logics:
+                logics[name] = {path: garox(path) for path in PATHS}
+            moves = {}
+            for path, logic in logics[name].items():
+                random.seed(tick)
+                started = time.perf_counter_ns()
+                move = logic.next_move(board_bot, board)
+                result[path].append((time.perf_counter_ns() - started) / 1000)
+                goal = logic.goal_position
+                moves[path] = (move, (goal.x, goal.y) if goal else None)
+            result["decisions"] += 1
+            for path, move in moves.items():
+                if move != moves["loop"]:
+                    result["mismatches"].append((tick, name, path, moves["loop"], move))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recordings", nargs="*", help="Recordings made with main.py --record")
+    args = parser.parse_args()
+
+    games = load_corpus()
+    for path in args.recordings:
+        for session, boards in enumerate(recording_sessions(path)):
+            games["{}#{}".format(os.path.basename(path), session)] = boards
+
+    print(
+        "{:<24} {:>9} {:>10}".format("corpus", "decisions", "mismatches")
+        + "".join(" {:>14}".format(path + " p50") for path in PATHS)
+        + "".join(" {:>14}".format(path + " p99") for path in PATHS)
+    )
+    failed = False
+    for name, boards in games.items():
+        result = compare(boards)
+        print(
+            "{:<24} {:>9} {:>10}".format(name, result["decisions"], len(result["mismatches"]))
+            + "".join(" {:>11.1f} us".format(percentile(result[path], 0.5)) for path in PATHS)
+            + "".join(" {:>11.1f} us".format(percentile(result[path], 0.99)) for path in PATHS)
+        )
+        for tick, bot, path, loop, other in result["mismatches"][:5]:
+            print("  tick {} {}: loop {} {} {}".format(tick, bot, loop, path, other))
+        failed = failed or bool(result["mismatches"])
+    if failed:
+        sys.exit(1)
+    print("All scoring paths chose the same moves")
+
+
+if __name__ == "__main__":
+    main()
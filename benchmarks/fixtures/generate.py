@@ -0,0 +1,150 @@
+"""
+Regenerate the board fixtures used by the benchmarks. The payloads follow the
+camel case format returned by GET /boards/{id}, wrapped in the same
+{"data": ...} envelope, and are seeded so every run writes the same files.
+
+board_*.json hold one synthetic board each. game_*.jsonl are recorded games:
+the controllers play on the simulated engine and every few ticks the board
+is written as one line.
+
+    python benchmarks/fixtures/generate.py
+"""
+import json
+import os
+import random
+import sys
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(FIXTURES_DIR, "..", "..", "src"))
+
+from decode import encode
+from game.controllers import CONTROLLERS
+from game.engine import Engine, EngineConfig
+
+BOARDS = {
+    "small": dict(width=15, height=15, bots=4, diamonds=10, teleporter_pairs=1),
+    "medium": dict(width=20, height=20, bots=8, diamonds=40, teleporter_pairs=1),
+    "large": dict(width=50, height=50, bots=30, diamonds=300, teleporter_pairs=4),
+}
+
+GAMES = {
+    "small": dict(
+        config=EngineConfig(width=15, height=15),
+        controllers=["Garox", "D", "Garox", "D"],
+        every=10,
+    ),
+    "large": dict(
+        config=EngineConfig(width=50, height=50, teleporter_pairs=4),
+        controllers=["Garox", "D"] * 6,
+        every=40,
+    ),
+}
+
+
+def board_payload(seed, width, height, bots, diamonds, teleporter_pairs):
+    rnd = random.Random(seed)
+    taken = set()
+
+    def free_position():
+        while True:
+            x, y = rnd.randrange(width), rnd.randrange(height)
+            if (x, y) not in taken:
+                taken.add((x, y))
+                return {"x": x, "y": y}
+
+    objects = []
+
+    def add(type_name, properties=None):
+        game_object = {
+            "id": len(objects) + 1,
+            "position": free_position(),
+            "type": type_name,
+        }
+        if properties is not None:
+            game_object["properties"] = properties
+        objects.append(game_object)
+        return game_object
+
+    for i in range(bots):
+        name = "bot{}".format(i)
+        base = add("BaseGameObject", {"name": name})
+        add(
+            "BotGameObject",
+            {
+                "diamonds": rnd.randrange(0, 5),
+                "score": rnd.randrange(0, 30),
+                "name": name,
+                "inventorySize": 5,
+                "canTackle": True,
+                "millisecondsLeft": rnd.randrange(1000, 60000),
+                "timeJoined": "2024-05-01T10:00:00.000Z",
+                "base": dict(base["position"]),
+            },
+        )
+    for _ in range(teleporter_pairs):
+        first = add("TeleportGameObject", {})
+        second = add("TeleportGameObject", {"pairId": str(first["id"])})
+        first["properties"]["pairId"] = str(second["id"])
+    add("DiamondButtonGameObject")
+    for _ in range(diamonds):
+        add("DiamondGameObject", {"points": 2 if rnd.random() < 0.2 else 1})
+
+    return {
+        "id": 1,
+        "width": width,
+        "height": height,
+        "minimumDelayBetweenMoves": 100,
+        "features": [
+            {"name": "DiamondButtonProvider", "config": None},
+            {
+                "name": "DiamondProvider",
+                "config": {
+                    "generationRatio": 0.1,
+                    "minRatioForGeneration": 0.01,
+                    "redRatio": 0.2,
+                },
+            },
+            {"name": "TeleportProvider", "config": {"pairs": teleporter_pairs}},
+            {"name": "BotProvider", "config": {"inventorySize": 5, "canTackle": True}},
+            {"name": "GameTimeProvider", "config": {"seconds": 60}},
+        ],
+        "gameObjects": objects,
+    }
+
+
+def game_payloads(seed, config, controllers, every):
+    """
+    Play a game on the engine and yield the board every few ticks
+    """
+    engine = Engine(config, seed=seed)
+    # Logic draws from the global random module, some already when built
+    random.seed(seed)
+    logics = {
+        "bot{}".format(i): CONTROLLERS[name]() for i, name in enumerate(controllers)
+    }
+    for name in logics:
+        engine.add_bot(name)
+    tick = 0
+    while not engine.finished:
+        board = engine.step(logics)
+        if tick % every == 0:
+            yield encode(board)
+        tick += 1
+
+
+def main():
+    for seed, (name, params) in enumerate(BOARDS.items()):
+        path = os.path.join(FIXTURES_DIR, "board_{}.json".format(name))
+        with open(path, "w") as f:
+            json.dump({"data": board_payload(seed, **params)}, f)
+        print("Wrote {}".format(path))
+    for seed, (name, params) in enumerate(GAMES.items()):
+        path = os.path.join(FIXTURES_DIR, "game_{}.jsonl".format(name))
+        with open(path, "w") as f:
+            for payload in game_payloads(seed, **params):
+                f.write(json.dumps({"data": payload}) + "\n")
+        print("Wrote {}".format(path))
+
+
+if __name__ == "__main__":
+    main()
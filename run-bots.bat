@@ -1,4 +1,3 @@
 @echo off
-start cmd /c "python src/main.py --logic Garox --email=garox@email.com --name=garox --password=123456 --team etimo &"
-start cmd /c "python src/main.py --logic D --email=d42@email.com --name=d --password=123456 --team etimo &"
+python src/runner.py --roster roster.json
 
@@ -1,4 +1,3 @@
 #!/bin/bash
 
-python main.py --logic Garox --email=garox@email.com --name=garox --password=123456 --team etimo &
-python main.py --logic D --email=d42@email.com --name=d --password=123456 --team etimo &
+python src/runner.py --roster roster.json
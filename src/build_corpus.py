@@ -0,0 +1,108 @@
+import argparse
+import random
+
+from game.batch_engine import BatchEngine
+from game.columnar import DEFAULT_TELEPORTERS, ColumnarReader, ColumnarWriter
+from game.controllers import CONTROLLERS, DEFAULT_CONTROLLERS
+from game.engine import Engine, EngineConfig
+from game.log import get_logger, setup_logging
+from game.logic.garox_vectorized import garox_policy
+from game.recorder import recording_sessions
+
+logger = get_logger("build_corpus")
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Append games to a columnar, memory mapped replay corpus"
+)
+parser.add_argument("corpus", help="Corpus directory, created when missing", action="store")
+parser.add_argument(
+    "--recordings",
+    help="Recordings made with main.py --record; every session becomes a game",
+    nargs="+",
+    default=[],
+)
+parser.add_argument(
+    "--simulate",
+    help="Number of games to play on the simulated engine with --controllers",
+    default=0,
+    type=int,
+    action="store",
+)
+parser.add_argument(
+    "--controllers",
+    help="One controller per bot in simulated games. Default: {}".format(
+        ", ".join(DEFAULT_CONTROLLERS)
+    ),
+    nargs="+",
+    default=DEFAULT_CONTROLLERS,
+    choices=list(CONTROLLERS),
+)
+parser.add_argument(
+    "--batch",
+    help="Number of games to play on the batched engine with the vectorized Garox policy, one bot per --controllers entry",
+    default=0,
+    type=int,
+    action="store",
+)
+parser.add_argument("--seed", default=0, type=int, action="store")
+group = parser.add_argument_group("Corpus layout, fixed when the corpus is created")
+group.add_argument("--width", default=15, type=int, action="store")
+group.add_argument("--height", default=15, type=int, action="store")
+group.add_argument("--bots", help="Bot slots per game", default=4, type=int, action="store")
+group.add_argument(
+    "--teleporters", default=DEFAULT_TELEPORTERS, type=int, action="store"
+)
+parser.add_argument("--log-level", default="INFO", action="store")
+
+
+def simulated_boards(seed: int, controllers: list, config: EngineConfig):
+    engine = Engine(config, seed=seed)
+    random.seed(seed)
+    logics = {
+        "bot{}".format(i): CONTROLLERS[name]() for i, name in enumerate(controllers)
+    }
+    for name in logics:
+        engine.add_bot(name)
+    try:
+        while not engine.finished:
+            yield engine.step(logics)
+    finally:
+        for logic in logics.values():
+            logic.close()
+
+
+def main(args):
+    config = EngineConfig(width=args.width, height=args.height)
+    with ColumnarWriter(
+        args.corpus, args.width, args.height, args.bots, args.teleporters
+    ) as writer:
+        for path in args.recordings:
+            for boards in recording_sessions(path):
+                writer.add_boards(boards, source=path)
+        for game in range(args.simulate):
+            writer.add_boards(
+                simulated_boards(args.seed + game, args.controllers, config),
+                source="engine:" + ",".join(args.controllers),
+            )
+        if args.batch:
+            engine = BatchEngine(args.batch, len(args.controllers), config, seed=args.seed)
+            writer.add_batch(engine, garox_policy, source="batch:garox_policy")
+
+    reader = ColumnarReader(args.corpus)
+    logger.info(
+        "%s now holds %s games, %s ticks",
+        args.corpus,
+        len(reader),
+        len(reader.column("positions")),
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+    main(args)
@@ -1,47 +1,55 @@
 import re
+import typing
+from dataclasses import fields, is_dataclass
+from functools import lru_cache
 
+# The server only sends a few dozen distinct keys, this leaves plenty of room
+SNAKE_CASE_CACHE_SIZE = 1024
 
-def _unpack(data):
-    if isinstance(data, dict):
-        return data.items()
-    return data
+_FIRST_CAP = re.compile("(.)([A-Z][a-z]+)")
+_ALL_CAP = re.compile("([a-z0-9])([A-Z])")
+
+_SKIP = object()
+_builders = {}
 
 
+@lru_cache(maxsize=SNAKE_CASE_CACHE_SIZE)
 def _snake_case(value):
     """
     Convert camel case string to snake case
     :param value: string
     :return: string
     """
-    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
-    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
-
-
-def _keys_to_snake_case(content):
-    """
-    Convert all keys for given dict to snake case
-    :param content: dict
-    :return: dict
-    """
-    return {_snake_case(key): value for key, value in content.items()}
+    first_underscore = _FIRST_CAP.sub(r"\1_\2", value)
+    return _ALL_CAP.sub(r"\1_\2", first_underscore).lower()
 
 
 def decode_keys(data):
     """
-    Convert all keys for given dict/list to snake case recursively
+    Convert all keys for given dict/list to snake case. Walks nested values
+    with an explicit stack, so deep payloads do not grow the call stack.
     :param data: dict
     :return: dict
     """
     formatted = {}
-    for key, value in _unpack(_keys_to_snake_case(data)):
-        if isinstance(value, dict):
-            formatted[key] = decode_keys(value)
-        elif isinstance(value, list) and len(value) > 0:
-            formatted[key] = []
-            for _, val in enumerate(value):
-                formatted[key].append(decode_keys(val))
-        else:
-            formatted[key] = value
+    stack = [(data, formatted)]
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            key = _snake_case(key)
+            if isinstance(value, dict):
+                target[key] = {}
+                stack.append((value, target[key]))
+            elif isinstance(value, list) and len(value) > 0:
+                target[key] = []
+                for val in value:
+                    if isinstance(val, dict):
+                        target[key].append({})
+                        stack.append((val, target[key][-1]))
+                    else:
+                        target[key].append(val)
+            else:
+                target[key] = value
     return formatted
 
 
@@ -53,3 +61,113 @@ def decode(data):
     for item in data:
         formatted.append(decode_keys(item))
     return formatted
+
+
+def _camel_case(value):
+    """
+    Convert snake case string to camel case
+    :param value: string
+    :return: string
+    """
+    head, *tail = value.split("_")
+    return head + "".join(part.title() for part in tail)
+
+
+def _converter(tp, overrides=()):
+    """
+    Build a function converting raw JSON data into the given field type, or
+    None when the value can be used as it is
+    """
+    for override_type, override in overrides:
+        if tp is override_type:
+            return override
+    origin = typing.get_origin(tp)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        return _converter(args[0], overrides) if len(args) == 1 else None
+    if origin is list:
+        (item_type,) = typing.get_args(tp) or (typing.Any,)
+        convert_item = _converter(item_type, overrides)
+        if convert_item is None:
+            return None
+        return lambda items: [convert_item(item) for item in items]
+    if is_dataclass(tp):
+        return _builder(tp, overrides)
+    return None
+
+
+def _builder(cls, overrides=()):
+    """
+    Build a function turning a camel case dict into an instance of the given
+    dataclass. Keys are mapped to fields ahead of time; spellings the server
+    has not used before are resolved once with _snake_case and remembered.
+    """
+    if (cls, overrides) in _builders:
+        return _builders[cls, overrides]
+
+    specs = {}
+
+    def build(data):
+        kwargs = {}
+        for key, value in data.items():
+            spec = specs.get(key)
+            if spec is None:
+                spec = specs.setdefault(key, by_name.get(_snake_case(key), _SKIP))
+            if spec is _SKIP:
+                continue
+            name, convert = spec
+            if convert is not None and value is not None:
+                value = convert(value)
+            kwargs[name] = value
+        return cls(**kwargs)
+
+    # Register before resolving field types so recursive models terminate
+    _builders[cls, overrides] = build
+    hints = typing.get_type_hints(cls)
+    by_name = {}
+    for field in fields(cls):
+        if not field.init:
+            continue
+        by_name[field.name] = (field.name, _converter(hints[field.name], overrides))
+        specs[_camel_case(field.name)] = by_name[field.name]
+    return build
+
+
+def decode_into(cls, data, overrides=()):
+    """
+    Convert camel case JSON data straight into dataclass instances in one
+    pass. Gives the same result as from_dict(cls, decode(data)).
+    :param cls: dataclass type
+    :param data: dict, or list of dicts
+    :param overrides: (type, converter) pairs replacing how fields of that
+        type are built, e.g. to store positions as tuples
+    :return: instance of cls, or list of instances
+    """
+    build = _builder(cls, tuple(overrides))
+    if isinstance(data, dict):
+        return build(data)
+    return [build(item) for item in data]
+
+
+def encode(value):
+    """
+    Convert dataclass instances back into camel case JSON data, the inverse
+    of decode_into. Named tuples such as packed positions become dicts and
+    fields that are None are left out, like the server does.
+    :param value: dataclass instance, named tuple, list or plain value
+    :return: dict, list or plain value
+    """
+    if is_dataclass(value):
+        encoded = {}
+        for field in fields(value):
+            if not field.init:
+                continue
+            item = getattr(value, field.name)
+            if item is not None:
+                encoded[_camel_case(field.name)] = encode(item)
+        return encoded
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return {key: encode(item) for key, item in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    return value
@@ -1,44 +1,113 @@
 import json
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple, Union
 
 import requests
-from colorama import Back, Fore, Style, init
 from dacite import from_dict
-from decode import decode
-from game.models import Board, Bot
+from decode import decode, decode_into
+from game.log import get_logger
+from game.models import COMPACT_POSITIONS, Board, Bot
+from game.recorder import Recorder
 from requests import Response
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+
+logger = get_logger("api")
+
+
+@dataclass
+class ConnectionStats:
+    opened: int = 0
+    reused: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.opened + self.reused
 
 
 @dataclass
 class Api:
     url: str
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    session: Optional[requests.Session] = field(default=None, repr=False)
+    stats: ConnectionStats = field(default_factory=ConnectionStats)
+    fast_decode: bool = True
+    compact_positions: bool = False
+    # Every board received is also written to the recorder, when there is one
+    recorder: Optional[Recorder] = field(default=None, repr=False)
+    last_request_ms: float = field(default=0.0, init=False, repr=False)
+
+    def __post_init__(self):
+        # One session per Api keeps a keep-alive pool per host, so every
+        # endpoint on the server reuses the same warm connections.
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+            )
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {"Content-Type": "application/json", "Connection": "keep-alive"}
+        )
+
+    def close(self):
+        self.session.close()
+
+    def _to_model(self, cls, data):
+        return to_model(cls, data, self.fast_decode, self.compact_positions)
+
+    def _record_board(self, source: str, data: dict):
+        if self.recorder is not None:
+            self.recorder.record(
+                "board", source=source, request_ms=self.last_request_ms, board=data
+            )
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
+    def _opened_connections(self, url: str) -> int:
+        pools = self.session.get_adapter(url).poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
     def _req(self, endpoint: str, method: str, body: dict) -> Response:
-        print(
-            ">>> {} {} {}".format(
-                Style.BRIGHT + method.upper() + Style.RESET_ALL,
-                Fore.GREEN + endpoint + Style.RESET_ALL,
-                body,
-            )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(">>> %s %s %s", method.upper(), endpoint, body)
+        url = self._get_url(endpoint)
+        opened_before = self._opened_connections(url)
+        started_at = time.perf_counter()
+        res = self.session.request(
+            method,
+            url,
+            data=json.dumps(body),
+            timeout=(self.connect_timeout, self.read_timeout),
         )
-        func = getattr(requests, method)
-        headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
-        if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
+        elapsed = time.perf_counter() - started_at
+        self.last_request_ms = elapsed * 1000
+        reused = self._opened_connections(url) <= opened_before
+        if reused:
+            self.stats.reused += 1
         else:
-            print("<<< {} {}".format(res.status_code, res.text))
+            self.stats.opened += 1
+        # The body is only decoded when an error response is logged
+        log_response(method, endpoint, res.status_code, lambda: res.text, elapsed, reused)
         return res
 
     def bots_get(self, bot_token: str) -> Optional[Bot]:
         response = self._req("/bots/{}".format(bot_token), "get", {})
         data, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, data)
+            return self._to_model(Bot, data)
         return None
 
     def bots_register(
@@ -51,14 +120,14 @@ class Api:
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, resp)
+            return self._to_model(Bot, resp)
         return None
 
     def boards_list(self) -> Optional[List[Board]]:
         response = self._req("/boards", "get", {})
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            return self._to_model(Board, resp)
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
@@ -75,7 +144,8 @@ class Api:
         response = self._req("/boards/{}".format(board_id), "get", {})
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            self._record_board("get", resp)
+            return self._to_model(Board, resp)
         return None
 
     def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
@@ -86,7 +156,8 @@ class Api:
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            self._record_board("move", resp)
+            return self._to_model(Board, resp)
         return None
 
     def bots_recover(self, email: str, password: str) -> Optional[str]:
@@ -104,10 +175,61 @@ class Api:
     def _return_response_and_status(
         self, response: Response
     ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
-
-        response_data = resp.get("data") if isinstance(resp, dict) else resp
-        if not response_data:
-            response_data = resp
-
-        return decode(response_data), response.status_code
+        return unwrap_data(response.json()), response.status_code
+
+
+def log_response(
+    method: str,
+    endpoint: str,
+    status: int,
+    text: Callable[[], str],
+    elapsed: float,
+    reused: bool,
+):
+    """
+    :param text: returns the response body, called only when it is logged
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    fields = {
+        "event": "request",
+        "method": method.upper(),
+        "endpoint": endpoint,
+        "status": status,
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "reused": reused,
+    }
+    if status == 200:
+        logger.debug("<<< %s OK %.1f ms", status, elapsed * 1000, extra=fields)
+    else:
+        logger.debug("<<< %s %s", status, text(), extra=fields)
+
+
+def unwrap_data(resp: Union[dict, List]) -> Union[dict, List]:
+    response_data = resp.get("data") if isinstance(resp, dict) else resp
+    if not response_data:
+        response_data = resp
+
+    return response_data
+
+
+def to_model(
+    cls,
+    data: Union[dict, List],
+    fast_decode: bool = True,
+    compact_positions: bool = False,
+):
+    """
+    Turn unwrapped camel case response data into model objects. The fast
+    path maps keys and builds the dataclasses in a single pass; otherwise keys
+    are converted with decode() and the models built with dacite.
+    compact_positions stores positions as interned PackedPosition tuples and
+    only applies to the fast path.
+    """
+    if fast_decode:
+        overrides = COMPACT_POSITIONS if compact_positions else ()
+        return decode_into(cls, data, overrides)
+    decoded = decode(data)
+    if isinstance(decoded, dict):
+        return from_dict(cls, decoded)
+    return [from_dict(cls, item) for item in decoded]
@@ -0,0 +1,150 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+import aiohttp
+from game.api import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_READ_TIMEOUT,
+    ConnectionStats,
+    log_response,
+    logger,
+    to_model,
+    unwrap_data,
+)
+from game.models import Board, Bot
+
+
+@dataclass
+class AsyncApi:
+    url: str
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    session: Optional[aiohttp.ClientSession] = field(default=None, repr=False)
+    stats: ConnectionStats = field(default_factory=ConnectionStats)
+    fast_decode: bool = True
+    compact_positions: bool = False
+
+    def _to_model(self, cls, data):
+        return to_model(cls, data, self.fast_decode, self.compact_positions)
+
+    def _get_url(self, endpoint: str) -> str:
+        return "{}{}".format(self.url, endpoint)
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        async def on_create(session, context, params):
+            self.stats.opened += 1
+
+        async def on_reuse(session, context, params):
+            self.stats.reused += 1
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx["reused"] = True
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_create)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session has to be created from inside the running event loop,
+        # so it is opened lazily on the first request.
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.connect_timeout, sock_read=self.read_timeout
+                ),
+                headers={"Content-Type": "application/json"},
+                trace_configs=[self._trace_config()],
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def _req(
+        self, endpoint: str, method: str, body: dict
+    ) -> Tuple[Union[dict, List], int]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(">>> %s %s %s", method.upper(), endpoint, body)
+        trace = {"reused": False}
+        started_at = time.perf_counter()
+        async with self._get_session().request(
+            method,
+            self._get_url(endpoint),
+            data=json.dumps(body),
+            trace_request_ctx=trace,
+        ) as res:
+            text = await res.text()
+            status = res.status
+        log_response(
+            method,
+            endpoint,
+            status,
+            lambda: text,
+            time.perf_counter() - started_at,
+            trace["reused"],
+        )
+        return unwrap_data(json.loads(text)), status
+
+    async def bots_get(self, bot_token: str) -> Optional[Bot]:
+        data, status = await self._req("/bots/{}".format(bot_token), "get", {})
+        if status == 200:
+            return self._to_model(Bot, data)
+        return None
+
+    async def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        resp, status = await self._req(
+            "/bots",
+            "post",
+            {"email": email, "name": name, "password": password, "team": team},
+        )
+        if status == 200:
+            return self._to_model(Bot, resp)
+        return None
+
+    async def boards_list(self) -> Optional[List[Board]]:
+        resp, status = await self._req("/boards", "get", {})
+        if status == 200:
+            return self._to_model(Board, resp)
+        return None
+
+    async def bots_join(self, bot_token: str, board_id: int) -> bool:
+        resp, status = await self._req(
+            f"/bots/{bot_token}/join", "post", {"preferredBoardId": board_id}
+        )
+        return status == 200
+
+    async def boards_get(self, board_id: str) -> Optional[Board]:
+        resp, status = await self._req("/boards/{}".format(board_id), "get", {})
+        if status == 200:
+            return self._to_model(Board, resp)
+        return None
+
+    async def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+        resp, status = await self._req(
+            "/bots/{}/move".format(bot_token),
+            "post",
+            {"direction": direction},
+        )
+        if status == 200:
+            return self._to_model(Board, resp)
+        return None
+
+    async def bots_recover(self, email: str, password: str) -> Optional[str]:
+        try:
+            resp, status = await self._req(
+                "/bots/recover", "post", {"email": email, "password": password}
+            )
+            if status == 201:
+                return resp["id"]
+            return None
+        except Exception:
+            return None
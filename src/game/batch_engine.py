@@ -0,0 +1,338 @@
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from game.engine import (
+    BLUE_DIAMOND_POINTS,
+    RED_DIAMOND_POINTS,
+    EngineConfig,
+    board_features,
+)
+from game.logic.base import BaseLogic
+from game.models import (
+    BASE_TYPE,
+    BOT_TYPE,
+    DIAMOND_BUTTON_TYPE,
+    DIAMOND_TYPE,
+    TELEPORTER_TYPE,
+    Board,
+    GameObject,
+    Properties,
+    intern_position,
+)
+
+# Cells that are taken while sampling free cells get a priority above any
+# uniform draw, so they are never picked
+_TAKEN = 2.0
+
+
+class BatchEngine:
+    """
+    Many independent Diamonds games stepped together. Every piece of state is
+    a stacked array with the game as its first axis, so one call to step
+    advances all games at once; only the bots within a game are looped over,
+    because their moves are applied one after another.
+
+    The rules are those of game.engine.Engine with every bot joining at tick
+    zero. The bots of a game move in a random order that is drawn once per
+    tick and shared by all games.
+
+    Arrays, with G games, B bots, P teleporter pairs and an H x W board:
+        positions, bases: (G, B, 2) x, y
+        inventory, score: (G, B)
+        diamonds: (G, H, W) points of the diamond on each cell, 0 if none
+        teleporters: (G, 2P, 2) x, y; teleporter i is paired with i ^ 1
+        buttons: (G, 2) x, y
+    """
+
+    def __init__(
+        self,
+        games: int,
+        bots: int,
+        config: Optional[EngineConfig] = None,
+        seed: Optional[int] = None,
+    ):
+        self.config = config or EngineConfig()
+        self.games = games
+        self.bots = bots
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+        self.ticks = self.config.seconds * 1000 // self.config.minimum_delay_between_moves
+        self.features = board_features(self.config)
+
+        width, height = self.config.width, self.config.height
+        self.cells = width * height
+        self.target_diamonds = int(self.cells * self.config.generation_ratio)
+        self.min_diamonds = self.cells * self.config.min_ratio_for_generation
+
+        self.positions = np.zeros((games, bots, 2), dtype=np.int16)
+        self.bases = np.zeros((games, bots, 2), dtype=np.int16)
+        self.inventory = np.zeros((games, bots), dtype=np.int16)
+        self.score = np.zeros((games, bots), dtype=np.int32)
+        self.diamonds = np.zeros((games, height, width), dtype=np.int8)
+        self.teleporters = np.zeros(
+            (games, 2 * self.config.teleporter_pairs, 2), dtype=np.int16
+        )
+        self.buttons = np.zeros((games, 2), dtype=np.int16)
+
+        all_games = np.arange(games)
+        for pair in range(2 * self.config.teleporter_pairs):
+            self.teleporters[:, pair] = self._free_cells(all_games)
+        self.buttons[:] = self._free_cells(all_games)
+        for bot in range(bots):
+            self.bases[:, bot] = self._free_cells(all_games)
+        self.positions[:] = self.bases
+        self._generate_diamonds(all_games)
+
+    ###########################################################################
+    #
+    # Board bookkeeping
+    #
+    ###########################################################################
+    def _occupied(self, games: np.ndarray) -> np.ndarray:
+        """
+        :return: (len(games), H * W) mask of the cells holding any object
+        """
+        width = self.config.width
+        occupied = (self.diamonds[games] > 0).reshape(len(games), -1)
+        rows = np.arange(len(games))[:, None]
+        for points in (self.positions, self.bases, self.teleporters):
+            cells = points[games, :, 1].astype(np.int64) * width + points[games, :, 0]
+            occupied[rows, cells] = True
+        buttons = self.buttons[games]
+        occupied[np.arange(len(games)), buttons[:, 1].astype(np.int64) * width + buttons[:, 0]] = True
+        return occupied
+
+    def _sample(self, games: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Pick counts[i] distinct free cells in game games[i]
+        :return: (len(games), H * W) mask of the picked cells
+        """
+        priority = self.rng.random((len(games), self.cells))
+        occupied = self._occupied(games)
+        priority[occupied] = _TAKEN
+        counts = np.minimum(counts, (~occupied).sum(axis=1))
+        threshold = np.sort(priority, axis=1)[
+            np.arange(len(games)), np.maximum(counts, 1) - 1
+        ]
+        return (priority <= threshold[:, None]) & ~occupied & (counts > 0)[:, None]
+
+    def _free_cells(self, games: np.ndarray) -> np.ndarray:
+        """
+        :return: (len(games), 2) one free x, y per game
+        """
+        priority = self.rng.random((len(games), self.cells))
+        priority[self._occupied(games)] = _TAKEN
+        cells = priority.argmin(axis=1)
+        return np.stack([cells % self.config.width, cells // self.config.width], axis=1)
+
+    def _generate_diamonds(self, games: np.ndarray):
+        if len(games) == 0:
+            return
+        counts = (self.diamonds[games] > 0).sum(axis=(1, 2))
+        picked = self._sample(games, self.target_diamonds - counts)
+        points = np.where(
+            self.rng.random(picked.shape) < self.config.red_ratio,
+            RED_DIAMOND_POINTS,
+            BLUE_DIAMOND_POINTS,
+        ).astype(np.int8)
+        flat = self.diamonds[games].reshape(len(games), -1)
+        flat[picked] = points[picked]
+        self.diamonds[games] = flat.reshape(len(games), self.config.height, self.config.width)
+
+    ###########################################################################
+    #
+    # Stepping
+    #
+    ###########################################################################
+    @property
+    def finished(self) -> bool:
+        return self.tick >= self.ticks
+
+    @property
+    def milliseconds_left(self) -> int:
+        return (self.ticks - self.tick) * self.config.minimum_delay_between_moves
+
+    def step(self, actions: np.ndarray):
+        """
+        Apply one move per bot in every game and advance the clock one tick.
+        Moves that the server would reject leave the bot in place.
+        :param actions: (G, B, 2) delta x, delta y
+        """
+        actions = np.asarray(actions, dtype=np.int16)
+        width, height = self.config.width, self.config.height
+        games = np.arange(self.games)
+
+        for bot in self.rng.permutation(self.bots):
+            delta = actions[:, bot]
+            target = self.positions[:, bot] + delta
+            moved = (np.abs(delta).sum(axis=1) == 1) & (
+                (target[:, 0] >= 0)
+                & (target[:, 0] < width)
+                & (target[:, 1] >= 0)
+                & (target[:, 1] < height)
+            )
+
+            for other in range(self.bots):
+                if other == bot:
+                    continue
+                hit = moved & (self.positions[:, other] == target).all(axis=1)
+                if not hit.any():
+                    continue
+                if not self.config.can_tackle:
+                    moved &= ~hit
+                    continue
+                room = self.config.inventory_size - self.inventory[:, bot]
+                self.inventory[:, bot] += np.where(
+                    hit, np.minimum(room, self.inventory[:, other]), 0
+                )
+                self.inventory[hit, other] = 0
+                self.positions[hit, other] = self.bases[hit, other]
+
+            target = np.where(moved[:, None], target, self.positions[:, bot])
+            entered = target.copy()
+            for index in range(self.teleporters.shape[1]):
+                on = moved & (entered == self.teleporters[:, index]).all(axis=1)
+                target[on] = self.teleporters[on, index ^ 1]
+            self.positions[:, bot] = target
+
+            x, y = target[:, 0], target[:, 1]
+            points = self.diamonds[games, y, x]
+            take = moved & (points > 0) & (
+                self.inventory[:, bot] + points <= self.config.inventory_size
+            )
+            if take.any():
+                self.inventory[:, bot] += np.where(take, points, 0)
+                self.diamonds[games[take], y[take], x[take]] = 0
+                counts = (self.diamonds > 0).sum(axis=(1, 2))
+                self._generate_diamonds(games[take & (counts < self.min_diamonds)])
+
+            pressed = games[moved & (target == self.buttons).all(axis=1)]
+            if len(pressed):
+                self.diamonds[pressed] = 0
+                self.buttons[pressed] = self._free_cells(pressed)
+                self._generate_diamonds(pressed)
+
+            home = moved & (target == self.bases[:, bot]).all(axis=1)
+            self.score[:, bot] += np.where(home, self.inventory[:, bot], 0)
+            self.inventory[home, bot] = 0
+
+        self.tick += 1
+        relocation = (
+            self.config.teleport_relocation_seconds
+            * 1000
+            // self.config.minimum_delay_between_moves
+        )
+        if relocation and self.tick % relocation == 0:
+            for index in range(self.teleporters.shape[1]):
+                self.teleporters[:, index] = self._free_cells(games)
+
+    def run(self, policy: Callable[["BatchEngine"], np.ndarray]) -> np.ndarray:
+        """
+        Step every game to the end of its time
+        :param policy: returns the (G, B, 2) actions for the current state
+        :return: (G, B) final scores
+        """
+        while not self.finished:
+            self.step(policy(self))
+        return self.score.copy()
+
+    ###########################################################################
+    #
+    # Board bridge
+    #
+    ###########################################################################
+    def _bot_id(self, bot: int) -> int:
+        return bot + 1
+
+    def board(self, game: int) -> Board:
+        """
+        Build the Board for one game, in the shape the server sends
+        """
+        bots = self.bots
+        pairs = self.teleporters.shape[1]
+        button_id = 2 * bots + pairs + 1
+        game_objects = []
+        for bot in range(bots):
+            name = "bot{}".format(bot)
+            base = intern_position(*map(int, self.bases[game, bot]))
+            game_objects.append(
+                GameObject(bots + bot + 1, base, BASE_TYPE, Properties(name=name))
+            )
+            game_objects.append(
+                GameObject(
+                    self._bot_id(bot),
+                    intern_position(*map(int, self.positions[game, bot])),
+                    BOT_TYPE,
+                    Properties(
+                        diamonds=int(self.inventory[game, bot]),
+                        score=int(self.score[game, bot]),
+                        name=name,
+                        inventory_size=self.config.inventory_size,
+                        can_tackle=self.config.can_tackle,
+                        milliseconds_left=self.milliseconds_left,
+                        time_joined="0",
+                        base=base,
+                    ),
+                )
+            )
+        for index in range(pairs):
+            game_objects.append(
+                GameObject(
+                    2 * bots + index + 1,
+                    intern_position(*map(int, self.teleporters[game, index])),
+                    TELEPORTER_TYPE,
+                    # The server sends pair ids as strings
+                    Properties(pair_id=str(2 * bots + (index ^ 1) + 1)),
+                )
+            )
+        game_objects.append(
+            GameObject(
+                button_id,
+                intern_position(*map(int, self.buttons[game])),
+                DIAMOND_BUTTON_TYPE,
+            )
+        )
+        ys, xs = np.nonzero(self.diamonds[game])
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            game_objects.append(
+                GameObject(
+                    button_id + 1 + y * self.config.width + x,
+                    intern_position(x, y),
+                    DIAMOND_TYPE,
+                    Properties(points=int(self.diamonds[game, y, x])),
+                )
+            )
+        return Board(
+            id=game + 1,
+            width=self.config.width,
+            height=self.config.height,
+            features=self.features,
+            minimum_delay_between_moves=self.config.minimum_delay_between_moves,
+            game_objects=game_objects,
+        )
+
+    def board_bot(self, board: Board, bot: int) -> GameObject:
+        return board.get_object(self._bot_id(bot))
+
+
+def logic_policy(
+    logics: Sequence[Sequence[BaseLogic]],
+) -> Callable[[BatchEngine], np.ndarray]:
+    """
+    Drive a batch with BaseLogic instances through the Board bridge. Logic
+    keeps state between moves, so every bot of every game needs its own.
+    :param logics: logics[game][bot]
+    """
+
+    def policy(engine: BatchEngine) -> np.ndarray:
+        actions = np.zeros((engine.games, engine.bots, 2), dtype=np.int16)
+        for game in range(engine.games):
+            board = engine.board(game)
+            for bot in range(engine.bots):
+                actions[game, bot] = logics[game][bot].next_move(
+                    engine.board_bot(board, bot), board
+                )
+        return actions
+
+    return policy
@@ -0,0 +1,93 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game.models import (
+    BOT_TYPE,
+    DIAMOND_TYPE,
+    Board,
+    GameObject,
+    Position,
+)
+
+
+@dataclass
+class BoardDiff:
+    added: List[GameObject] = field(default_factory=list)
+    removed: List[GameObject] = field(default_factory=list)
+    # (object as it is now, position it had on the previous board)
+    moved: List[Tuple[GameObject, Position]] = field(default_factory=list)
+    # Objects that stayed in place but whose properties changed, e.g. a bot
+    # that picked up a diamond or delivered its inventory
+    changed: List[GameObject] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed)
+
+    def added_of_type(self, type_name: str) -> List[GameObject]:
+        return [o for o in self.added if o.type == type_name]
+
+    def removed_of_type(self, type_name: str) -> List[GameObject]:
+        return [o for o in self.removed if o.type == type_name]
+
+    @property
+    def diamonds_taken(self) -> List[GameObject]:
+        return self.removed_of_type(DIAMOND_TYPE)
+
+    @property
+    def diamonds_spawned(self) -> List[GameObject]:
+        return self.added_of_type(DIAMOND_TYPE)
+
+    @property
+    def bots_moved(self) -> List[Tuple[GameObject, Position]]:
+        return [(o, previous) for o, previous in self.moved if o.type == BOT_TYPE]
+
+
+BoardListener = Callable[[BoardDiff, Board], None]
+
+
+@dataclass
+class BoardState:
+    """
+    Keeps the latest board and the objects on it by id. Every new snapshot is
+    compared object by object with the previous one and the resulting diff is
+    handed to the subscribed listeners.
+    """
+
+    board: Optional[Board] = None
+    objects: Dict[int, GameObject] = field(default_factory=dict)
+    listeners: List[BoardListener] = field(default_factory=list)
+
+    def subscribe(self, listener: BoardListener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: BoardListener):
+        self.listeners.remove(listener)
+
+    def apply(self, board: Board) -> BoardDiff:
+        diff = BoardDiff()
+        previous_objects = self.objects
+        objects = {}
+        for game_object in board.game_objects or []:
+            objects[game_object.id] = game_object
+            previous = previous_objects.get(game_object.id)
+            if previous is None or previous.type != game_object.type:
+                if previous is not None:
+                    diff.removed.append(previous)
+                diff.added.append(game_object)
+            elif (
+                previous.position.x != game_object.position.x
+                or previous.position.y != game_object.position.y
+            ):
+                diff.moved.append((game_object, previous.position))
+            elif previous.properties != game_object.properties:
+                diff.changed.append(game_object)
+        for object_id, previous in previous_objects.items():
+            if object_id not in objects:
+                diff.removed.append(previous)
+
+        self.board = board
+        self.objects = objects
+        for listener in self.listeners:
+            listener(diff, board)
+        return diff
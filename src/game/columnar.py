@@ -0,0 +1,363 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from game.models import Board
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+INDEX_FILE = "index.bin"
+GAMES_FILE = "games.jsonl"
+DEFAULT_TELEPORTERS = 8
+# Stored for boards that do not give their move delay
+DEFAULT_MOVE_DELAY_MS = 100
+# Marks a bot, button or teleporter that is not on the board at that tick
+ABSENT = -1
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", np.int64),
+        ("ticks", np.int32),
+        ("bots", np.int16),
+        ("width", np.int16),
+        ("height", np.int16),
+        ("delay", np.int16),
+    ]
+)
+
+
+def _columns(meta: dict) -> Dict[str, tuple]:
+    """
+    :return: {name: (dtype, shape of one tick)} of every column in a corpus
+    """
+    bots, cells = meta["bots"], meta["width"] * meta["height"]
+    return {
+        "positions": (np.int16, (bots, 2)),
+        "bases": (np.int16, (bots, 2)),
+        "inventory": (np.int8, (bots,)),
+        "score": (np.int32, (bots,)),
+        "milliseconds_left": (np.int32, (bots,)),
+        "diamonds": (np.int8, (cells,)),
+        "buttons": (np.int16, (2,)),
+        "teleporters": (np.int16, (meta["teleporters"], 2)),
+    }
+
+
+###############################################################################
+#
+# Writing
+#
+###############################################################################
+class ColumnarWriter:
+    """
+    Appends games to a columnar corpus directory. Every column is a raw file
+    of fixed-width rows, one row per tick, so it can be appended to and
+    memory mapped as it is. The board size, number of bot slots and
+    teleporter slots are fixed when the corpus is created; smaller boards fit
+    in the top left corner of the diamond grid.
+
+    index.bin holds one fixed-width row per game with its first tick and
+    size, games.jsonl one line per game with its source and bot names.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        width: int = 15,
+        height: int = 15,
+        bots: int = 4,
+        teleporters: int = DEFAULT_TELEPORTERS,
+    ):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {
+                "version": FORMAT_VERSION,
+                "width": width,
+                "height": height,
+                "bots": bots,
+                "teleporters": teleporters,
+            }
+            with open(meta_path, "w") as f:
+                json.dump(self.meta, f)
+        self.columns = _columns(self.meta)
+        self._files = {
+            name: open(os.path.join(path, name + ".bin"), "ab") for name in self.columns
+        }
+        self._index = open(os.path.join(path, INDEX_FILE), "ab")
+        self._games = open(os.path.join(path, GAMES_FILE), "a")
+        self.ticks = os.path.getsize(os.path.join(path, "positions.bin")) // (
+            np.dtype(np.int16).itemsize * self.meta["bots"] * 2
+        )
+        self.games = os.path.getsize(os.path.join(path, INDEX_FILE)) // INDEX_DTYPE.itemsize
+
+    def _empty(self, *leading: int) -> Dict[str, np.ndarray]:
+        """
+        :return: columns of the given leading shape, e.g. (ticks,), with
+            nothing on the board
+        """
+        arrays = {
+            name: np.full(leading + shape, ABSENT, dtype=dtype)
+            for name, (dtype, shape) in self.columns.items()
+        }
+        for name in ("inventory", "score", "milliseconds_left", "diamonds"):
+            arrays[name][:] = 0
+        return arrays
+
+    def add_arrays(
+        self,
+        arrays: Dict[str, np.ndarray],
+        width: int,
+        height: int,
+        delay: int,
+        bot_names: List[str],
+        source: str = "",
+    ) -> int:
+        """
+        Append one game given as full columns of (ticks, ...) arrays
+        :return: id of the game in the corpus
+        """
+        ticks = len(arrays["positions"])
+        for name, file in self._files.items():
+            file.write(np.ascontiguousarray(arrays[name]).tobytes())
+        row = np.array(
+            [(self.ticks, ticks, len(bot_names), width, height, delay)], dtype=INDEX_DTYPE
+        )
+        self._index.write(row.tobytes())
+        self._games.write(
+            json.dumps({"game": self.games, "source": source, "bots": bot_names}) + "\n"
+        )
+        self.ticks += ticks
+        self.games += 1
+        return self.games - 1
+
+    def add_boards(self, boards: Iterable[Board], source: str = "") -> Optional[int]:
+        """
+        Append a game given as its board on every tick. Bots get a slot in
+        the order they first appear.
+        :return: id of the game in the corpus, None if there were no boards
+        """
+        boards = list(boards)
+        if not boards:
+            return None
+        first = boards[0]
+        if first.width > self.meta["width"] or first.height > self.meta["height"]:
+            raise ValueError(
+                "Board of {}x{} does not fit in a {}x{} corpus".format(
+                    first.width, first.height, self.meta["width"], self.meta["height"]
+                )
+            )
+        arrays = self._empty(len(boards))
+        grid_width = self.meta["width"]
+        slots: Dict[str, int] = {}
+        for tick, board in enumerate(boards):
+            for bot in board.bots:
+                name = bot.properties.name
+                if name not in slots:
+                    if len(slots) == self.meta["bots"]:
+                        raise ValueError(
+                            "More than {} bots in one game".format(self.meta["bots"])
+                        )
+                    slots[name] = len(slots)
+                slot = slots[name]
+                props = bot.properties
+                arrays["positions"][tick, slot] = (bot.position.x, bot.position.y)
+                arrays["bases"][tick, slot] = (props.base.x, props.base.y)
+                arrays["inventory"][tick, slot] = props.diamonds or 0
+                arrays["score"][tick, slot] = props.score or 0
+                arrays["milliseconds_left"][tick, slot] = props.milliseconds_left or 0
+            for diamond in board.diamonds:
+                arrays["diamonds"][tick, diamond.position.y * grid_width + diamond.position.x] = (
+                    diamond.properties.points or 1
+                )
+            if board.diamond_buttons:
+                button = board.diamond_buttons[0].position
+                arrays["buttons"][tick] = (button.x, button.y)
+            for index, teleporter in enumerate(board.teleporters[: self.meta["teleporters"]]):
+                arrays["teleporters"][tick, index] = (teleporter.position.x, teleporter.position.y)
+        return self.add_arrays(
+            arrays,
+            first.width,
+            first.height,
+            first.minimum_delay_between_moves or DEFAULT_MOVE_DELAY_MS,
+            list(slots),
+            source,
+        )
+
+    def add_batch(self, engine, policy: Callable, source: str = "batch") -> List[int]:
+        """
+        Play a game.batch_engine.BatchEngine to the end with the policy and
+        append every one of its games
+        :return: ids of the games in the corpus
+        """
+        config = engine.config
+        if config.width > self.meta["width"] or config.height > self.meta["height"]:
+            raise ValueError("Batch board does not fit in the corpus")
+        if engine.bots > self.meta["bots"]:
+            raise ValueError("More than {} bots in one game".format(self.meta["bots"]))
+        pairs = min(engine.teleporters.shape[1], self.meta["teleporters"])
+
+        games = engine.games
+        ticks = engine.ticks - engine.tick
+        stacked = self._empty(ticks, games)
+        grid = stacked["diamonds"].reshape(
+            ticks, games, self.meta["height"], self.meta["width"]
+        )
+        bots = engine.bots
+        for tick in range(ticks):
+            stacked["positions"][tick, :, :bots] = engine.positions
+            stacked["bases"][tick, :, :bots] = engine.bases
+            stacked["inventory"][tick, :, :bots] = engine.inventory
+            stacked["score"][tick, :, :bots] = engine.score
+            stacked["milliseconds_left"][tick, :, :bots] = engine.milliseconds_left
+            grid[tick, :, : config.height, : config.width] = engine.diamonds
+            stacked["buttons"][tick] = engine.buttons
+            stacked["teleporters"][tick, :, :pairs] = engine.teleporters[:, :pairs]
+            engine.step(policy(engine))
+
+        names = ["bot{}".format(bot) for bot in range(bots)]
+        return [
+            self.add_arrays(
+                {name: stacked[name][:, game] for name in self.columns},
+                config.width,
+                config.height,
+                config.minimum_delay_between_moves or DEFAULT_MOVE_DELAY_MS,
+                names,
+                source,
+            )
+            for game in range(games)
+        ]
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._index.close()
+        self._games.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+###############################################################################
+#
+# Reading
+#
+###############################################################################
+@dataclass
+class GameView:
+    """
+    One game of a corpus. Every column is a slice of the memory mapped file,
+    so nothing is read from disk until it is used.
+    """
+
+    game: int
+    source: str
+    bot_names: List[str]
+    width: int
+    height: int
+    delay: int
+    positions: np.ndarray
+    bases: np.ndarray
+    inventory: np.ndarray
+    score: np.ndarray
+    milliseconds_left: np.ndarray
+    diamonds: np.ndarray
+    buttons: np.ndarray
+    teleporters: np.ndarray
+
+    @property
+    def ticks(self) -> int:
+        return len(self.positions)
+
+    def slot(self, bot) -> int:
+        """
+        :param bot: bot name or slot number
+        """
+        return self.bot_names.index(bot) if isinstance(bot, str) else bot
+
+    def bot(self, bot) -> Dict[str, np.ndarray]:
+        """
+        :return: the per-bot columns of one bot, by name or slot
+        """
+        slot = self.slot(bot)
+        return {
+            "positions": self.positions[:, slot],
+            "bases": self.bases[:, slot],
+            "inventory": self.inventory[:, slot],
+            "score": self.score[:, slot],
+            "milliseconds_left": self.milliseconds_left[:, slot],
+        }
+
+
+class ColumnarReader:
+    """
+    Opens a corpus written by ColumnarWriter with every column memory mapped.
+    Slicing by game, tick or bot only touches the pages it needs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.columns = _columns(self.meta)
+        self.index = self._map(INDEX_FILE, INDEX_DTYPE, ())
+        with open(os.path.join(path, GAMES_FILE)) as f:
+            self.game_info = [json.loads(line) for line in f][: len(self.index)]
+        self.arrays = {
+            name: self._map(name + ".bin", dtype, shape)
+            for name, (dtype, shape) in self.columns.items()
+        }
+
+    def _map(self, file_name: str, dtype, shape: tuple) -> np.ndarray:
+        path = os.path.join(self.path, file_name)
+        row_size = np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+        rows = os.path.getsize(path) // row_size
+        if rows == 0:
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(rows,) + shape)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def game(self, game: int, ticks: slice = slice(None)) -> GameView:
+        """
+        :param ticks: slice of the game's ticks to view
+        """
+        row = self.index[game]
+        start, stop, step = ticks.indices(int(row["ticks"]))
+        rows = slice(int(row["offset"]) + start, int(row["offset"]) + stop, step)
+        columns = {name: array[rows] for name, array in self.arrays.items()}
+        columns["diamonds"] = columns["diamonds"].reshape(
+            -1, self.meta["height"], self.meta["width"]
+        )[:, : row["height"], : row["width"]]
+        info = self.game_info[game]
+        return GameView(
+            game=game,
+            source=info["source"],
+            bot_names=info["bots"],
+            width=int(row["width"]),
+            height=int(row["height"]),
+            delay=int(row["delay"]),
+            **columns,
+        )
+
+    def games(self) -> Iterable[GameView]:
+        for game in range(len(self)):
+            yield self.game(game)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        :return: a whole column over every tick of every game, e.g. to scan a
+            corpus without going game by game
+        """
+        return self.arrays[name]
@@ -0,0 +1,17 @@
+from game.logic.garox import Garox, GaroxPredict
+from game.logic.rollout import RolloutLogic
+from game.logic.tour import TourPlanner
+from game.logic.unused.D import Dlogic
+
+CONTROLLERS = {
+    "Garox": Garox,
+    "GaroxPredict": GaroxPredict,
+    "D": Dlogic,
+    "Tour": TourPlanner,
+    "Rollout": RolloutLogic,
+}
+
+# Controllers that spend every move slot searching. The offline tools only
+# run them when asked to by name.
+SLOW_CONTROLLERS = ("Rollout",)
+DEFAULT_CONTROLLERS = [name for name in CONTROLLERS if name not in SLOW_CONTROLLERS]
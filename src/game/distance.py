@@ -0,0 +1,211 @@
+from functools import cached_property, lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from game.distance_cache import TABLE_DTYPE, disk_cache, layout_key
+from game.models import PackedPosition, Position, intern_position
+
+# Tables kept alive at once. A table is only rebuilt when the board size or
+# the teleporters move, so a few layouts are enough.
+MAX_CACHED_TABLES = 4
+# Boards with more cells route with per-link arithmetic instead of a table.
+# The table grows with cells squared: 20x20 builds in about 5 ms, 50x50 in
+# about 175 ms and 175 MB, far over a move slot.
+MAX_TABLE_CELLS = 20 * 20
+
+
+class Link(NamedTuple):
+    """
+    A one-way teleporter hop: stepping onto entry lands on exit, which costs
+    one move more than the walk to entry. A route starting on one of the
+    blocked cells may not use the link.
+    """
+
+    entry: PackedPosition
+    exit: PackedPosition
+    blocked: Tuple[PackedPosition, ...] = ()
+
+
+class DistanceTable:
+    """
+    Move counts between every pair of cells of a board, walking in Manhattan
+    steps or taking at most one teleporter link. For every pair it also keeps
+    the link the route takes, which makes the next waypoint a lookup.
+
+    Links are tried in order and replace the walk, or an earlier link, only
+    when strictly shorter, like the loops in the logic controllers.
+
+    Boards over MAX_TABLE_CELLS cells have no table: every route compares
+    the walk with the links, which costs a few operations per link instead
+    of building cells squared entries on the first lookup.
+    """
+
+    def __init__(self, width: int, height: int, links: Tuple[Link, ...] = ()):
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.links = tuple(links)
+        self.tabulated = self.cells <= MAX_TABLE_CELLS
+
+    @cached_property
+    def _tables(self) -> Tuple[np.ndarray, np.ndarray]:
+        cache = disk_cache()
+        key = layout_key(self.width, self.height, self.links) if cache else None
+        table = cache.load(key, self.cells) if cache else None
+        if table is None:
+            table = np.empty((2, self.cells * self.cells), dtype=TABLE_DTYPE)
+            table[0], table[1] = self._build()
+            if cache:
+                cache.store(key, table)
+        return table[0], table[1]
+
+    def _build(self) -> Tuple[np.ndarray, np.ndarray]:
+        cells = np.arange(self.cells)
+        xs, ys = cells % self.width, cells // self.width
+        distances = (
+            np.abs(xs[:, None] - xs[None, :]) + np.abs(ys[:, None] - ys[None, :])
+        ).astype(np.int16)
+        walk = distances.copy()
+        via = np.full(distances.shape, -1, dtype=np.int8)
+        for index, link in enumerate(self.links):
+            hop = walk[:, self.cell(link.entry)][:, None] + 1 + walk[self.cell(link.exit)][None, :]
+            shorter = hop < distances
+            for position in link.blocked:
+                shorter[self.cell(position)] = False
+            np.copyto(distances, hop, where=shorter, casting="unsafe")
+            via[shorter] = index
+        return distances.ravel(), via.ravel()
+
+    @property
+    def distances(self) -> np.ndarray:
+        """
+        Flat (cells * cells,) int16, indexed by start cell * cells + end cell.
+        Built on first use, or read from the disk cache when one is set up
+        through game.distance_cache.CACHE_DIR_ENV. Only use it when
+        tabulated, the lookups route without it on larger boards.
+        """
+        return self._tables[0]
+
+    @property
+    def via(self) -> np.ndarray:
+        """
+        Flat (cells * cells,) int16 index of the link taken, -1 when walking
+        """
+        return self._tables[1]
+
+    def cell(self, position: Position) -> int:
+        return position.y * self.width + position.x
+
+    def _route_links(self, start: Position, end: Position) -> Tuple[int, Optional[Link]]:
+        best = abs(start.x - end.x) + abs(start.y - end.y)
+        best_link = None
+        for link in self.links:
+            if any(start.x == p.x and start.y == p.y for p in link.blocked):
+                continue
+            hop = (
+                abs(start.x - link.entry.x) + abs(start.y - link.entry.y) + 1
+                + abs(link.exit.x - end.x) + abs(link.exit.y - end.y)
+            )
+            if hop < best:
+                best, best_link = hop, link
+        return best, best_link
+
+    def distance(self, start: Position, end: Position) -> int:
+        if not self.links:
+            return abs(start.x - end.x) + abs(start.y - end.y)
+        if not self.tabulated:
+            return self._route_links(start, end)[0]
+        return self.distances.item(
+            (start.y * self.width + start.x) * self.cells + end.y * self.width + end.x
+        )
+
+    def route(self, start: Position, end: Position) -> Tuple[int, Optional[Link]]:
+        """
+        :return: the distance and the link taken, None when walking
+        """
+        # Without links every route is a walk, and the arithmetic is cheaper
+        # than a read from a table of cells squared entries
+        if not self.links:
+            return abs(start.x - end.x) + abs(start.y - end.y), None
+        if not self.tabulated:
+            return self._route_links(start, end)
+        index = (start.y * self.width + start.x) * self.cells + end.y * self.width + end.x
+        via = self.via.item(index)
+        return self.distances.item(index), (self.links[via] if via >= 0 else None)
+
+    @cached_property
+    def _link_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: (links, 2) entries and exits, (blocked, 2) blocked cells and
+            (blocked,) the index of the link each one blocks
+        """
+        entries = np.array([(link.entry.x, link.entry.y) for link in self.links], dtype=np.int32)
+        exits = np.array([(link.exit.x, link.exit.y) for link in self.links], dtype=np.int32)
+        blocked = [(index, p.x, p.y) for index, link in enumerate(self.links) for p in link.blocked]
+        blocked = np.array(blocked, dtype=np.int32).reshape(-1, 3)
+        return entries, exits, blocked[:, 1:], blocked[:, 0]
+
+    def _between_links(self, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        between without a table: the walk against every link at once. The
+        first of the shortest links stands in for trying them in order.
+        """
+        entries, exits, blocked, blocked_link = self._link_arrays
+        sx, sy = starts[:, 0, None].astype(np.int32), starts[:, 1, None].astype(np.int32)
+        ex, ey = ends[None, :, 0].astype(np.int32), ends[None, :, 1].astype(np.int32)
+        distances = np.abs(sx - ex) + np.abs(sy - ey)
+        to_entry = np.abs(sx - entries[:, 0]) + np.abs(sy - entries[:, 1]) + 1
+        start, block = ((sx == blocked[:, 0]) & (sy == blocked[:, 1])).nonzero()
+        to_entry[start, blocked_link[block]] = np.iinfo(np.int32).max // 2
+        from_exit = np.abs(exits[:, 0, None] - ex) + np.abs(exits[:, 1, None] - ey)
+        hops = to_entry[:, :, None] + from_exit[None, :, :]
+        best = hops.argmin(axis=1)
+        hop = np.take_along_axis(hops, best[:, None, :], axis=1)[:, 0, :]
+        shorter = hop < distances
+        return np.where(shorter, hop, distances), np.where(shorter, best, -1).astype(np.int8)
+
+    def between(self, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Routes between many cells at once
+        :param starts: (n, 2) x, y
+        :param ends: (m, 2) x, y
+        :return: (n, m) distances and (n, m) indices of the links taken, -1
+            when walking
+        """
+        if not self.links:
+            distances = np.abs(starts[:, None, 0] - ends[None, :, 0]) + np.abs(
+                starts[:, None, 1] - ends[None, :, 1]
+            )
+            return distances, np.full(distances.shape, -1, dtype=np.int8)
+        if not self.tabulated:
+            return self._between_links(starts, ends)
+        starts, ends = starts.astype(np.intp), ends.astype(np.intp)
+        index = (starts[:, 1] * self.width + starts[:, 0])[:, None] * self.cells + (
+            ends[:, 1] * self.width + ends[:, 0]
+        )[None, :]
+        return self.distances[index], self.via[index]
+
+    def waypoint(self, start: Position, end: Position) -> Position:
+        """
+        :return: where to head for first, the end or the entry of a link
+        """
+        _, link = self.route(start, end)
+        return link.entry if link else end
+
+
+@lru_cache(maxsize=MAX_CACHED_TABLES)
+def distance_table(width: int, height: int, links: Tuple[Link, ...] = ()) -> DistanceTable:
+    """
+    The table of a board layout, built on first use. Call it every tick with
+    the current links: the same layout returns the same table.
+    """
+    return DistanceTable(width, height, links)
+
+
+def link(entry: Position, exit: Position, blocked=()) -> Link:
+    return Link(
+        intern_position(entry.x, entry.y),
+        intern_position(exit.x, exit.y),
+        tuple(intern_position(p.x, p.y) for p in blocked),
+    )
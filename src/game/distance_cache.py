@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from game.log import get_logger
+
+FORMAT_VERSION = 2
+# Set to a directory to share distance tables between processes and runs
+CACHE_DIR_ENV = "DIAMONDS_DISTANCE_CACHE"
+CACHE_MAX_MB_ENV = "DIAMONDS_DISTANCE_CACHE_MB"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+SUFFIX = ".npy"
+# Tables are (2, cells * cells): the distances, then the index of the link
+# taken. Each row is contiguous, so lookups can read into preallocated arrays.
+TABLE_DTYPE = np.dtype(np.int16)
+
+logger = get_logger("distance_cache")
+
+
+def layout_key(width: int, height: int, links) -> str:
+    """
+    :param links: game.distance.Link tuples; their order, direction and
+        blocked cells are part of the key, as they change the table
+    :return: hex digest naming the table of the layout
+    """
+    layout = [
+        FORMAT_VERSION,
+        width,
+        height,
+        [
+            [[link.entry.x, link.entry.y], [link.exit.x, link.exit.y], [[p.x, p.y] for p in link.blocked]]
+            for link in links
+        ],
+    ]
+    return hashlib.sha256(json.dumps(layout).encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    Content addressed directory of distance tables, one .npy file per layout.
+    Files are written to a temporary name and renamed, so processes sharing
+    the directory never see a partial table, and are opened memory mapped
+    read-only, so they share the pages too.
+
+    Every hit touches the file; when the directory grows past max_bytes the
+    least recently used tables are removed. A table larger than max_bytes on
+    its own is not stored.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + SUFFIX)
+
+    def load(self, key: str, cells: int) -> Optional[np.ndarray]:
+        """
+        :return: the (2, cells * cells) table, None when missing or unreadable
+        """
+        path = self._file(key)
+        try:
+            table = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if table.dtype != TABLE_DTYPE or table.shape != (2, cells * cells):
+            logger.warning("Ignoring distance table %s of the wrong shape", path)
+            return None
+        return table
+
+    def store(self, key: str, table: np.ndarray):
+        if table.nbytes > self.max_bytes:
+            logger.debug("Not caching a %s byte distance table, over the cache size", table.nbytes)
+            return
+        try:
+            fd, temporary = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, table)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, self._file(key))
+        except OSError as e:
+            logger.warning("Unable to cache distance table: %s", e)
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used tables until the cache fits. Other
+        processes may remove files meanwhile, those are skipped.
+        """
+        entries = []
+        try:
+            with os.scandir(self.path) as scan:
+                for entry in scan:
+                    if not entry.name.endswith(SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            logger.warning("Unable to evict distance tables: %s", e)
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+_cache: Optional[DiskCache] = None
+
+
+def disk_cache() -> Optional[DiskCache]:
+    """
+    :return: the cache configured through the environment, None when disabled
+    """
+    global _cache
+    path = os.environ.get(CACHE_DIR_ENV)
+    if not path:
+        return None
+    if _cache is None or _cache.path != path:
+        max_mb = os.environ.get(CACHE_MAX_MB_ENV)
+        _cache = DiskCache(path, int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES)
+    return _cache
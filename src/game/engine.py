@@ -0,0 +1,469 @@
+import random
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import (
+    BASE_TYPE,
+    BOT_TYPE,
+    DIAMOND_BUTTON_TYPE,
+    DIAMOND_TYPE,
+    TELEPORTER_TYPE,
+    Board,
+    Config,
+    Feature,
+    GameObject,
+    PackedPosition,
+    Properties,
+    intern_position,
+)
+
+BLUE_DIAMOND_POINTS = 1
+RED_DIAMOND_POINTS = 2
+
+
+class InvalidMoveError(Exception):
+    pass
+
+
+@dataclass
+class EngineConfig:
+    width: int = 15
+    height: int = 15
+    seconds: int = 60
+    minimum_delay_between_moves: int = 100
+    inventory_size: int = 5
+    can_tackle: bool = True
+    generation_ratio: float = 0.1
+    min_ratio_for_generation: float = 0.01
+    red_ratio: float = 0.2
+    teleporter_pairs: int = 1
+    # Teleporters move to new cells this often, 0 keeps them in place
+    teleport_relocation_seconds: int = 0
+    board_id: int = 1
+
+
+def board_features(config: EngineConfig) -> List[Feature]:
+    """
+    :return: the feature list a server running with this config reports
+    """
+    return [
+        Feature("DiamondButtonProvider"),
+        Feature(
+            "DiamondProvider",
+            Config(
+                generation_ratio=config.generation_ratio,
+                min_ratio_for_generation=config.min_ratio_for_generation,
+                red_ratio=config.red_ratio,
+            ),
+        ),
+        Feature("TeleportProvider", Config(pairs=config.teleporter_pairs)),
+        Feature(
+            "BotProvider",
+            Config(inventory_size=config.inventory_size, can_tackle=config.can_tackle),
+        ),
+        Feature("GameTimeProvider", Config(seconds=config.seconds)),
+    ]
+
+
+@dataclass
+class BotSession:
+    name: str
+    bot: GameObject
+    base: GameObject
+    ends_at: int
+    last_move_at: Optional[int] = None
+
+
+class Engine:
+    """
+    Headless Diamonds game on the Board/GameObject models. Time is a virtual
+    clock in milliseconds that only moves when told to, so a full game runs
+    as fast as the logic can decide. All randomness comes from one seeded
+    generator, so a seed reproduces a game exactly.
+
+    Rules: diamonds (red ones worth 2) are generated up to generation_ratio
+    of the cells whenever fewer than min_ratio_for_generation remain; the
+    diamond button regenerates every diamond and moves; stepping on a
+    teleporter moves the bot to its pair; diamonds are picked up while they
+    fit in the inventory and scored on the bot's own base; moving onto
+    another bot tackles it, sending it home and taking its diamonds; every
+    bot leaves the board when its game time is over.
+    """
+
+    def __init__(
+        self,
+        config: Optional[EngineConfig] = None,
+        seed: Optional[int] = None,
+        populate: bool = True,
+    ):
+        """
+        :param populate: place the teleporters, the diamond button and the
+            first diamonds, False starts from an empty board
+        """
+        self.config = config or EngineConfig()
+        self.rng = random.Random(seed)
+        self.clock = 0
+        self.objects: Dict[int, GameObject] = {}
+        self.occupied: Dict[PackedPosition, List[GameObject]] = {}
+        self.sessions: Dict[str, BotSession] = {}
+        self.finished_sessions: Dict[str, BotSession] = {}
+        self.next_id = 1
+        self.teleporters_moved_at = 0
+        self.features = board_features(self.config)
+        if not populate:
+            return
+
+        for _ in range(self.config.teleporter_pairs):
+            self._add_teleporter_pair()
+        self._add(DIAMOND_BUTTON_TYPE, self._free_cell())
+        self._generate_diamonds()
+
+    @classmethod
+    def from_board(cls, board: Board, seed: Optional[int] = None) -> "Engine":
+        """
+        Continue a game from a board snapshot, e.g. one received from a
+        server, to simulate what may happen next. The rules come from the
+        board's features, every bot keeps the time it has left, and objects
+        keep their ids. Moves made before the snapshot are not known, so
+        every bot may move at once.
+        """
+        config = EngineConfig(
+            width=board.width,
+            height=board.height,
+            minimum_delay_between_moves=board.minimum_delay_between_moves,
+            board_id=board.id,
+            teleporter_pairs=0,
+        )
+        for feature in board.features or []:
+            feature_config = feature.config
+            if feature_config is None:
+                continue
+            for name in (
+                "seconds",
+                "inventory_size",
+                "can_tackle",
+                "generation_ratio",
+                "min_ratio_for_generation",
+                "red_ratio",
+            ):
+                value = getattr(feature_config, name)
+                if value is not None:
+                    setattr(config, name, value)
+            if feature_config.pairs is not None:
+                config.teleporter_pairs = feature_config.pairs
+        engine = cls(config, seed, populate=False)
+        engine.features = board.features
+
+        bases = {}
+        bots = []
+        for game_object in board.game_objects or []:
+            copy = GameObject(
+                game_object.id,
+                intern_position(game_object.position.x, game_object.position.y),
+                game_object.type,
+                replace(game_object.properties) if game_object.properties is not None else None,
+            )
+            engine.objects[copy.id] = copy
+            engine.occupied.setdefault(copy.position, []).append(copy)
+            if copy.type == BASE_TYPE:
+                bases[copy.position] = copy
+            elif copy.type == BOT_TYPE:
+                bots.append(copy)
+        engine.next_id = max(engine.objects, default=0) + 1
+
+        for bot in bots:
+            props = bot.properties
+            props.base = intern_position(props.base.x, props.base.y)
+            base = bases.get(props.base)
+            if base is None:
+                base = engine._add(BASE_TYPE, props.base, Properties(name=props.name))
+            milliseconds_left = props.milliseconds_left
+            if milliseconds_left is None:
+                milliseconds_left = config.seconds * 1000
+            engine.sessions[props.name] = BotSession(props.name, bot, base, milliseconds_left)
+        return engine
+
+    ###########################################################################
+    #
+    # Board bookkeeping
+    #
+    ###########################################################################
+    def _add(
+        self,
+        type_name: str,
+        position: PackedPosition,
+        properties: Optional[Properties] = None,
+    ) -> GameObject:
+        game_object = GameObject(self.next_id, position, type_name, properties)
+        self.next_id += 1
+        self.objects[game_object.id] = game_object
+        self.occupied.setdefault(position, []).append(game_object)
+        return game_object
+
+    def _remove(self, game_object: GameObject):
+        del self.objects[game_object.id]
+        self.occupied[game_object.position].remove(game_object)
+
+    def _place(self, game_object: GameObject, position: PackedPosition):
+        self.occupied[game_object.position].remove(game_object)
+        game_object.position = position
+        self.occupied.setdefault(position, []).append(game_object)
+
+    def _at(self, position: PackedPosition, type_name: str) -> Optional[GameObject]:
+        for game_object in self.occupied.get(position, ()):
+            if game_object.type == type_name:
+                return game_object
+        return None
+
+    def _free_cell(self) -> PackedPosition:
+        cells = self.config.width * self.config.height
+        if sum(1 for objects in self.occupied.values() if objects) >= cells:
+            raise ValueError("The board is full")
+        while True:
+            position = intern_position(
+                self.rng.randrange(self.config.width),
+                self.rng.randrange(self.config.height),
+            )
+            if not self.occupied.get(position):
+                return position
+
+    def _of_type(self, type_name: str) -> List[GameObject]:
+        return [o for o in self.objects.values() if o.type == type_name]
+
+    def _add_teleporter_pair(self):
+        first = self._add(TELEPORTER_TYPE, self._free_cell(), Properties())
+        second = self._add(TELEPORTER_TYPE, self._free_cell(), Properties())
+        # The server sends pair ids as strings
+        first.properties.pair_id = str(second.id)
+        second.properties.pair_id = str(first.id)
+
+    def _generate_diamonds(self):
+        cells = self.config.width * self.config.height
+        target = int(cells * self.config.generation_ratio)
+        count = len(self._of_type(DIAMOND_TYPE))
+        while count < target:
+            points = (
+                RED_DIAMOND_POINTS
+                if self.rng.random() < self.config.red_ratio
+                else BLUE_DIAMOND_POINTS
+            )
+            self._add(DIAMOND_TYPE, self._free_cell(), Properties(points=points))
+            count += 1
+
+    def _maybe_generate_diamonds(self):
+        cells = self.config.width * self.config.height
+        if len(self._of_type(DIAMOND_TYPE)) < cells * self.config.min_ratio_for_generation:
+            self._generate_diamonds()
+
+    def _press_button(self, button: GameObject):
+        for diamond in self._of_type(DIAMOND_TYPE):
+            self._remove(diamond)
+        self._place(button, self._free_cell())
+        self._generate_diamonds()
+
+    def _relocate_teleporters(self):
+        for teleporter in self._of_type(TELEPORTER_TYPE):
+            self._place(teleporter, self._free_cell())
+
+    ###########################################################################
+    #
+    # Bots
+    #
+    ###########################################################################
+    def add_bot(self, name: str) -> GameObject:
+        """
+        Put a bot on its own base. Its game time starts at the current clock.
+        """
+        if name in self.sessions:
+            raise ValueError("Bot {} is already on the board".format(name))
+        position = self._free_cell()
+        base = self._add(BASE_TYPE, position, Properties(name=name))
+        bot = self._add(
+            BOT_TYPE,
+            position,
+            Properties(
+                diamonds=0,
+                score=0,
+                name=name,
+                inventory_size=self.config.inventory_size,
+                can_tackle=self.config.can_tackle,
+                milliseconds_left=self.config.seconds * 1000,
+                time_joined=str(self.clock),
+                base=position,
+            ),
+        )
+        self.sessions[name] = BotSession(
+            name, bot, base, self.clock + self.config.seconds * 1000
+        )
+        return bot
+
+    def _end_session(self, session: BotSession):
+        self._remove(session.bot)
+        self._remove(session.base)
+        del self.sessions[session.name]
+        self.finished_sessions[session.name] = session
+
+    def _tackle(self, attacker: GameObject, target: GameObject):
+        session = self.sessions[target.properties.name]
+        room = attacker.properties.inventory_size - attacker.properties.diamonds
+        attacker.properties.diamonds += min(room, target.properties.diamonds)
+        target.properties.diamonds = 0
+        self._place(target, session.base.position)
+
+    def _enter(self, bot: GameObject, position: PackedPosition):
+        teleporter = self._at(position, TELEPORTER_TYPE)
+        if teleporter is not None:
+            pair = self.objects.get(int(teleporter.properties.pair_id))
+            if pair is not None:
+                position = pair.position
+        self._place(bot, position)
+
+        props = bot.properties
+        diamond = self._at(position, DIAMOND_TYPE)
+        if diamond is not None and props.diamonds + diamond.properties.points <= props.inventory_size:
+            props.diamonds += diamond.properties.points
+            self._remove(diamond)
+            self._maybe_generate_diamonds()
+
+        button = self._at(position, DIAMOND_BUTTON_TYPE)
+        if button is not None:
+            self._press_button(button)
+
+        if position == props.base:
+            props.score += props.diamonds
+            props.diamonds = 0
+
+    def move(self, name: str, delta_x: int, delta_y: int):
+        """
+        Move a bot one cell at the current clock
+        :raises InvalidMoveError: when the server would reject the move
+        """
+        session = self.sessions.get(name)
+        if session is None:
+            raise InvalidMoveError("Bot {} is not on the board".format(name))
+        if (
+            session.last_move_at is not None
+            and self.clock - session.last_move_at
+            < self.config.minimum_delay_between_moves
+        ):
+            raise InvalidMoveError("Move too fast")
+        if abs(delta_x) + abs(delta_y) != 1:
+            raise InvalidMoveError("Moves are one step north, south, east or west")
+        bot = session.bot
+        x, y = bot.position.x + delta_x, bot.position.y + delta_y
+        if not (0 <= x < self.config.width and 0 <= y < self.config.height):
+            raise InvalidMoveError("Out of bounds")
+
+        position = intern_position(x, y)
+        other = self._at(position, BOT_TYPE)
+        if other is not None:
+            if not self.config.can_tackle:
+                raise InvalidMoveError("Cell is occupied")
+            self._tackle(bot, other)
+
+        session.last_move_at = self.clock
+        self._enter(bot, position)
+
+    ###########################################################################
+    #
+    # Clock and snapshots
+    #
+    ###########################################################################
+    def advance(self, milliseconds: int):
+        self.advance_to(self.clock + milliseconds)
+
+    def advance_to(self, clock: int):
+        self.clock = max(self.clock, clock)
+        for session in list(self.sessions.values()):
+            remaining = session.ends_at - self.clock
+            if remaining <= 0:
+                self._end_session(session)
+            else:
+                session.bot.properties.milliseconds_left = remaining
+        relocation = self.config.teleport_relocation_seconds * 1000
+        if relocation and self.clock - self.teleporters_moved_at >= relocation:
+            self.teleporters_moved_at = self.clock
+            self._relocate_teleporters()
+
+    @property
+    def finished(self) -> bool:
+        return not self.sessions
+
+    def board(self) -> Board:
+        """
+        Snapshot of the current state. Positions are immutable and shared,
+        properties are copied, so logic may keep references between ticks.
+        """
+        return Board(
+            id=self.config.board_id,
+            width=self.config.width,
+            height=self.config.height,
+            features=self.features,
+            minimum_delay_between_moves=self.config.minimum_delay_between_moves,
+            game_objects=[
+                GameObject(
+                    o.id,
+                    o.position,
+                    o.type,
+                    replace(o.properties) if o.properties is not None else None,
+                )
+                for o in self.objects.values()
+            ],
+        )
+
+    def scores(self) -> Dict[str, int]:
+        sessions = {**self.finished_sessions, **self.sessions}
+        return {name: s.bot.properties.score for name, s in sessions.items()}
+
+    ###########################################################################
+    #
+    # Running logic
+    #
+    ###########################################################################
+    def step(self, logics: Dict[str, BaseLogic]) -> Board:
+        """
+        Play one tick: every bot decides on the same snapshot, the moves are
+        applied in a random order and the clock advances by the move delay.
+        Invalid moves are dropped like the server would.
+        """
+        board = self.board()
+        decisions: List[Tuple[str, int, int]] = []
+        for name, logic in logics.items():
+            session = self.sessions.get(name)
+            if session is None:
+                continue
+            board_bot = next(
+                (o for o in board.bots if o.id == session.bot.id), None
+            )
+            delta_x, delta_y = logic.next_move(board_bot, board)
+            decisions.append((name, delta_x, delta_y))
+
+        self.rng.shuffle(decisions)
+        for name, delta_x, delta_y in decisions:
+            if name not in self.sessions:
+                continue
+            try:
+                self.move(name, delta_x, delta_y)
+            except InvalidMoveError:
+                pass
+        self.advance(self.config.minimum_delay_between_moves)
+        return board
+
+    def run(self, logics: Dict[str, BaseLogic], max_ticks: Optional[int] = None) -> Dict[str, int]:
+        """
+        Add a bot for every logic that is not on the board yet and play until
+        every game time is over. The logics draw from the global random
+        module, so it is seeded from the engine as well; logic that already
+        draws from it when built should be built after seeding it too.
+        :return: final score per bot name
+        """
+        random.seed(self.rng.getrandbits(64))
+        for name in logics:
+            if name not in self.sessions and name not in self.finished_sessions:
+                self.add_bot(name)
+        ticks = 0
+        while not self.finished and (max_ticks is None or ticks < max_ticks):
+            self.step(logics)
+            ticks += 1
+        return self.scores()
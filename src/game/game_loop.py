@@ -0,0 +1,166 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from game.async_handlers import AsyncBoardHandler, AsyncBotHandler
+from game.board_state import BoardState
+from game.log import get_logger
+from game.logic.base import BaseLogic
+from game.models import Board, Bot
+from game.scheduler import MoveScheduler
+
+logger = get_logger("game_loop")
+
+
+@dataclass
+class BotStats:
+    name: str
+    ticks: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+    scheduler: Optional[MoveScheduler] = None
+
+    def record_move(self, latency: float):
+        self.ticks += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def tick_rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.ticks / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.ticks if self.ticks else 0.0
+
+
+async def setup_bot(
+    bot_handler: AsyncBotHandler,
+    token: Optional[str],
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    password: Optional[str] = None,
+    team: Optional[str] = None,
+) -> Optional[Bot]:
+    """
+    Recover or register a bot when no token is given, then fetch its info
+    :return: Bot, or None when the bot could not be set up
+    """
+    if not token:
+        token = await bot_handler.recover(email, password)
+        if not token:
+            registered = await bot_handler.register(name, email, password, team)
+            if not registered:
+                logger.error("Unable to register bot")
+                return None
+            logger.info("Bot registered. Token: %s", registered.id)
+            token = registered.id
+
+    bot = await bot_handler.get_my_info(token)
+    if not bot or not bot.name:
+        logger.error("Bot does not exist")
+        return None
+    logger.info("Welcome back, %s", bot.name)
+    return bot
+
+
+async def join_board(
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    bot: Bot,
+    board_id: Optional[int],
+) -> Optional[int]:
+    """
+    Join the given board, or the first joinable board when no id is given
+    :return: id of the joined board, or None
+    """
+    if board_id:
+        if await bot_handler.join(bot.id, board_id):
+            return board_id
+    else:
+        for board in await board_handler.list_boards() or []:
+            if await bot_handler.join(bot.id, board.id):
+                return board.id
+
+    logger.error("Unable to find any boards to join")
+    return None
+
+
+async def play(
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    bot: Bot,
+    board_id: int,
+    logic: BaseLogic,
+    time_factor: float = 1,
+    stats: Optional[BotStats] = None,
+):
+    """
+    Async equivalent of the game play loop in main.py. Every await hands the
+    event loop to other bots, so a move in flight never blocks them. Moves
+    are decided on a thread of the bot's own, so logic spending its whole
+    move slot thinking does not hold up the other bots either.
+    """
+    board: Optional[Board] = await board_handler.get_board(board_id)
+    if not board:
+        return
+    loop = asyncio.get_running_loop()
+    decider = ThreadPoolExecutor(max_workers=1, thread_name_prefix="logic-{}".format(bot.name))
+    board_state = BoardState()
+    board_state.subscribe(logic.on_board_diff)
+    board_state.apply(board)
+    scheduler = MoveScheduler.from_delay_ms(
+        board.minimum_delay_between_moves, time_factor
+    )
+    if stats is not None:
+        stats.scheduler = scheduler
+
+    while board:
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
+
+        # Calculate next move
+        delta_x, delta_y = await loop.run_in_executor(decider, logic.next_move, board_bot, board)
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            logger.warning(
+                "Invalid move will be ignored. Your move: (%s, %s). Your position: (%s, %s)",
+                delta_x,
+                delta_y,
+                board_bot.position.x,
+                board_bot.position.y,
+            )
+            scheduler.skip()
+            await scheduler.wait()
+            continue
+
+        # Don't spam the board more than it allows!
+        await scheduler.wait()
+
+        try:
+            # Try to perform move
+            sent_at = time.monotonic()
+            board = await bot_handler.move(bot.id, board_id, delta_x, delta_y)
+        except Exception:
+            break
+        scheduler.move_sent(sent_at)
+        round_trip = time.monotonic() - sent_at
+        logic.on_round_trip(round_trip)
+        if stats is not None:
+            stats.record_move(round_trip)
+
+        if not board:
+            # Read new board state
+            board = await board_handler.get_board(board_id)
+        if board:
+            board_state.apply(board)
+            scheduler.set_delay_ms(board.minimum_delay_between_moves)
+
+    decider.shutdown(wait=False)
+    logger.info("Game over! %s", bot.name)
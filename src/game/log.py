@@ -0,0 +1,115 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+from colorama import Fore, Style
+
+ROOT_LOGGER = "diamonds"
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+# and ends up as a field of the JSON line.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_LEVEL_PREFIXES = {
+    logging.DEBUG: Style.DIM,
+    logging.WARNING: Fore.YELLOW + Style.BRIGHT + "Warn: " + Style.RESET_ALL,
+    logging.ERROR: Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL,
+    logging.CRITICAL: Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL,
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger("{}.{}".format(ROOT_LOGGER, name))
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock handler formats the message before queueing it. Keeping the
+    # record as is moves all string building to the listener thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        prefix = _LEVEL_PREFIXES.get(record.levelno, "")
+        if record.levelno == logging.DEBUG:
+            return prefix + message + Style.RESET_ALL
+        return prefix + message
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(
+    level: str = "INFO", json_path: Optional[str] = None, json_level: str = "DEBUG"
+):
+    """
+    Route every diamonds logger through a queue drained by a background thread
+    :param level: console level, or OFF to silence the console
+    :param json_path: optional file that receives one JSON object per record
+    :param json_level: level of the JSON-lines sink
+    """
+    global _listener
+    stop_logging()
+
+    handlers = []
+    if level.upper() != "OFF":
+        console = logging.StreamHandler(sys.stdout)
+        console.setLevel(level.upper())
+        console.setFormatter(ConsoleFormatter())
+        handlers.append(console)
+    if json_path:
+        sink = logging.FileHandler(json_path)
+        sink.setLevel(json_level.upper())
+        sink.setFormatter(JsonLinesFormatter())
+        handlers.append(sink)
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers.clear()
+    logger.propagate = False
+    if not handlers:
+        # Nothing listens, so isEnabledFor() is False everywhere and call
+        # sites skip building their messages.
+        logger.setLevel(logging.CRITICAL + 1)
+        return
+
+    logger.setLevel(min(handler.level for handler in handlers))
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def stop_logging():
+    """
+    Flush queued records and stop the background thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,156 @@
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+from game.board_state import BoardDiff
+from game.logic.base import BaseLogic
+from game.logic.garox import Garox
+from game.models import Board, GameObject
+
+DEFAULT_MOVE_DELAY_MS = 100
+# Sleeping wakes up a little late and the move still has to be encoded and
+# sent, so the deadline is set this much before the slot opens
+DEADLINE_SAFETY_MARGIN_MS = 5.0
+# Even with a round trip longer than the move delay there is some time to
+# improve on the fallback, the move just goes out late
+MIN_DECISION_BUDGET_MS = 1.0
+# Smoothing of the round trip estimate, as for TCP retransmission timers
+# (RFC 6298): the estimate is the smoothed time plus four deviations
+RTT_GAIN = 1 / 8
+RTT_DEVIATION_GAIN = 1 / 4
+RTT_DEVIATIONS = 4
+
+
+@dataclass
+class Deadline:
+    """
+    A point on the time.perf_counter() clock by which a decision is due
+    """
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.perf_counter() + seconds)
+
+    @property
+    def remaining(self) -> float:
+        return self.expires_at - time.perf_counter()
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.expires_at
+
+
+@dataclass
+class RoundTripEstimator:
+    """
+    Smoothed round trip time of the move requests, with its mean deviation,
+    so a jittery connection is given more room than a steady one
+    """
+
+    smoothed: Optional[float] = None
+    deviation: float = 0.0
+    samples: int = 0
+
+    def add(self, seconds: float):
+        self.samples += 1
+        if self.smoothed is None:
+            self.smoothed = seconds
+            self.deviation = seconds / 2
+            return
+        self.deviation += RTT_DEVIATION_GAIN * (abs(self.smoothed - seconds) - self.deviation)
+        self.smoothed += RTT_GAIN * (seconds - self.smoothed)
+
+    @property
+    def estimate(self) -> float:
+        """
+        :return: seconds to expect a round trip to take, 0 before any sample
+        """
+        if self.smoothed is None:
+            return 0.0
+        return self.smoothed + RTT_DEVIATIONS * self.deviation
+
+
+class AnytimeLogic(BaseLogic):
+    """
+    Logic that improves its move for as long as the move slot allows.
+
+    Every tick a cheap fallback logic, Garox by default, decides first, so
+    there is always a move. Then refine() yields better and better moves,
+    e.g. one per depth of an iterative deepening search, until it is done or
+    the deadline passes; the last move it yielded is sent. A refinement that
+    runs past the deadline is closed at its next yield, and long steps in
+    between should check the deadline they are given.
+
+    The deadline is the move delay minus the expected round trip of the
+    move request: the next slot opens one delay after the previous move was
+    sent, and the board to decide on arrives one round trip after that. The
+    game loops report round trips through on_round_trip.
+    """
+
+    def __init__(self, fallback: Optional[BaseLogic] = None, budget_ms: Optional[float] = None):
+        """
+        :param fallback: logic deciding the move refine() has to improve on
+        :param budget_ms: fixed decision time per tick instead of the one
+            derived from the move delay and the round trip
+        """
+        self.fallback = fallback if fallback is not None else Garox()
+        self.budget_ms = budget_ms
+        self.round_trip = RoundTripEstimator()
+        # Statistics: ticks decided by the fallback alone, ticks where the
+        # deadline cut refine() short, and moves refine() yielded last tick
+        self.fallback_moves = 0
+        self.interrupted = 0
+        self.refinements = 0
+        # The fallback's move this tick, for refine() to compare with
+        self.fallback_move: Optional[Tuple[int, int]] = None
+
+    def refine(
+        self, board_bot: GameObject, board: Board, deadline: Deadline
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Yield moves, each better than the ones before
+        """
+        raise NotImplementedError()
+
+    def decision_budget(self, board: Board) -> float:
+        """
+        :return: seconds to decide in
+        """
+        if self.budget_ms is not None:
+            return self.budget_ms / 1000
+        delay = board.minimum_delay_between_moves or DEFAULT_MOVE_DELAY_MS
+        budget_ms = delay - self.round_trip.estimate * 1000 - DEADLINE_SAFETY_MARGIN_MS
+        return max(budget_ms, MIN_DECISION_BUDGET_MS) / 1000
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        deadline = Deadline.after(self.decision_budget(board))
+        move = self.fallback_move = self.fallback.next_move(board_bot, board)
+        self.refinements = 0
+        if deadline.expired():
+            self.fallback_moves += 1
+            return move
+
+        refinements = self.refine(board_bot, board, deadline)
+        try:
+            for refined in refinements:
+                if board.is_valid_move(board_bot.position, *refined):
+                    move = refined
+                    self.refinements += 1
+                if deadline.expired():
+                    self.interrupted += 1
+                    break
+        finally:
+            refinements.close()
+        if not self.refinements:
+            self.fallback_moves += 1
+        return move
+
+    def on_board_diff(self, diff: BoardDiff, board: Board):
+        self.fallback.on_board_diff(diff, board)
+
+    def on_round_trip(self, seconds: float):
+        self.round_trip.add(seconds)
+
+    def close(self):
+        self.fallback.close()
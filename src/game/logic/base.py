@@ -1,9 +1,33 @@
 from abc import ABC
 from typing import Tuple
 
+from game.board_state import BoardDiff
 from game.models import Board, GameObject
 
 
 class BaseLogic(ABC):
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         raise NotImplementedError()
+
+    def on_board_diff(self, diff: BoardDiff, board: Board):
+        """
+        Called with the changes since the previous board, before next_move is
+        asked for a move on the new board. Override to update state
+        incrementally instead of re-deriving it every tick.
+        """
+        pass
+
+    def on_round_trip(self, seconds: float):
+        """
+        Called by the game loops with the time a move request took, from
+        sending the move to receiving the board after it. Override to plan
+        decision time around the connection.
+        """
+        pass
+
+    def close(self):
+        """
+        Called once the game is over. Override to release processes or other
+        resources the logic holds.
+        """
+        pass
@@ -1,8 +1,13 @@
 import random
 from typing import Tuple, Optional, List, Dict
 
+import numpy as np
+
+from game.distance import DistanceTable, distance_table, link
 from game.logic.base import BaseLogic
-from game.models import GameObject, Board, Position, Feature
+from game.models import GameObject, Board, Position, Feature, TELEPORTER_TYPE
+from game.opponents import OpponentModel
+from game.spatial import GridIndex, rect_distance
 from game.util import get_direction, position_equals, clamp
 
 # --- Constants ---
@@ -31,51 +36,288 @@ URGENT_MIN_TARGET_EVALUATION = 0.01
 DIAMOND_TO_BASE_DISTANCE_PENALTY_FACTOR = 0.25 
 COMPETITIVE_DIAMOND_PENALTY_FACTOR = 0.07 
 
+# Below this many diamonds the array setup costs more than the loop it saves
+VECTORIZED_SCORING_MIN_DIAMONDS = 32
+# Below this many diamonds the grid index costs more than the pruning saves
+PRUNED_SCORING_MIN_DIAMONDS = 16
+PRUNED_SCORING_MIN_BOTS_FOR_INDEX = 8
+
 
 class Garox(BaseLogic):
-    def __init__(self):
+    def __init__(self, opponent_model: Optional[OpponentModel] = None):
+        """
+        :param opponent_model: when given, competition penalties count the
+            opponents predicted to reach a diamond first instead of the ones
+            nearer to it now. Garox updates it with every board it is given.
+        """
         self.goal_position: Optional[Position] = None
         self.current_target_is_teleporter_entry: bool = False
         self.fallback_directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
         self.current_fallback_direction_index = 0
-        # self.opponent_estimated_bases: Dict[str, Position] = {} 
+        # Score diamonds with NumPy from this many diamonds on, None always
+        # scores with the loop, which stays as the reference
+        self.vectorized_scoring_min_diamonds: Optional[int] = VECTORIZED_SCORING_MIN_DIAMONDS
+        # Same for the grid pruned loop, used when the vectorized path is not
+        self.pruned_scoring_min_diamonds: Optional[int] = PRUNED_SCORING_MIN_DIAMONDS
+        self.opponent_model = opponent_model
 
     def _manhattan_distance(self, pos1: Position, pos2: Position) -> int:
         return abs(pos1.x - pos2.x) + abs(pos1.y - pos2.y)
 
     def _get_teleporters(self, board: Board) -> List[Tuple[GameObject, Optional[GameObject]]]:
-        teleporters_on_board = [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
         paired_teleporters = []
         processed_ids = set()
-        for tp1 in teleporters_on_board:
+        for tp1 in board.teleporters:
             if tp1.id in processed_ids: continue
             if tp1.properties and tp1.properties.pair_id:
-                tp2 = next((tp_other for tp_other in teleporters_on_board if tp_other.id == tp1.properties.pair_id), None)
+                tp2 = board.get_object(tp1.properties.pair_id)
+                if tp2 and tp2.type != TELEPORTER_TYPE: tp2 = None
                 paired_teleporters.append((tp1, tp2))
                 processed_ids.add(tp1.id)
                 if tp2: processed_ids.add(tp2.id)
         return paired_teleporters
 
+    def _distance_table(
+        self, board: Board, teleporters: List[Tuple[GameObject, Optional[GameObject]]]
+    ) -> DistanceTable:
+        # Only a pair's first teleporter is an entry, and a bot standing on
+        # either end of a pair does not take it
+        links = tuple(
+            link(tp_entry_obj.position, tp_exit_obj.position, (tp_entry_obj.position, tp_exit_obj.position))
+            for tp_entry_obj, tp_exit_obj in teleporters if tp_exit_obj
+        )
+        return distance_table(board.width, board.height, links)
+
     def _calculate_effective_distance_and_path(
-        self, start_pos: Position, end_pos: Position, board: Board,
-        teleporters: List[Tuple[GameObject, Optional[GameObject]]]
+        self, start_pos: Position, end_pos: Position, distances: DistanceTable
     ) -> Tuple[int, Optional[Position], bool]:
-        direct_distance = self._manhattan_distance(start_pos, end_pos)
-        best_distance = direct_distance
-        path_via_teleporter_target: Optional[Position] = end_pos
-        uses_teleporter = False
-        for tp_entry_obj, tp_exit_obj in teleporters:
-            if not tp_exit_obj: continue
-            tp_entry_pos, tp_exit_pos = tp_entry_obj.position, tp_exit_obj.position
-            if position_equals(start_pos, tp_entry_pos) or position_equals(start_pos, tp_exit_pos): continue
-            dist_to_tp_entry = self._manhattan_distance(start_pos, tp_entry_pos)
-            dist_from_tp_exit_to_end = self._manhattan_distance(tp_exit_pos, end_pos)
-            teleporter_path_distance = dist_to_tp_entry + 1 + dist_from_tp_exit_to_end 
-            if teleporter_path_distance < best_distance:
-                best_distance = teleporter_path_distance
-                path_via_teleporter_target = tp_entry_pos
-                uses_teleporter = True
-        return best_distance, path_via_teleporter_target, uses_teleporter
+        best_distance, tp_link = distances.route(start_pos, end_pos)
+        if tp_link is None:
+            return best_distance, end_pos, False
+        return best_distance, tp_link.entry, True
+
+    def _evaluate_diamond(
+        self, diamond: GameObject, current_pos: Position, my_base: Position, diamonds_held: int, inventory_size: int,
+        all_other_bots: List[GameObject], distances: DistanceTable, bot_index: Optional[GridIndex] = None
+    ) -> Optional[dict]:
+        """
+        :param bot_index: the other bots' positions; counts the closer ones
+            with a radius query, which is only exact without teleporter links
+        :return: the candidate, None when the diamond is skipped
+        """
+        if position_equals(current_pos, diamond.position): return None
+        diamond_value_raw = diamond.properties.points if diamond.properties and diamond.properties.points is not None else BLUE_DIAMOND_VALUE
+        if diamonds_held + diamond_value_raw > inventory_size and \
+           not (diamonds_held == DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION and diamond_value_raw == BLUE_DIAMOND_VALUE):
+            return None
+        dist_to_diamond, path_target_to_diamond, uses_tp_to_diamond = self._calculate_effective_distance_and_path(
+            current_pos, diamond.position, distances
+        )
+        if dist_to_diamond == 0 : return None
+        effective_diamond_value = float(diamond_value_raw)
+        if bot_index is not None:
+            num_closer_opponents = len(bot_index.within(diamond.position, dist_to_diamond - 1))
+        else:
+            num_closer_opponents = 0
+            for other_bot in all_other_bots:
+                if self.opponent_model is not None:
+                    dist_opp_to_diamond = self.opponent_model.arrival_time(other_bot, diamond.position, distances)
+                else:
+                    dist_opp_to_diamond, _, _ = self._calculate_effective_distance_and_path(
+                        other_bot.position, diamond.position, distances
+                    )
+                if dist_opp_to_diamond < dist_to_diamond:
+                    num_closer_opponents += 1
+        if num_closer_opponents > 0:
+            penalty = (num_closer_opponents**2) * COMPETITIVE_DIAMOND_PENALTY_FACTOR
+            effective_diamond_value *= (1.0 - penalty)
+            if effective_diamond_value < 0: effective_diamond_value = 0.01
+        
+        dist_diamond_to_base, _, _ = self._calculate_effective_distance_and_path(
+            diamond.position, my_base, distances
+        )
+        current_total_diamonds_if_taken = diamonds_held + diamond_value_raw
+        inventory_fill_ratio = (current_total_diamonds_if_taken / inventory_size) if inventory_size > 0 else 1
+        return_penalty_factor = 1.0 + (DIAMOND_TO_BASE_DISTANCE_PENALTY_FACTOR * inventory_fill_ratio)
+        total_trip_distance = dist_to_diamond + (dist_diamond_to_base * return_penalty_factor)
+        
+        evaluation_score = 0
+        if total_trip_distance > 0:
+            evaluation_score = effective_diamond_value / total_trip_distance
+        
+        return {
+            'score': evaluation_score, 'diamond': diamond, 
+            'path_target': path_target_to_diamond, 'uses_tp': uses_tp_to_diamond, 
+            'value_raw': diamond_value_raw, 'dist_collect': dist_to_diamond
+        }
+
+    def _evaluate_diamonds(
+        self, current_pos: Position, my_base: Position, diamonds_held: int, inventory_size: int,
+        available_diamonds: List[GameObject], all_other_bots: List[GameObject], distances: DistanceTable
+    ) -> List[dict]:
+        """
+        Reference scoring, one diamond at a time
+        :return: the candidates, best first
+        """
+        diamond_candidates_eval = [] 
+        for diamond in available_diamonds:
+            candidate = self._evaluate_diamond(
+                diamond, current_pos, my_base, diamonds_held, inventory_size, all_other_bots, distances
+            )
+            if candidate: diamond_candidates_eval.append(candidate)
+        diamond_candidates_eval.sort(key=lambda x: x['score'], reverse=True)
+        return diamond_candidates_eval
+
+    def _find_best_diamond_pruned(
+        self, current_pos: Position, my_base: Position, diamonds_held: int, inventory_size: int,
+        available_diamonds: List[GameObject], all_other_bots: List[GameObject], distances: DistanceTable
+    ) -> Optional[dict]:
+        """
+        Branch and bound over a grid of the diamonds, nearest to the trip
+        through the bot and the base first. A trip is at least as long as
+        the walk to the diamond plus the walk to the base, so once a bucket's
+        bound caps its scores below the best found the rest are skipped.
+        Only exact without teleporter links and when every candidate fits,
+        i.e. not with 4 diamonds held.
+        """
+        if not available_diamonds:
+            return None
+        diamond_index = GridIndex([diamond.position for diamond in available_diamonds])
+        # With few opponents a radius query costs more than routing to each.
+        # Predicted arrivals are not distances from where the bots are now.
+        bot_index = GridIndex([other_bot.position for other_bot in all_other_bots]) \
+            if len(all_other_bots) >= PRUNED_SCORING_MIN_BOTS_FOR_INDEX and self.opponent_model is None else None
+        best_value = max(
+            diamond.properties.points if diamond.properties and diamond.properties.points is not None else BLUE_DIAMOND_VALUE
+            for diamond in available_diamonds
+        )
+        scored = []
+        best_score = None
+        for bound, bucket in diamond_index.best_first(
+            lambda x0, y0, x1, y1: rect_distance(current_pos, x0, y0, x1, y1) + rect_distance(my_base, x0, y0, x1, y1)
+        ):
+            if best_score is not None and bound > 0 and best_value / bound < best_score:
+                break
+            for index in bucket:
+                candidate = self._evaluate_diamond(
+                    available_diamonds[index], current_pos, my_base, diamonds_held, inventory_size,
+                    all_other_bots, distances, bot_index
+                )
+                if candidate:
+                    scored.append((-candidate['score'], index, candidate))
+                    if best_score is None or candidate['score'] > best_score:
+                        best_score = candidate['score']
+        # The order of a stable sort on score of the full list
+        scored.sort(key=lambda x: (x[0], x[1]))
+        return self._choose_diamond([candidate for _, _, candidate in scored], diamonds_held, inventory_size)
+
+    def _choose_diamond(
+        self, diamond_candidates_eval: List[dict], diamonds_held: int, inventory_size: int
+    ) -> Optional[dict]:
+        best_diamond_data: Optional[dict] = None
+        if len(diamond_candidates_eval) > 0:
+            if diamonds_held == DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION:
+                blue_candidate_when_4_diamonds = next(
+                    (cand for cand in diamond_candidates_eval if cand['value_raw'] == BLUE_DIAMOND_VALUE and diamonds_held + cand['value_raw'] <= inventory_size), 
+                    None
+                )
+                if blue_candidate_when_4_diamonds:
+                    best_diamond_data = blue_candidate_when_4_diamonds
+                elif diamond_candidates_eval[0]['value_raw'] == RED_DIAMOND_VALUE and \
+                     (diamonds_held + diamond_candidates_eval[0]['value_raw'] > inventory_size):
+                    if len(diamond_candidates_eval) > 1 and \
+                       (diamonds_held + diamond_candidates_eval[1]['value_raw'] <= inventory_size) : 
+                        best_diamond_data = diamond_candidates_eval[1]
+                elif diamonds_held + diamond_candidates_eval[0]['value_raw'] <= inventory_size: # Kandidat terbaik muat
+                    best_diamond_data = diamond_candidates_eval[0]
+            else: 
+                best_diamond_data = next(
+                    (cand for cand in diamond_candidates_eval if diamonds_held + cand['value_raw'] <= inventory_size),
+                    None
+                )
+        return best_diamond_data
+
+    def _find_best_diamond_vectorized(
+        self, current_pos: Position, my_base: Position, diamonds_held: int, inventory_size: int,
+        available_diamonds: List[GameObject], all_other_bots: List[GameObject], distances: DistanceTable
+    ) -> Optional[dict]:
+        """
+        _evaluate_diamonds and _choose_diamond on arrays. Every score is the
+        same float operation in the same order, and the first maximum stands
+        in for the first entry of the stable descending sort, so the same
+        diamond is chosen.
+        """
+        positions = np.array([(d.position.x, d.position.y) for d in available_diamonds], dtype=np.int16)
+        values = np.array([
+            d.properties.points if d.properties and d.properties.points is not None else BLUE_DIAMOND_VALUE
+            for d in available_diamonds
+        ])
+        here = np.array([(current_pos.x, current_pos.y)], dtype=np.int16)
+        dist_to_diamond, via = distances.between(here, positions)
+        dist_to_diamond, via = dist_to_diamond[0], via[0]
+        if all_other_bots and self.opponent_model is not None:
+            dist_opp_to_diamond = self.opponent_model.arrival_times(all_other_bots, positions, distances)
+            num_closer_opponents = (dist_opp_to_diamond < dist_to_diamond).sum(axis=0)
+        elif all_other_bots:
+            dist_opp_to_diamond, _ = distances.between(
+                np.array([(b.position.x, b.position.y) for b in all_other_bots], dtype=np.int16), positions
+            )
+            num_closer_opponents = (dist_opp_to_diamond < dist_to_diamond).sum(axis=0)
+        else:
+            num_closer_opponents = np.zeros(len(values), dtype=np.int64)
+        dist_diamond_to_base, _ = distances.between(positions, np.array([(my_base.x, my_base.y)], dtype=np.int16))
+        dist_diamond_to_base = dist_diamond_to_base[:, 0]
+
+        fits = diamonds_held + values <= inventory_size
+        candidates = (
+            ((positions[:, 0] != current_pos.x) | (positions[:, 1] != current_pos.y))
+            & (fits | ((diamonds_held == DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION) & (values == BLUE_DIAMOND_VALUE)))
+            & (dist_to_diamond != 0)
+        )
+        if not candidates.any():
+            return None
+
+        penalty = (num_closer_opponents**2) * COMPETITIVE_DIAMOND_PENALTY_FACTOR
+        effective_diamond_value = values.astype(np.float64)
+        contested = num_closer_opponents > 0
+        effective_diamond_value[contested] *= 1.0 - penalty[contested]
+        effective_diamond_value[contested & (effective_diamond_value < 0)] = 0.01
+        inventory_fill_ratio = (diamonds_held + values) / inventory_size if inventory_size > 0 else np.ones(len(values))
+        return_penalty_factor = 1.0 + (DIAMOND_TO_BASE_DISTANCE_PENALTY_FACTOR * inventory_fill_ratio)
+        total_trip_distance = dist_to_diamond + (dist_diamond_to_base * return_penalty_factor)
+        evaluation_score = np.zeros(len(values))
+        np.divide(effective_diamond_value, total_trip_distance, out=evaluation_score, where=total_trip_distance > 0)
+        ranked = np.where(candidates, evaluation_score, -np.inf)
+
+        def best_of(mask) -> Optional[int]:
+            if not mask.any():
+                return None
+            return int(np.argmax(np.where(mask, ranked, -np.inf)))
+
+        if diamonds_held == DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION:
+            chosen = best_of(candidates & (values == BLUE_DIAMOND_VALUE) & fits)
+            if chosen is None:
+                first = best_of(candidates)
+                if values[first] == RED_DIAMOND_VALUE and not fits[first]:
+                    rest = candidates.copy()
+                    rest[first] = False
+                    second = best_of(rest)
+                    if second is not None and fits[second]:
+                        chosen = second
+                elif fits[first]:
+                    chosen = first
+        else:
+            chosen = best_of(candidates & fits)
+        if chosen is None:
+            return None
+
+        diamond = available_diamonds[chosen]
+        tp_link = distances.links[via[chosen]] if via[chosen] >= 0 else None
+        return {
+            'score': evaluation_score[chosen].item(), 'diamond': diamond,
+            'path_target': tp_link.entry if tp_link else diamond.position, 'uses_tp': tp_link is not None,
+            'value_raw': values[chosen].item(), 'dist_collect': dist_to_diamond[chosen].item()
+        }
 
     def _get_safe_random_move_or_cycle(self, current_pos: Position, board: Board) -> Tuple[int, int]:
         options = [(0, 1), (0, -1), (1, 0), (-1, 0)]
@@ -102,6 +344,9 @@ class Garox(BaseLogic):
         time_left_ms = my_props.milliseconds_left if my_props.milliseconds_left is not None else float('inf')
         
         teleporters = self._get_teleporters(board)
+        distances = self._distance_table(board, teleporters)
+        if self.opponent_model is not None:
+            self.opponent_model.update(board)
         all_other_bots = [b for b in board.bots if b.properties.name != my_props.name]
 
         if self.goal_position and position_equals(current_pos, self.goal_position):
@@ -112,7 +357,7 @@ class Garox(BaseLogic):
 
         # --- 1. Dynamic Return to Base Logic (DIPERKETAT) ---
         dist_to_base, path_target_base, use_tp_base = self._calculate_effective_distance_and_path(
-            current_pos, my_base, board, teleporters
+            current_pos, my_base, distances
         )
         
         
@@ -161,76 +406,28 @@ class Garox(BaseLogic):
 
 
         # --- 2. Evaluate Single Best Diamond ---
-        diamond_candidates_eval = [] 
         available_diamonds = board.diamonds
-        
-        if available_diamonds:
-            for diamond in available_diamonds:
-                if position_equals(current_pos, diamond.position): continue
-                diamond_value_raw = diamond.properties.points if diamond.properties and diamond.properties.points is not None else BLUE_DIAMOND_VALUE
-                if diamonds_held + diamond_value_raw > inventory_size and \
-                   not (diamonds_held == DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION and diamond_value_raw == BLUE_DIAMOND_VALUE):
-                    continue
-                dist_to_diamond, path_target_to_diamond, uses_tp_to_diamond = self._calculate_effective_distance_and_path(
-                    current_pos, diamond.position, board, teleporters
-                )
-                if dist_to_diamond == 0 : continue
-                effective_diamond_value = float(diamond_value_raw)
-                num_closer_opponents = 0
-                for other_bot in all_other_bots:
-                    dist_opp_to_diamond, _, _ = self._calculate_effective_distance_and_path(
-                        other_bot.position, diamond.position, board, teleporters
-                    )
-                    if dist_opp_to_diamond < dist_to_diamond:
-                        num_closer_opponents += 1
-                if num_closer_opponents > 0:
-                    penalty = (num_closer_opponents**2) * COMPETITIVE_DIAMOND_PENALTY_FACTOR
-                    effective_diamond_value *= (1.0 - penalty)
-                    if effective_diamond_value < 0: effective_diamond_value = 0.01
-                
-                dist_diamond_to_base, _, _ = self._calculate_effective_distance_and_path(
-                    diamond.position, my_base, board, teleporters
-                )
-                current_total_diamonds_if_taken = diamonds_held + diamond_value_raw
-                inventory_fill_ratio = (current_total_diamonds_if_taken / inventory_size) if inventory_size > 0 else 1
-                return_penalty_factor = 1.0 + (DIAMOND_TO_BASE_DISTANCE_PENALTY_FACTOR * inventory_fill_ratio)
-                total_trip_distance = dist_to_diamond + (dist_diamond_to_base * return_penalty_factor)
-                
-                evaluation_score = 0
-                if total_trip_distance > 0:
-                    evaluation_score = effective_diamond_value / total_trip_distance
-                
-                diamond_candidates_eval.append({
-                    'score': evaluation_score, 'diamond': diamond, 
-                    'path_target': path_target_to_diamond, 'uses_tp': uses_tp_to_diamond, 
-                    'value_raw': diamond_value_raw, 'dist_collect': dist_to_diamond
-                })
-            diamond_candidates_eval.sort(key=lambda x: x['score'], reverse=True)
-
-        best_diamond_data: Optional[dict] = None
-        if len(diamond_candidates_eval) > 0:
-            if diamonds_held == DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION:
-                blue_candidate_when_4_diamonds = next(
-                    (cand for cand in diamond_candidates_eval if cand['value_raw'] == BLUE_DIAMOND_VALUE and diamonds_held + cand['value_raw'] <= inventory_size), 
-                    None
-                )
-                if blue_candidate_when_4_diamonds:
-                    best_diamond_data = blue_candidate_when_4_diamonds
-                elif diamond_candidates_eval[0]['value_raw'] == RED_DIAMOND_VALUE and \
-                     (diamonds_held + diamond_candidates_eval[0]['value_raw'] > inventory_size):
-                    if len(diamond_candidates_eval) > 1 and \
-                       (diamonds_held + diamond_candidates_eval[1]['value_raw'] <= inventory_size) : 
-                        best_diamond_data = diamond_candidates_eval[1]
-                elif diamonds_held + diamond_candidates_eval[0]['value_raw'] <= inventory_size: # Kandidat terbaik muat
-                    best_diamond_data = diamond_candidates_eval[0]
-            else: 
-                best_diamond_data = next(
-                    (cand for cand in diamond_candidates_eval if diamonds_held + cand['value_raw'] <= inventory_size),
-                    None
-                )
+        min_diamonds = self.vectorized_scoring_min_diamonds
+        min_pruned_diamonds = self.pruned_scoring_min_diamonds
+        if min_diamonds is not None and len(available_diamonds) >= min_diamonds:
+            best_diamond_data = self._find_best_diamond_vectorized(
+                current_pos, my_base, diamonds_held, inventory_size, available_diamonds, all_other_bots, distances
+            )
+        elif min_pruned_diamonds is not None and len(available_diamonds) >= min_pruned_diamonds and \
+             not distances.links and diamonds_held != DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION:
+            best_diamond_data = self._find_best_diamond_pruned(
+                current_pos, my_base, diamonds_held, inventory_size, available_diamonds, all_other_bots, distances
+            )
+        else:
+            best_diamond_data = self._choose_diamond(
+                self._evaluate_diamonds(
+                    current_pos, my_base, diamonds_held, inventory_size, available_diamonds, all_other_bots, distances
+                ),
+                diamonds_held, inventory_size
+            )
 
         # --- 3. Strategic Red Button Usage ---
-        red_button_obj: Optional[GameObject] = next((obj for obj in board.game_objects if obj.type == "DiamondButtonGameObject"), None)
+        red_button_obj: Optional[GameObject] = board.diamond_buttons[0] if board.diamond_buttons else None
         use_red_button_action = False
         
         if red_button_obj and not position_equals(current_pos, red_button_obj.position):
@@ -320,3 +517,14 @@ class Garox(BaseLogic):
             final_dx, final_dy = self._get_safe_random_move_or_cycle(current_pos, board)
             
         return final_dx, final_dy
+
+
+
+class GaroxPredict(Garox):
+    """
+    Garox with an OpponentModel of its own: competition penalties count the
+    opponents predicted to reach a diamond first
+    """
+
+    def __init__(self):
+        super().__init__(opponent_model=OpponentModel())
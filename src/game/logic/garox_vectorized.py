@@ -0,0 +1,166 @@
+import numpy as np
+
+from game.batch_engine import BatchEngine
+from game.logic.garox import (
+    BASE_MIN_TARGET_EVALUATION,
+    COMPETITIVE_DIAMOND_PENALTY_FACTOR,
+    DIAMOND_TO_BASE_DISTANCE_PENALTY_FACTOR,
+    LOW_DIAMOND_COUNT_FOR_RED_BUTTON,
+    OPPONENT_HIGH_DIAMOND_COUNT,
+    RED_BUTTON_PROXIMITY_ADVANTAGE,
+    TACKLE_MIN_OPPONENT_DIAMONDS,
+    TIME_SAFETY_MARGIN_MOVES,
+    TOTAL_GAME_TIME_MS,
+    URGENT_MIN_TARGET_EVALUATION,
+    URGENT_TIME_PERCENTAGE,
+)
+
+_DIRECTIONS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)], dtype=np.int16)
+
+
+def _toward(position: np.ndarray, goal: np.ndarray) -> np.ndarray:
+    """
+    game.util.get_direction on arrays: step along x first, then along y
+    """
+    delta = np.clip(goal - position, -1, 1)
+    delta[..., 1] = np.where(delta[..., 0] != 0, 0, delta[..., 1])
+    return delta
+
+
+def _random_valid(engine: BatchEngine, position: np.ndarray) -> np.ndarray:
+    """
+    A random in-bounds step for each row of position
+    """
+    width, height = engine.config.width, engine.config.height
+    candidates = position[..., None, :] + _DIRECTIONS
+    valid = (
+        (candidates[..., 0] >= 0)
+        & (candidates[..., 0] < width)
+        & (candidates[..., 1] >= 0)
+        & (candidates[..., 1] < height)
+    )
+    priority = np.where(valid, engine.rng.random(valid.shape), 2.0)
+    return _DIRECTIONS[priority.argmin(axis=-1)]
+
+
+def garox_policy(engine: BatchEngine) -> np.ndarray:
+    """
+    Garox's greedy choice for every bot of every game at once.
+
+    The decision follows Garox.next_move: go home when the inventory is full
+    or time runs short, otherwise take the best scoring diamond, press the
+    diamond button when it is much closer, tackle a loaded neighbour, and
+    go home or wander when nothing is worth it. Differences from the scalar
+    logic:
+    - Distances are plain Manhattan distances. Garox looks up the teleporter
+      pair by the pairId string the server sends, which never matches an
+      object id, so live Garox never routes through teleporters either.
+    - The policy is stateless; Garox's remembered goal only decides between
+      going home and wandering when there is no diamond candidate at all,
+      and here a bot carrying diamonds always goes home in that case.
+    - Ties between equally scored diamonds go to the first cell in row
+      order instead of the first object in the server's list.
+    :return: (G, B, 2) actions
+    """
+    config = engine.config
+    games, bots = engine.games, engine.bots
+    delay = config.minimum_delay_between_moves or 100
+    time_left = engine.milliseconds_left
+    min_evaluation = (
+        URGENT_MIN_TARGET_EVALUATION
+        if time_left < TOTAL_GAME_TIME_MS * URGENT_TIME_PERCENTAGE
+        else BASE_MIN_TARGET_EVALUATION
+    )
+    inventory_size = config.inventory_size
+
+    position = engine.positions.astype(np.int32)
+    base = engine.bases.astype(np.int32)
+    held = engine.inventory.astype(np.int32)
+
+    # Only cells holding a diamond are scored: (game, cell) pairs, flattened
+    points = engine.diamonds.reshape(games, -1)
+    diamond_game, diamond_cell = np.nonzero(points)
+    value = points[diamond_game, diamond_cell].astype(np.int32)[:, None]
+    diamond_count = np.bincount(diamond_game, minlength=games)
+    cell = np.stack([diamond_cell % config.width, diamond_cell // config.width], axis=1)
+
+    # (diamonds, B) distances from every bot of the diamond's game
+    distance = np.abs(position[diamond_game] - cell[:, None, :]).sum(axis=-1)
+    base_distance = np.abs(base[diamond_game] - cell[:, None, :]).sum(axis=-1)
+
+    # --- Diamond evaluation ---
+    carried = held[diamond_game]
+    candidate = (distance > 0) & (carried + value <= inventory_size)
+
+    closer = np.zeros(distance.shape, dtype=np.int32)
+    for other in range(bots):
+        closer += distance[:, other : other + 1] < distance
+    # A bot is never closer than itself, so closer only counts opponents
+    effective = value * (1.0 - closer * closer * COMPETITIVE_DIAMOND_PENALTY_FACTOR)
+    effective = np.where((closer > 0) & (effective < 0), 0.01, effective)
+
+    fill_ratio = (carried + value) / inventory_size if inventory_size > 0 else 1
+    trip = distance + base_distance * (
+        1.0 + DIAMOND_TO_BASE_DISTANCE_PENALTY_FACTOR * fill_ratio
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        evaluation = np.where(trip > 0, effective / trip, 0.0)
+    evaluation = np.where(candidate, evaluation, -np.inf)
+
+    # Best diamond per (game, bot): nonzero lists games in order, so a stable
+    # sort on -evaluation within each game puts the best one first and keeps
+    # ties in cell order
+    best_score = np.full((games, bots), -np.inf)
+    best_distance = np.zeros((games, bots), dtype=np.int32)
+    best_cell = position.copy()
+    for bot in range(bots):
+        order = np.lexsort((-evaluation[:, bot], diamond_game))
+        first = order[np.r_[True, diamond_game[order][1:] != diamond_game[order][:-1]]] if len(order) else order
+        rows = diamond_game[first]
+        best_score[rows, bot] = evaluation[first, bot]
+        best_distance[rows, bot] = distance[first, bot]
+        best_cell[rows, bot] = cell[first]
+    has_best = best_score > -np.inf
+
+    # --- Decision, from the lowest to the highest priority ---
+    actions = _random_valid(engine, position)
+
+    home_distance = np.abs(position - base).sum(axis=-1)
+    go_home = (held > 0) & ~(has_best & (best_score >= min_evaluation))
+    actions = np.where(go_home[..., None], _toward(position, base), actions)
+
+    # Tackle a neighbouring opponent that carries diamonds
+    opponent_distance = np.abs(position[:, :, None, :] - position[:, None, :, :]).sum(axis=-1)
+    opponent_held = np.broadcast_to(held[:, None, :], opponent_distance.shape)
+    tackle = (
+        (opponent_distance == 1)
+        & (opponent_held >= TACKLE_MIN_OPPONENT_DIAMONDS)
+        & ((held[..., None] < 2) | (opponent_held >= OPPONENT_HIGH_DIAMOND_COUNT))
+    )
+    tackle_score = np.where(tackle, opponent_held, -1)
+    victim = tackle_score.argmax(axis=-1)
+    can_tackle = tackle.any(axis=-1) & ~(has_best & (best_score >= min_evaluation))
+    victim_position = np.take_along_axis(position, victim[..., None], axis=1)
+    actions = np.where(can_tackle[..., None], _toward(position, victim_position), actions)
+
+    go_diamond = has_best & (best_score >= min_evaluation)
+    actions = np.where(go_diamond[..., None], _toward(position, best_cell), actions)
+
+    button = engine.buttons.astype(np.int32)[:, None, :]
+    button_distance = np.abs(position - button).sum(axis=-1)
+    press = (button_distance > 0) & (
+        (has_best & (button_distance < best_distance - RED_BUTTON_PROXIMITY_ADVANTAGE))
+        | ((diamond_count[:, None] <= LOW_DIAMOND_COUNT_FOR_RED_BUTTON) & (button_distance <= 5))
+    )
+    actions = np.where(press[..., None], _toward(position, button), actions)
+
+    time_needed = (home_distance + TIME_SAFETY_MARGIN_MOVES) * delay
+    must_return = (held >= inventory_size) | ((held > 0) & (time_left <= time_needed))
+    at_home = home_distance == 0
+    actions = np.where(
+        (must_return & ~at_home)[..., None], _toward(position, base), actions
+    )
+
+    standing = (actions == 0).all(axis=-1)
+    actions = np.where(standing[..., None], _random_valid(engine, position), actions)
+    return actions.astype(np.int16)
@@ -0,0 +1,279 @@
+import itertools
+import multiprocessing
+import os
+import pickle
+import random
+import struct
+import time
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from game.engine import Engine, EngineConfig
+from game.log import get_logger
+from game.logic.anytime import AnytimeLogic, Deadline
+from game.logic.base import BaseLogic
+from game.logic.garox import Garox
+from game.logic.unused.D import Dlogic
+from game.models import Board, GameObject
+
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+# Ticks simulated after the candidate move
+ROLLOUT_HORIZON_TICKS = 10
+# Diamonds still carried when a rollout ends are worth this much each: they
+# are not scored yet and may be lost to a tackle
+HELD_DIAMOND_WEIGHT = 0.5
+# Opponents play one of these in every rollout, picked at random
+OPPONENT_POLICIES = (Garox, Dlogic)
+REPORT_EVERY_TICKS = 100
+# The board shared with the workers is preceded by its tick and its size
+BOARD_HEADER = struct.Struct("<qq")
+INITIAL_BOARD_BYTES = 1 << 16
+# Longest wait for a rollout left running at the previous deadline. One that
+# takes longer fails on the board of the new tick, unheard.
+STALE_ROLLOUT_TIMEOUT = 1.0
+
+logger = get_logger("rollout")
+
+
+class FirstMove(BaseLogic):
+    """
+    Plays a given move, then leaves the game to another logic
+    """
+
+    def __init__(self, move: Tuple[int, int], then: BaseLogic):
+        self.move: Optional[Tuple[int, int]] = move
+        self.then = then
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        if self.move is not None:
+            move, self.move = self.move, None
+            return move
+        return self.then.next_move(board_bot, board)
+
+
+def rollout(board: Board, name: str, move: Tuple[int, int], seed: int, horizon: int) -> float:
+    """
+    Play move, then horizon ticks more with the bot on Garox and every
+    opponent on one of OPPONENT_POLICIES
+    :return: points scored, plus HELD_DIAMOND_WEIGHT per diamond carried
+    """
+    # Logic draws from the global random module too
+    random.seed(seed)
+    engine = Engine.from_board(board, seed)
+    session = engine.sessions[name]
+    score = session.bot.properties.score or 0
+    logics: Dict[str, BaseLogic] = {
+        other: FirstMove(move, Garox()) if other == name else random.choice(OPPONENT_POLICIES)()
+        for other in engine.sessions
+    }
+    for _ in range(horizon):
+        if name not in engine.sessions:
+            break
+        engine.step(logics)
+    props = session.bot.properties
+    return props.score - score + HELD_DIAMOND_WEIGHT * props.diamonds
+
+
+class SharedBoard:
+    """
+    The board of the current tick in shared memory, written once per tick
+    by the logic and read once per tick by every worker, so rollout tasks
+    only carry their move and seed
+    """
+
+    def __init__(self, size: int = INITIAL_BOARD_BYTES):
+        self.block = SharedMemory(create=True, size=size)
+        self.tick = 0
+
+    def write(self, board: Board) -> Tuple[str, int]:
+        """
+        :return: name of the block and tick, for workers to read it with
+        """
+        data = pickle.dumps(board, pickle.HIGHEST_PROTOCOL)
+        if BOARD_HEADER.size + len(data) > self.block.size:
+            self.close()
+            self.block = SharedMemory(create=True, size=2 * (BOARD_HEADER.size + len(data)))
+        self.tick += 1
+        self.block.buf[BOARD_HEADER.size : BOARD_HEADER.size + len(data)] = data
+        BOARD_HEADER.pack_into(self.block.buf, 0, self.tick, len(data))
+        return self.block.name, self.tick
+
+    def close(self):
+        self.block.close()
+        self.block.unlink()
+
+
+# Worker side: the block attached last and the board read from it
+_attached: Optional[SharedMemory] = None
+_board_read: Tuple[Optional[str], int, Optional[Board]] = (None, 0, None)
+
+
+def _read_board(block_name: str, tick: int) -> Board:
+    global _attached, _board_read
+    name, read_tick, board = _board_read
+    if name == block_name and read_tick == tick:
+        return board
+    if _attached is None or _attached.name != block_name:
+        if _attached is not None:
+            _attached.close()
+        _attached = SharedMemory(name=block_name)
+    written_tick, size = BOARD_HEADER.unpack_from(_attached.buf, 0)
+    if written_tick != tick:
+        raise RuntimeError("Shared board of tick {} is gone, tick {} was written".format(tick, written_tick))
+    board = pickle.loads(_attached.buf[BOARD_HEADER.size : BOARD_HEADER.size + size])
+    _board_read = (block_name, tick, board)
+    return board
+
+
+def _rollout_task(task: tuple) -> Tuple[Tuple[int, int], float]:
+    block_name, tick, name, move, seed, horizon = task
+    return move, rollout(_read_board(block_name, tick), name, move, seed, horizon)
+
+
+def _warm_worker():
+    """
+    Run the policies once, so the first rollouts do not pay for imports,
+    caches and first calls
+    """
+    engine = Engine(EngineConfig(seconds=1), seed=0)
+    engine.run({"garox": Garox(), "d": Dlogic()})
+
+
+class RolloutLogic(AnytimeLogic):
+    """
+    Monte Carlo rollouts of every valid move. Each rollout continues the
+    game from the current board on the simulated engine for
+    ROLLOUT_HORIZON_TICKS, with opponents on Garox or Dlogic, so opponents
+    racing for the same diamonds and tackles show up in the outcome.
+
+    Rollouts run on a process pool that lives as long as the logic, started
+    on the first move with warmed up workers, until close(). The board goes
+    to the workers once per tick through shared memory. Each worker has one
+    rollout at a time. The moves take turns, with the same seeds, so each is
+    compared on the same futures. Whenever every move has as many rollouts
+    as the others, the best mean is offered as the move, until the deadline;
+    the fallback logic's move stands until then.
+
+    Inside a daemonic process, e.g. a tournament worker, no pool can be
+    started and the rollouts run in process.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        horizon: int = ROLLOUT_HORIZON_TICKS,
+        fallback: Optional[BaseLogic] = None,
+        budget_ms: Optional[float] = None,
+    ):
+        """
+        :param workers: processes in the pool, by default one per CPU core,
+            0 runs the rollouts in process
+        :param horizon: ticks simulated after the candidate move
+        """
+        super().__init__(fallback, budget_ms)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.horizon = horizon
+        self.pool = None
+        self.shared_board: Optional[SharedBoard] = None
+        # Rollouts still running when the deadline passed
+        self.stale = deque()
+        self.rng = random.Random(random.getrandbits(64))
+        self.ticks = 0
+        self.rollouts = 0
+        self.rollout_seconds = 0.0
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.rollouts / self.rollout_seconds if self.rollout_seconds else 0.0
+
+    def _pool(self):
+        if self.pool is None and self.workers:
+            if multiprocessing.current_process().daemon:
+                logger.warning("Daemonic processes cannot start a pool, rollouts run in process")
+                self.workers = 0
+            else:
+                # Before the pool, so the workers share the resource tracker
+                # that removes the block should this process die
+                self.shared_board = SharedBoard()
+                self.pool = multiprocessing.Pool(self.workers, initializer=_warm_worker)
+        return self.pool
+
+    def close(self):
+        super().close()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+            self.stale.clear()
+        if self.shared_board is not None:
+            self.shared_board.close()
+            self.shared_board = None
+
+    def _rollouts(self, board: Board, name: str, moves: List[Tuple[int, int]], deadline: Deadline):
+        """
+        :return: (move, value) of rollouts as they finish, the moves taking
+            turns with the same seeds
+        """
+        seed = self.rng.getrandbits(32)
+        rounds = itertools.count()
+        pool = self._pool()
+        if pool is None:
+            for round_number in rounds:
+                for move in moves:
+                    if deadline.expired():
+                        return
+                    yield move, rollout(board, name, move, seed + round_number, self.horizon)
+
+        # Rollouts cannot be cancelled. Those left running at the last
+        # deadline have had the round trip to finish and are waited for
+        # before the shared board is overwritten.
+        while self.stale:
+            self.stale.popleft().wait(STALE_ROLLOUT_TIMEOUT)
+        block_name, tick = self.shared_board.write(board)
+        tasks = (
+            (block_name, tick, name, move, seed + round_number, self.horizon)
+            for round_number in rounds
+            for move in moves
+        )
+        pending = self.stale
+        while True:
+            while len(pending) < self.workers:
+                pending.append(pool.apply_async(_rollout_task, (next(tasks),)))
+            result = pending[0]
+            result.wait(max(deadline.remaining, 0))
+            if not result.ready():
+                return
+            pending.popleft()
+            yield result.get()
+
+    def refine(
+        self, board_bot: GameObject, board: Board, deadline: Deadline
+    ) -> Iterator[Tuple[int, int]]:
+        self.ticks += 1
+        position = board_bot.position
+        moves = [move for move in DIRECTIONS if board.is_valid_move(position, *move)]
+        totals = {move: 0.0 for move in moves}
+        counts = {move: 0 for move in moves}
+        started = time.perf_counter()
+        try:
+            for done, (move, value) in enumerate(
+                self._rollouts(board, board_bot.properties.name, moves, deadline), 1
+            ):
+                totals[move] += value
+                counts[move] += 1
+                self.rollouts += 1
+                if done % len(moves) == 0:
+                    # The fallback's move unless another did strictly better
+                    best = max(moves, key=lambda m: (totals[m], m == self.fallback_move))
+                    yield best
+        finally:
+            self.rollout_seconds += time.perf_counter() - started
+            if self.ticks % REPORT_EVERY_TICKS == 0:
+                logger.info(
+                    "%d rollouts in %.1f s, %.0f rollouts/s on %d workers",
+                    self.rollouts,
+                    self.rollout_seconds,
+                    self.rollouts_per_second,
+                    self.workers,
+                )
@@ -0,0 +1,280 @@
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from game.distance import DistanceTable, distance_table, link
+from game.logic.anytime import AnytimeLogic, Deadline
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.util import get_direction, position_equals
+
+DEFAULT_INVENTORY_SIZE = 5
+DEFAULT_MOVE_DELAY_MS = 100
+
+# Search effort per tick. The defaults finish the whole search in a
+# millisecond or two on the usual boards, so the deadline only cuts in on
+# large ones.
+TOUR_BEAM_WIDTH = 64
+TOUR_MAX_CANDIDATES = 24
+# Parents expanded between two looks at the deadline
+TOUR_EXPANSION_CHUNK = 16
+# Moves kept in reserve when checking that a tour ends before the game does
+TOUR_SAFETY_MARGIN_MOVES = 3
+
+
+class Tour:
+    """
+    A plan: the diamonds to pick up in order, then the way back to base
+    """
+
+    __slots__ = ("stops", "points", "moves", "value")
+
+    def __init__(self, stops: List[Position], points: int, moves: int, value: float):
+        self.stops = stops
+        self.points = points
+        self.moves = moves
+        self.value = value
+
+
+class TourPlanner(AnytimeLogic):
+    """
+    Plans collection tours of several diamonds ending at the base, instead of
+    choosing one diamond at a time. A tour is worth the diamonds it brings
+    home, held ones included, per move it takes, so going home early is just
+    the tour without stops.
+
+    The search is a beam search over the nearest diamonds, with teleporter
+    aware distances: each level extends the best partial tours by one more
+    diamond that still fits the inventory and still gets home in time, and
+    every better tour found is offered as a move, until the deadline. The
+    previous tick's plan is scored first, so a short deadline keeps
+    following it instead of changing its mind; until a tour is found, the
+    fallback logic's move stands.
+
+    Opponents and the diamond button are not planned around.
+    """
+
+    def __init__(
+        self,
+        budget_ms: Optional[float] = None,
+        beam_width: int = TOUR_BEAM_WIDTH,
+        max_candidates: int = TOUR_MAX_CANDIDATES,
+        fallback: Optional[BaseLogic] = None,
+    ):
+        """
+        :param budget_ms: fixed search time per tick, see AnytimeLogic
+        :param beam_width: partial tours kept per level
+        :param max_candidates: nearest diamonds considered, at most 62
+        """
+        super().__init__(fallback, budget_ms)
+        self.beam_width = beam_width
+        self.max_candidates = min(max_candidates, 62)
+        self.plan: List[Position] = []
+        # Levels of the search completed last tick
+        self.levels_searched = 0
+
+    def _distance_table(self, board: Board) -> DistanceTable:
+        links = []
+        seen = set()
+        for teleporter in board.teleporters:
+            pair_id = teleporter.properties.pair_id if teleporter.properties else None
+            if teleporter.id in seen or pair_id is None:
+                continue
+            # Pair ids come as strings while object ids are numbers
+            pair = board.get_object(int(pair_id)) if str(pair_id).isdigit() else None
+            if pair is None or pair.type != teleporter.type:
+                continue
+            seen.update((teleporter.id, pair.id))
+            # Both ways, but not from either end: a bot standing on a
+            # teleporter has to step off before it can take it
+            ends = (teleporter.position, pair.position)
+            links.append(link(teleporter.position, pair.position, ends))
+            links.append(link(pair.position, teleporter.position, ends))
+        return distance_table(board.width, board.height, tuple(links))
+
+    def _score_plan(
+        self,
+        plan: List[Position],
+        start: Position,
+        base: Position,
+        board: Board,
+        distances: DistanceTable,
+        held: int,
+        room: int,
+        max_moves: float,
+    ) -> Optional[Tour]:
+        """
+        :return: the previous plan, cut to the diamonds still on the board,
+            None when nothing of it is left or it no longer fits
+        """
+        points_at = {(d.position.x, d.position.y): d.properties.points for d in board.diamonds}
+        stops = [p for p in plan if (p.x, p.y) in points_at]
+        if not stops:
+            return None
+        points = sum(points_at[(p.x, p.y)] for p in stops)
+        if points > room:
+            return None
+        moves = 0
+        here = start
+        for stop in stops + [base]:
+            moves += distances.distance(here, stop)
+            here = stop
+        if moves > max_moves:
+            return None
+        return Tour(stops, points, moves, (held + points) / max(moves, 1))
+
+    def _tours(
+        self,
+        start: Position,
+        base: Position,
+        diamonds: List[GameObject],
+        distances: DistanceTable,
+        held: int,
+        room: int,
+        max_moves: float,
+        best: Tour,
+        deadline: Deadline,
+    ) -> Iterator[Tour]:
+        """
+        Beam search over tours of the nearest diamonds that fit in room
+        :return: every tour better than best and the ones before it
+        """
+        positions = np.array([(d.position.x, d.position.y) for d in diamonds], dtype=np.int16)
+        points = np.array([d.properties.points for d in diamonds], dtype=np.int64)
+        origin = np.array([(start.x, start.y), (base.x, base.y)], dtype=np.int16)
+        from_origin, _ = distances.between(origin, positions)
+        from_start = from_origin[0].astype(np.int64)
+        fits = points <= room
+        if not fits.any():
+            return
+
+        candidates = np.flatnonzero(fits)
+        if len(candidates) > self.max_candidates:
+            nearest = np.argsort(from_start[candidates], kind="stable")[: self.max_candidates]
+            candidates = np.sort(candidates[nearest])
+        positions, points = positions[candidates], points[candidates]
+        from_start = from_start[candidates]
+        to_base, _ = distances.between(positions, origin[1:])
+        to_base = to_base[:, 0].astype(np.int64)
+        between, _ = distances.between(positions, positions)
+        between = between.astype(np.int64)
+        count = len(candidates)
+        bits = np.left_shift(np.int64(1), np.arange(count, dtype=np.int64))
+
+        # The beam: per partial tour its last stop, moves so far, points,
+        # visited set as bits, and the stops in order
+        last = np.full(1, -1, dtype=np.int64)
+        moves = np.zeros(1, dtype=np.int64)
+        gained = np.zeros(1, dtype=np.int64)
+        visited = np.zeros(1, dtype=np.int64)
+        paths = np.zeros((1, 0), dtype=np.int64)
+
+        self.levels_searched = 0
+        while len(last):
+            children = []
+            for chunk in range(0, len(last), TOUR_EXPANSION_CHUNK):
+                if deadline.expired():
+                    break
+                rows = slice(chunk, chunk + TOUR_EXPANSION_CHUNK)
+                legs = np.where(last[rows, None] < 0, from_start[None, :], between[last[rows]])
+                child_moves = moves[rows, None] + legs
+                child_points = gained[rows, None] + points[None, :]
+                valid = (
+                    ((visited[rows, None] & bits[None, :]) == 0)
+                    & (child_points <= room)
+                    & (child_moves + to_base[None, :] <= max_moves)
+                )
+                parent, stop = np.nonzero(valid)
+                children.append(
+                    (parent + chunk, stop, child_moves[parent, stop], child_points[parent, stop])
+                )
+            if not children:
+                break
+            parent = np.concatenate([c[0] for c in children])
+            stop = np.concatenate([c[1] for c in children])
+            if not len(stop):
+                break
+            child_moves = np.concatenate([c[2] for c in children])
+            child_points = np.concatenate([c[3] for c in children])
+            child_visited = visited[parent] | bits[stop]
+            total = child_moves + to_base[stop]
+            value = (held + child_points) / np.maximum(total, 1)
+
+            # The same diamonds ending on the same one: only the shortest
+            # way there can lead to the best tour
+            order = np.lexsort((np.arange(len(stop)), child_moves, stop, child_visited))
+            keep = np.ones(len(order), dtype=bool)
+            keep[1:] = (child_visited[order][1:] != child_visited[order][:-1]) | (
+                stop[order][1:] != stop[order][:-1]
+            )
+            unique = order[keep]
+            # Best value first, fewer moves then generation order on ties
+            ranked = unique[np.lexsort((unique, total[unique], -value[unique]))]
+
+            self.levels_searched += 1
+            top = ranked[0]
+            if value[top] > best.value:
+                path = list(paths[parent[top]]) + [stop[top]]
+                best = Tour(
+                    [diamonds[candidates[i]].position for i in path],
+                    int(child_points[top]),
+                    int(total[top]),
+                    float(value[top]),
+                )
+                yield best
+            if deadline.expired():
+                return
+
+            beam = ranked[: self.beam_width]
+            last = stop[beam]
+            moves = child_moves[beam]
+            gained = child_points[beam]
+            visited = child_visited[beam]
+            paths = np.concatenate([paths[parent[beam]], stop[beam, None]], axis=1)
+
+    def refine(
+        self, board_bot: GameObject, board: Board, deadline: Deadline
+    ) -> Iterator[Tuple[int, int]]:
+        self.levels_searched = 0
+        props = board_bot.properties
+        position = board_bot.position
+        base = props.base
+        inventory_size = props.inventory_size if props.inventory_size is not None else DEFAULT_INVENTORY_SIZE
+        held = props.diamonds or 0
+        room = inventory_size - held
+        delay = board.minimum_delay_between_moves or DEFAULT_MOVE_DELAY_MS
+        if props.milliseconds_left is not None:
+            max_moves = props.milliseconds_left / delay - TOUR_SAFETY_MARGIN_MOVES
+        else:
+            max_moves = float("inf")
+
+        distances = self._distance_table(board)
+        home = distances.distance(position, base)
+        best = Tour([], 0, home, held / max(home, 1))
+        previous, self.plan = self.plan, []
+        if room > 0:
+            kept = self._score_plan(previous, position, base, board, distances, held, room, max_moves)
+            if kept is not None and kept.value >= best.value:
+                best = kept
+                yield from self._follow(best, position, base, distances)
+            if board.diamonds:
+                for best in self._tours(
+                    position, base, board.diamonds, distances, held, room, max_moves, best, deadline
+                ):
+                    yield from self._follow(best, position, base, distances)
+        # Heading home is only better than the fallback's move once the
+        # search has ruled every tour out, not when it was cut short
+        if not best.stops and held and not deadline.expired():
+            yield from self._follow(best, position, base, distances)
+
+    def _follow(
+        self, tour: Tour, position: Position, base: Position, distances: DistanceTable
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Make tour the plan and yield its first move, none when already there
+        """
+        self.plan = tour.stops
+        target = tour.stops[0] if tour.stops else base
+        if not position_equals(position, target):
+            waypoint = distances.waypoint(position, target)
+            yield get_direction(position.x, position.y, waypoint.x, waypoint.y)
@@ -1,8 +1,10 @@
 import random
 from typing import Optional, Tuple, List, Dict, cast
 
+from game.distance import DistanceTable, Link, distance_table, link
 from game.logic.base import BaseLogic
 from game.models import GameObject, Board, Position, Properties #
+from game.spatial import GridIndex, rect_distance
 from game.util import get_direction #
 
 DEFAULT_TIME_PER_STEP_MS = 1000
@@ -28,6 +30,8 @@ class Dlogic(BaseLogic): #
     TACKLE_MODE_MAX_DIST_TO_OPPONENT = 7 #
     RESET_BUTTON_MAX_DIST_PREFERENCE = 5 #
     SAFE_TIME_BUFFER_STEPS = 3 #
+    SPATIAL_INDEX_MIN_BOTS = 8
+    SPATIAL_INDEX_MIN_DIAMONDS = 64
 
 
     def __init__(self): #
@@ -61,8 +65,8 @@ class Dlogic(BaseLogic): #
         if not board.game_objects: return None
         teleporters = [
             obj.position
-            for obj in board.game_objects
-            if obj.type == self._TELEPORTER_TYPE_NAME and obj.position is not None
+            for obj in board.objects_of_type(self._TELEPORTER_TYPE_NAME)
+            if obj.position is not None
         ]
         if len(teleporters) == 2:
             pos1, pos2 = teleporters[0], teleporters[1]
@@ -71,38 +75,22 @@ class Dlogic(BaseLogic): #
             return pos2, pos1
         return None
 
+    def _distance_table(self, board: Board, tp_pair: Optional[Tuple[Position, Position]]) -> DistanceTable: #
+        links: Tuple[Link, ...] = ()
+        if tp_pair: #
+            tp1_pos, tp2_pos = tp_pair
+            # Both ways, but not from the teleporter a hop would land on
+            links = (link(tp1_pos, tp2_pos, (tp2_pos,)), link(tp2_pos, tp1_pos, (tp1_pos,)))
+        return distance_table(board.width, board.height, links)
+
     def _calculate_effective_distance_and_immediate_target( #
         self,
         start_pos: Position,
         end_pos: Position,
-        tp_pair: Optional[Tuple[Position, Position]],
+        distances: DistanceTable,
     ) -> Tuple[float, Position]:
-        dist_direct = self._manhattan_distance(start_pos, end_pos) #
-        best_dist = dist_direct #
-        immediate_target = end_pos #
-
-        if tp_pair: #
-            tp1_pos, tp2_pos = tp_pair
-            
-            # Via TP1 -> TP2
-            if not self._position_equals(start_pos, tp2_pos): #
-                dist_to_tp1 = self._manhattan_distance(start_pos, tp1_pos) #
-                dist_from_tp2_to_end = self._manhattan_distance(tp2_pos, end_pos) #
-                dist_via_tp1 = dist_to_tp1 + 1 + dist_from_tp2_to_end #
-                if dist_via_tp1 < best_dist: #
-                    best_dist = dist_via_tp1 #
-                    immediate_target = tp1_pos #
-
-            # Via TP2 -> TP1
-            if not self._position_equals(start_pos, tp1_pos): #
-                dist_to_tp2 = self._manhattan_distance(start_pos, tp2_pos) #
-                dist_from_tp1_to_end = self._manhattan_distance(tp1_pos, end_pos) #
-                dist_via_tp2 = dist_to_tp2 + 1 + dist_from_tp1_to_end #
-                if dist_via_tp2 < best_dist: #
-                    best_dist = dist_via_tp2 #
-                    immediate_target = tp2_pos #
-        
-        return best_dist, immediate_target
+        best_dist, tp_link = distances.route(start_pos, end_pos) #
+        return float(best_dist), (tp_link.entry if tp_link else end_pos)
 
     def _get_roaming_move(self, current_pos: Position, board_width: int, board_height: int, preferred_target: Optional[Position] = None) -> Tuple[int, int]: #
         # Jika ada preferred_target (misal, menjauh dari lawan), coba ke sana dulu
@@ -145,7 +133,7 @@ class Dlogic(BaseLogic): #
 
     def _evaluate_diamond( #
         self, current_pos: Position, diamond_obj: GameObject, base_pos: Optional[Position],
-        milliseconds_left: float, tp_pair: Optional[Tuple[Position, Position]],
+        milliseconds_left: float, distances: DistanceTable,
         target_radius_from_base_min: Optional[int] = None, # BARU: parameter radius
         target_radius_from_base_max: Optional[int] = None  # BARU: parameter radius
     ) -> Optional[Dict[str, any]]:
@@ -163,7 +151,7 @@ class Dlogic(BaseLogic): #
         diamond_score = getattr(diamond_obj.properties, 'points', 1) #
 
         dist_to_diamond, immediate_target_to_diamond = self._calculate_effective_distance_and_immediate_target( #
-            current_pos, diamond_pos, tp_pair
+            current_pos, diamond_pos, distances
         )
 
         if dist_to_diamond == float('inf') or self._position_equals(current_pos, diamond_pos): #
@@ -179,7 +167,7 @@ class Dlogic(BaseLogic): #
         
         if base_pos: #
             dist_diamond_to_base, _ = self._calculate_effective_distance_and_immediate_target( #
-                diamond_pos, base_pos, tp_pair
+                diamond_pos, base_pos, distances
             )
             if dist_diamond_to_base == float('inf'): #
                 return None 
@@ -199,15 +187,26 @@ class Dlogic(BaseLogic): #
 
     def _find_best_diamond_objective( #
         self, current_pos: Position, diamonds: List[GameObject], base_pos: Optional[Position],
-        milliseconds_left: float, tp_pair: Optional[Tuple[Position, Position]],
+        milliseconds_left: float, distances: DistanceTable,
         radius_min: Optional[int] = None, # BARU
-        radius_max: Optional[int] = None  # BARU
+        radius_max: Optional[int] = None,  # BARU
+        diamond_index: Optional[GridIndex] = None
     ) -> Optional[Dict[str, any]]:
-        
+        # diamond_index holds the positions of diamonds, and is only passed
+        # when distances has no teleporter links, as both prunings rely on
+        # Manhattan distance
+        if diamond_index is not None:
+            if base_pos and radius_min is not None and radius_max is not None:
+                diamonds = [diamonds[i] for i in diamond_index.within(base_pos, radius_max)]
+            else:
+                return self._find_best_diamond_objective_pruned(
+                    current_pos, diamonds, base_pos, milliseconds_left, distances, diamond_index
+                )
+
         evaluated_candidates: List[Dict[str, any]] = [] #
         for d_obj in diamonds: #
             candidate_info = self._evaluate_diamond( #
-                current_pos, d_obj, base_pos, milliseconds_left, tp_pair,
+                current_pos, d_obj, base_pos, milliseconds_left, distances,
                 target_radius_from_base_min=radius_min, # Teruskan parameter radius
                 target_radius_from_base_max=radius_max
             )
@@ -223,9 +222,62 @@ class Dlogic(BaseLogic): #
         ))
         return evaluated_candidates[0] #
 
+    def _find_best_diamond_objective_pruned(
+        self, current_pos: Position, diamonds: List[GameObject], base_pos: Optional[Position],
+        milliseconds_left: float, distances: DistanceTable, diamond_index: GridIndex
+    ) -> Optional[Dict[str, any]]:
+        """Branch and bound over the grid: a bucket whose nearest cell is
+        already further than the best trip found cannot hold the best."""
+        def trip_bound(x0, y0, x1, y1):
+            bound = rect_distance(current_pos, x0, y0, x1, y1)
+            return bound + rect_distance(base_pos, x0, y0, x1, y1) if base_pos else bound
+
+        def sort_key(index_and_info):
+            index, info = index_and_info
+            return (
+                info["total_trip_estimate_dist"] if base_pos else info["eff_dist_to_diamond"],
+                -info["diamond_score"],
+                info["eff_dist_to_diamond"],
+                index,
+            )
+
+        # _evaluate_diamond turns down trips that take too long; once the
+        # bound does, so does every bucket after it
+        if base_pos:
+            too_far = (milliseconds_left - self.time_per_step_ms * 2) / self.time_per_step_ms
+        else:
+            too_far = (milliseconds_left - self.time_per_step_ms * self.SAFE_TIME_BUFFER_STEPS) / self.time_per_step_ms
+
+        evaluated_candidates: List[Tuple[int, Dict[str, any]]] = []
+        best_trip = float('inf')
+        for bound, bucket in diamond_index.best_first(trip_bound):
+            if bound > best_trip or bound >= too_far:
+                break
+            for index in bucket:
+                candidate_info = self._evaluate_diamond(
+                    current_pos, diamonds[index], base_pos, milliseconds_left, distances
+                )
+                if candidate_info:
+                    evaluated_candidates.append((index, candidate_info))
+                    trip = candidate_info["total_trip_estimate_dist"] if base_pos else candidate_info["eff_dist_to_diamond"]
+                    if trip < best_trip:
+                        best_trip = trip
+
+        if not evaluated_candidates: return None
+        return min(evaluated_candidates, key=sort_key)[1]
+
+    def _bots_near(
+        self, board_bots: List[GameObject], bot_index: Optional[GridIndex], position: Position, radius: int
+    ) -> List[GameObject]:
+        """Bots at most radius steps away, in board order. Without an index,
+        e.g. when distances has teleporter links, every bot."""
+        if bot_index is None:
+            return board_bots
+        return [board_bots[i] for i in bot_index.within(position, radius)]
+
     def _find_threatening_opponent( # BARU: Fungsi untuk mencari lawan yang mengancam
         self, current_pos: Position, board_bots: List[GameObject],
-        tp_pair: Optional[Tuple[Position, Position]], detection_radius: int
+        distances: DistanceTable, detection_radius: int
     ) -> Optional[Position]: # Mengembalikan posisi target untuk menghindar (menjauh)
         
         closest_threat_dist = float('inf')
@@ -237,7 +289,7 @@ class Dlogic(BaseLogic): #
             
             opponent_actual_pos = cast(Position, bot_obj.position)
             eff_dist, _ = self._calculate_effective_distance_and_immediate_target( #
-                current_pos, opponent_actual_pos, tp_pair
+                current_pos, opponent_actual_pos, distances
             )
             if eff_dist < detection_radius and eff_dist < closest_threat_dist :
                 closest_threat_dist = eff_dist
@@ -264,7 +316,7 @@ class Dlogic(BaseLogic): #
 
     def _find_closest_opponent_with_diamonds( #
         self, current_pos: Position, board_bots: List[GameObject],
-        tp_pair: Optional[Tuple[Position, Position]]
+        distances: DistanceTable
     ) -> Optional[Dict[str, any]]:
         
         best_opponent_info: Optional[Dict[str, any]] = None
@@ -278,7 +330,7 @@ class Dlogic(BaseLogic): #
             opponent_pos = cast(Position, bot_obj.position) # Pasti ada karena cek di atas
             if opponent_diamonds > 0 : #
                 eff_dist, immediate_target = self._calculate_effective_distance_and_immediate_target( #
-                    current_pos, opponent_pos, tp_pair
+                    current_pos, opponent_pos, distances
                 )
                 if eff_dist < min_dist_to_opponent: #
                     min_dist_to_opponent = eff_dist #
@@ -314,15 +366,23 @@ class Dlogic(BaseLogic): #
         self.time_per_step_ms = board.minimum_delay_between_moves if board.minimum_delay_between_moves is not None and board.minimum_delay_between_moves > 0 else DEFAULT_TIME_PER_STEP_MS #
         
         tp_pair = self._get_teleporter_pair_positions(board) #
+        distances = self._distance_table(board, tp_pair) #
         red_button_pos: Optional[Position] = None #
-        if board.game_objects: #
-            for obj in board.game_objects: #
-                if obj.type == self._RED_BUTTON_TYPE_NAME and obj.position: #
-                    red_button_pos = obj.position #
-                    break
+        for obj in board.objects_of_type(self._RED_BUTTON_TYPE_NAME): #
+            if obj.position: #
+                red_button_pos = obj.position #
+                break
         
         all_diamonds = board.diamonds if board.diamonds else [] #
         board_bots_list = board.bots if board.bots else [] #
+        # Grid indexes prune the scans on crowded boards, on small ones they
+        # cost more than they save
+        bot_index = diamond_index = None
+        if not distances.links:
+            if len(board_bots_list) >= self.SPATIAL_INDEX_MIN_BOTS:
+                bot_index = GridIndex([b.position for b in board_bots_list])
+            if len(all_diamonds) >= self.SPATIAL_INDEX_MIN_DIAMONDS:
+                diamond_index = GridIndex([d.position for d in all_diamonds])
 
         self.goal_position = None #
         is_full = current_diamonds >= inventory_size #
@@ -337,7 +397,9 @@ class Dlogic(BaseLogic): #
         if in_avoid_and_safe_diamond_mode:
             # 1. Cek lawan yang mengancam untuk dihindari
             threatening_opponent_actual_pos = self._find_threatening_opponent(
-                current_pos, board_bots_list, tp_pair, self.STRATEGY_AVOID_OPPONENT_RADIUS
+                current_pos,
+                self._bots_near(board_bots_list, bot_index, current_pos, self.STRATEGY_AVOID_OPPONENT_RADIUS - 1),
+                distances, self.STRATEGY_AVOID_OPPONENT_RADIUS
             )
             if threatening_opponent_actual_pos:
                 # Cari cell terbaik untuk menjauh
@@ -351,9 +413,10 @@ class Dlogic(BaseLogic): #
             # 2. Jika tidak ada ancaman langsung atau tidak bisa menghindar, cari diamond dekat base
             if self.goal_position is None and base_pos:
                 best_safe_diamond = self._find_best_diamond_objective(
-                    current_pos, all_diamonds, base_pos, milliseconds_left, tp_pair,
+                    current_pos, all_diamonds, base_pos, milliseconds_left, distances,
                     radius_min=self.STRATEGY_SAFE_DIAMOND_RADIUS_MIN,
-                    radius_max=self.STRATEGY_SAFE_DIAMOND_RADIUS_MAX
+                    radius_max=self.STRATEGY_SAFE_DIAMOND_RADIUS_MAX,
+                    diamond_index=diamond_index
                 )
                 if best_safe_diamond:
                     self.goal_position = best_safe_diamond["immediate_target"]
@@ -361,7 +424,7 @@ class Dlogic(BaseLogic): #
             # 3. Jika tidak ada diamond aman & masih dalam mode ini & bawa diamond, pulang ke base
             if self.goal_position is None and current_diamonds > 0 and base_pos and not self._position_equals(current_pos, base_pos):
                  _, immediate_target_to_base = self._calculate_effective_distance_and_immediate_target( #
-                    current_pos, base_pos, tp_pair
+                    current_pos, base_pos, distances
                 )
                  self.goal_position = immediate_target_to_base
 
@@ -371,7 +434,7 @@ class Dlogic(BaseLogic): #
             # PRIORITAS 1: Kembali ke base jika penuh atau waktu kritis (setelah strategi baru)
             if base_pos: #
                 dist_to_base, immediate_target_to_base = self._calculate_effective_distance_and_immediate_target( #
-                    current_pos, base_pos, tp_pair
+                    current_pos, base_pos, distances
                 )
                 # Menggunakan CRITICAL_TIME_RETURN_TO_BASE_SECONDS yang sudah disesuaikan
                 time_to_return_ms = (dist_to_base * self.time_per_step_ms) + (self.time_per_step_ms * self.SAFE_TIME_BUFFER_STEPS) #
@@ -389,14 +452,18 @@ class Dlogic(BaseLogic): #
             # PRIORITAS 2: Strategi lain jika tidak pulang (setelah strategi baru)
             if self.goal_position is None: #
                 best_diamond_obj_general = self._find_best_diamond_objective( #
-                    current_pos, all_diamonds, base_pos, milliseconds_left, tp_pair
+                    current_pos, all_diamonds, base_pos, milliseconds_left, distances,
+                    diamond_index=diamond_index
                 ) # Tanpa filter radius
                 dist_to_closest_diamond_general = best_diamond_obj_general["eff_dist_to_diamond"] if best_diamond_obj_general else float('inf') #
 
                 # 2a. Mode Tackle
                 if current_diamonds == 0: #
+                    # Only an opponent within the tackle distance is chased
                     opponent_info = self._find_closest_opponent_with_diamonds( #
-                        current_pos, board_bots_list, tp_pair
+                        current_pos,
+                        self._bots_near(board_bots_list, bot_index, current_pos, self.TACKLE_MODE_MAX_DIST_TO_OPPONENT),
+                        distances
                     )
                     if opponent_info and opponent_info["eff_dist"] < dist_to_closest_diamond_general and \
                        opponent_info["eff_dist"] <= self.TACKLE_MODE_MAX_DIST_TO_OPPONENT: #
@@ -405,7 +472,7 @@ class Dlogic(BaseLogic): #
                 # 2b. Mode Reset Button
                 if self.goal_position is None and red_button_pos: #
                     dist_to_rb, immediate_target_to_rb = self._calculate_effective_distance_and_immediate_target( #
-                        current_pos, red_button_pos, tp_pair
+                        current_pos, red_button_pos, distances
                     )
                     if dist_to_rb < dist_to_closest_diamond_general and dist_to_rb <= self.RESET_BUTTON_MAX_DIST_PREFERENCE: #
                         time_to_reach_rb_ms = dist_to_rb * self.time_per_step_ms + self.time_per_step_ms #
@@ -424,7 +491,7 @@ class Dlogic(BaseLogic): #
                         self.goal_position = immediate_target_to_base
                     else: # Hitung ulang jika belum ada (seharusnya jarang terjadi)
                         _, immediate_target_to_base_fallback = self._calculate_effective_distance_and_immediate_target( #
-                            current_pos, base_pos, tp_pair)
+                            current_pos, base_pos, distances)
                         self.goal_position = immediate_target_to_base_fallback #
 
         # --- Penentuan Gerakan Akhir ---
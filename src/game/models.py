@@ -1,26 +1,62 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
-from colorama import Fore, Style
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from game.log import get_logger
 
+logger = get_logger("board")
 
-@dataclass
+BOT_TYPE = "BotGameObject"
+BASE_TYPE = "BaseGameObject"
+DIAMOND_TYPE = "DiamondGameObject"
+TELEPORTER_TYPE = "TeleportGameObject"
+DIAMOND_BUTTON_TYPE = "DiamondButtonGameObject"
+
+
+@dataclass(slots=True)
 class Bot:
     name: str
     email: str
     id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     y: int
     x: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Base(Position): ...
 
 
-@dataclass
+class PackedPosition(NamedTuple):
+    """
+    Immutable position stored as a plain tuple. Reads like Position through
+    .x and .y, and equal positions share one interned instance.
+    """
+
+    y: int
+    x: int
+
+
+_interned_positions: Dict[Tuple[int, int], PackedPosition] = {}
+
+
+def intern_position(x: int, y: int) -> PackedPosition:
+    position = _interned_positions.get((x, y))
+    if position is None:
+        position = _interned_positions.setdefault((x, y), PackedPosition(y, x))
+    return position
+
+
+def packed_position(data: dict) -> PackedPosition:
+    return intern_position(data["x"], data["y"])
+
+
+# Decoder overrides replacing every Position and Base with interned tuples
+COMPACT_POSITIONS = ((Position, packed_position), (Base, packed_position))
+
+
+@dataclass(slots=True)
 class Properties:
     points: Optional[int] = None
     pair_id: Optional[str] = None
@@ -34,7 +70,7 @@ class Properties:
     base: Optional[Base] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GameObject:
     id: int
     position: Position
@@ -42,7 +78,7 @@ class GameObject:
     properties: Optional[Properties] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     generation_ratio: Optional[float] = None
     min_ratio_for_generation: Optional[float] = None
@@ -53,13 +89,13 @@ class Config:
     can_tackle: Optional[bool] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Feature:
     name: str
     config: Optional[Config] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Board:
     id: int
     width: int
@@ -67,50 +103,79 @@ class Board:
     features: List[Feature]
     minimum_delay_between_moves: int
     game_objects: Optional[List[GameObject]]
+    # Lookup tables built once from game_objects when the board is created.
+    # They have no defaults so dacite leaves them alone after __post_init__.
+    _by_type: Dict[str, List[GameObject]] = field(init=False, repr=False, compare=False)
+    _by_id: Dict[int, GameObject] = field(init=False, repr=False, compare=False)
+    _bots_by_name: Dict[str, GameObject] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        self.reindex()
+
+    def reindex(self):
+        """
+        Rebuild the lookup tables, needed after game_objects is changed in place
+        """
+        self._by_type = {}
+        self._by_id = {}
+        self._bots_by_name = {}
+        for game_object in self.game_objects or []:
+            objects = self._by_type.get(game_object.type)
+            if objects is None:
+                objects = self._by_type[game_object.type] = []
+            objects.append(game_object)
+            self._by_id.setdefault(game_object.id, game_object)
+            if game_object.type == BOT_TYPE and game_object.properties:
+                self._bots_by_name.setdefault(game_object.properties.name, game_object)
+
+    def objects_of_type(self, type_name: str) -> List[GameObject]:
+        """
+        Game objects of one type, in board order. The list is shared, do not
+        modify it.
+        """
+        return self._by_type.get(type_name, [])
 
     @property
     def bots(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "BotGameObject"]
+        return self.objects_of_type(BOT_TYPE)
 
     @property
     def diamonds(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "DiamondGameObject"]
+        return self.objects_of_type(DIAMOND_TYPE)
+
+    @property
+    def teleporters(self) -> List[GameObject]:
+        return self.objects_of_type(TELEPORTER_TYPE)
+
+    @property
+    def diamond_buttons(self) -> List[GameObject]:
+        return self.objects_of_type(DIAMOND_BUTTON_TYPE)
+
+    def get_object(self, object_id) -> Optional[GameObject]:
+        return self._by_id.get(object_id)
 
     def get_bot(self, bot: Bot) -> Optional[GameObject]:
-        for b in self.bots:
-            if b.properties.name == bot.name:
-                return b
-        return None
+        return self._bots_by_name.get(bot.name)
 
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
     ) -> bool:
         if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta values must be between -1 and 1 inclusive",
-            )
+            logger.debug("Invalid move: Delta values must be between -1 and 1 inclusive")
             return False
 
         if delta_x == delta_y:
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta_x and delta_y cannot be equal",
-            )
+            logger.debug("Invalid move: Delta_x and delta_y cannot be equal")
             return False
 
         if not (0 <= current_position.x + delta_x < self.width):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "X-coordinate out of bounds",
-            )
+            logger.debug("Invalid move: X-coordinate out of bounds")
             return False
 
         if not (0 <= current_position.y + delta_y < self.height):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Y-coordinate out of bounds",
-            )
+            logger.debug("Invalid move: Y-coordinate out of bounds")
             return False
 
         return True
@@ -0,0 +1,412 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from game.distance import DistanceTable
+from game.models import Board, GameObject, Position
+
+# Ticks of history kept per bot, and steps of it looked back on to infer
+# where a bot is heading: bots change their minds every few ticks
+HISTORY_LENGTH = 8
+LOOKBACK_STEPS = 2
+# Share of the steps looked back on that must have brought a bot closer to a
+# cell for it to count as heading there
+MIN_PROGRESS_RATIO = 0.5
+DEFAULT_BOT_CAPACITY = 16
+DEFAULT_DIAMOND_CAPACITY = 64
+# Ranks diamonds by progress first and distance second in one integer
+PROGRESS_WEIGHT = 1 << 16
+# Distance through a link a route may not take, in the int16 of the routes
+_UNREACHABLE = np.iinfo(np.int16).max // 2
+
+# Arrays with one row per bot, kept when the capacity grows
+_BOT_ARRAYS = (
+    "ids", "active", "positions", "inventory", "seen", "bases", "inventory_size", "targets", "has_target"
+)
+
+
+class OpponentModel:
+    """
+    Recent positions and inventory of every bot, in ring buffers of
+    HISTORY_LENGTH ticks, and the cell each bot seems to be heading for: its
+    base when its inventory is full, otherwise the diamond or base it closed
+    in on the most over its history, if it did on most steps.
+
+    Everything lives in arrays with one row per bot, allocated up front;
+    rows of bots that left are reused. update(), predict() and
+    arrival_times() work in place, so following a game only allocates when
+    more bots or diamonds show up than ever before.
+
+    Targets are inferred on Manhattan distances. Arrival times go through
+    the caller's DistanceTable, so they take teleporters into account.
+    """
+
+    def __init__(
+        self,
+        history: int = HISTORY_LENGTH,
+        lookback: int = LOOKBACK_STEPS,
+        bots: int = DEFAULT_BOT_CAPACITY,
+        diamonds: int = DEFAULT_DIAMOND_CAPACITY,
+    ):
+        self.history = history
+        self.lookback = min(lookback, history - 1)
+        self.rows: Dict[int, int] = {}
+        self.width = self.height = 0
+        self.board: Optional[Board] = None
+        self.ids = np.full(0, -1, dtype=np.int64)
+        self.positions = np.zeros((0, history, 2), dtype=np.int16)
+        self.inventory = np.zeros((0, history), dtype=np.int16)
+        self.seen = np.zeros(0, dtype=np.int64)
+        self.bases = np.zeros((0, 2), dtype=np.int16)
+        self.inventory_size = np.zeros(0, dtype=np.int16)
+        # Inferred on every update
+        self.targets = np.zeros((0, 2), dtype=np.int16)
+        self.has_target = np.zeros(0, dtype=bool)
+        self.active = np.zeros(0, dtype=bool)
+        self.diamond_positions = np.zeros((0, 2), dtype=np.int16)
+        self._grow_bots(bots)
+        self._grow_diamonds(diamonds)
+
+    ###########################################################################
+    #
+    # Storage
+    #
+    ###########################################################################
+    def _grow_bots(self, capacity: int):
+        for name in _BOT_ARRAYS:
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], -1 if name == "ids" else 0, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        # Scratch space
+        self._row_starts = np.arange(capacity, dtype=np.intp) * self.history
+        self._slots = np.zeros(capacity, dtype=np.intp)
+        self._flat_index = np.zeros(capacity, dtype=np.intp)
+        self._steps = np.zeros(capacity, dtype=np.int64)
+        self._current = np.zeros((capacity, 2), dtype=np.int16)
+        self._past = np.zeros((capacity, 2), dtype=np.int16)
+        self._previous = np.zeros((capacity, 2), dtype=np.int16)
+        # Where predict() walks each bot to: its target, or straight on
+        self._goals = np.zeros((capacity, 2), dtype=np.int16)
+        self._scratch = np.zeros(capacity, dtype=np.int64)
+        self._negative = np.zeros(capacity, dtype=np.int64)
+        self._base_progress = np.zeros(capacity, dtype=np.int64)
+        self._best = np.zeros(capacity, dtype=np.intp)
+        self._delta = np.zeros((capacity, 2), dtype=np.int64)
+        self._predicted = np.zeros((capacity, 2), dtype=np.int16)
+        self._grow_diamonds(len(self.diamond_positions))
+
+    def _grow_diamonds(self, capacity: int):
+        bots = len(self.ids)
+        old = self.diamond_positions
+        self.diamond_positions = np.zeros((capacity, 2), dtype=np.int16)
+        self.diamond_positions[: len(old)] = old
+        self._progress = np.zeros((bots, capacity), dtype=np.int64)
+        self._distance = np.zeros((bots, capacity), dtype=np.int64)
+        self._axis = np.zeros((bots, capacity), dtype=np.int64)
+        # arrival_times() fills one row per bot with one-dimensional
+        # operations: numpy buffers broadcasts and mixed dtypes internally.
+        # Routes are int16 like the distance tables they are read from.
+        self._arrival = np.zeros((bots, capacity), dtype=np.int16)
+        self._onward = np.zeros(capacity, dtype=np.int16)
+        self._detour = np.zeros(capacity, dtype=np.int16)
+        self._hop = np.zeros(capacity, dtype=np.int16)
+        self._offset_axis = np.zeros(capacity, dtype=np.int16)
+        self._on_the_way = np.zeros(capacity, dtype=bool)
+        self._blocked = np.zeros((2, capacity), dtype=bool)
+        self._point_cells = np.zeros(capacity, dtype=np.intp)
+        self._cell_index = np.zeros(capacity, dtype=np.intp)
+
+    def _row(self, bot_id: int) -> int:
+        row = self.rows.get(bot_id)
+        if row is None:
+            free = np.flatnonzero(self.ids < 0)
+            if not len(free):
+                self._grow_bots(len(self.ids) * 2)
+                free = np.flatnonzero(self.ids < 0)
+            row = int(free[0])
+            self.ids[row] = bot_id
+            self.seen[row] = 0
+            self.has_target[row] = False
+            self.rows[bot_id] = row
+        return row
+
+    def _latest(self, row: int) -> Position:
+        x, y = self.positions[row, (self.seen[row] - 1) % self.history]
+        return Position(x=int(x), y=int(y))
+
+    ###########################################################################
+    #
+    # Following the game
+    #
+    ###########################################################################
+    def update(self, board: Board):
+        """
+        Record every bot's position and inventory on this board and infer
+        their targets again. The same board again is ignored, so logics
+        playing on one board can share a model.
+        """
+        if board is self.board:
+            return
+        self.board = board
+        self.width, self.height = board.width, board.height
+        # Free the rows of bots that left first, for new bots to take
+        self.active[:] = False
+        for bot in board.bots:
+            row = self.rows.get(bot.id)
+            if row is not None:
+                self.active[row] = True
+        if len(self.rows) > np.count_nonzero(self.active):
+            for bot_id, row in list(self.rows.items()):
+                if not self.active[row]:
+                    del self.rows[bot_id]
+                    self.ids[row] = -1
+
+        for bot in board.bots:
+            row = self._row(bot.id)
+            props = bot.properties
+            slot = self.seen[row] % self.history
+            self.positions[row, slot, 0] = bot.position.x
+            self.positions[row, slot, 1] = bot.position.y
+            self.inventory[row, slot] = props.diamonds or 0
+            if props.base is not None:
+                self.bases[row, 0] = props.base.x
+                self.bases[row, 1] = props.base.y
+            self.inventory_size[row] = props.inventory_size or 0
+            self.seen[row] += 1
+            self.active[row] = True
+
+        diamonds = board.diamonds
+        if len(diamonds) > len(self.diamond_positions):
+            self._grow_diamonds(max(len(diamonds), 2 * len(self.diamond_positions)))
+        for index, diamond in enumerate(diamonds):
+            self.diamond_positions[index, 0] = diamond.position.x
+            self.diamond_positions[index, 1] = diamond.position.y
+        self._infer_targets(len(diamonds))
+
+    def _manhattan(self, a: np.ndarray, b: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Distances between rows of a and b, with broadcasting, into out
+        """
+        axis = self._axis if out.ndim == 2 else self._scratch
+        axis = axis[tuple(slice(0, n) for n in out.shape)]
+        np.subtract(a[..., 0], b[..., 0], out=out)
+        np.abs(out, out=out)
+        np.subtract(a[..., 1], b[..., 1], out=axis)
+        np.abs(axis, out=axis)
+        return np.add(out, axis, out=out)
+
+    def _infer_targets(self, count: int):
+        history, seen, steps, slots = self.history, self.seen, self._steps, self._slots
+        flat = self.positions.reshape(-1, 2)
+        # Steps looked back on, fewer while the history fills up
+        np.subtract(seen, 1, out=steps)
+        np.clip(steps, 0, self.lookback, out=steps)
+        np.subtract(seen, 1, out=slots, casting="unsafe")
+        np.remainder(slots, history, out=slots)
+        np.add(slots, self._row_starts, out=self._flat_index)
+        np.take(flat, self._flat_index, axis=0, out=self._current)
+        np.subtract(slots, 1, out=slots)
+        np.remainder(slots, history, out=slots)
+        np.add(slots, self._row_starts, out=self._flat_index)
+        np.take(flat, self._flat_index, axis=0, out=self._previous)
+        np.subtract(seen, 1, out=slots, casting="unsafe")
+        np.subtract(slots, steps, out=slots, casting="unsafe")
+        np.remainder(slots, history, out=slots)
+        np.add(slots, self._row_starts, out=self._flat_index)
+        np.take(flat, self._flat_index, axis=0, out=self._past)
+
+        base_progress = self._base_progress
+        self._manhattan(self._past, self.bases, base_progress)
+        np.subtract(base_progress, self._manhattan(self._current, self.bases, self._negative), out=base_progress)
+
+        progress, distance = self._progress[:, :count], self._distance[:, :count]
+        diamonds = self.diamond_positions[None, :count]
+        self._manhattan(self._past[:, None], diamonds, progress)
+        self._manhattan(self._current[:, None], diamonds, distance)
+        np.subtract(progress, distance, out=progress)
+        best = self._best
+        if count:
+            # Most progress first, then the nearest
+            ranked = self._axis[:, :count]
+            np.multiply(progress, PROGRESS_WEIGHT, out=ranked)
+            np.subtract(ranked, distance, out=ranked)
+            np.argmax(ranked, axis=1, out=best)
+
+        self.has_target[:] = False
+        for row in self.rows.values():
+            if not steps[row]:
+                continue
+            needed = max(1.0, steps[row] * MIN_PROGRESS_RATIO)
+            to_diamond = progress[row, best[row]] if count else -1
+            size = self.inventory_size[row]
+            full = size and self.inventory[row, (seen[row] - 1) % history] >= size
+            if full or needed <= base_progress[row] >= to_diamond:
+                self.targets[row] = self.bases[row]
+                self.has_target[row] = True
+            elif to_diamond >= needed:
+                self.targets[row] = self.diamond_positions[best[row]]
+                self.has_target[row] = True
+        self._infer_goals()
+
+    def _infer_goals(self):
+        """
+        Bots without a target are taken to keep going the way they last
+        moved, up to the edge of the board
+        """
+        goals, heading, moved = self._goals, self._delta, self._scratch
+        np.subtract(self._current, self._previous, out=heading)
+        np.sign(heading, out=heading)
+        np.minimum(self._steps, 1, out=moved)
+        np.multiply(heading, moved[:, None], out=heading)
+        np.multiply(heading, self.width + self.height, out=heading)
+        np.add(heading, self._current, out=heading)
+        np.clip(heading[:, 0], 0, max(self.width - 1, 0), out=heading[:, 0])
+        np.clip(heading[:, 1], 0, max(self.height - 1, 0), out=heading[:, 1])
+        np.copyto(goals, heading, casting="unsafe")
+        np.copyto(goals, self.targets, where=self.has_target[:, None])
+
+    ###########################################################################
+    #
+    # Predictions
+    #
+    ###########################################################################
+    def target(self, bot_id: int) -> Optional[Position]:
+        """
+        :return: where the bot seems to be heading, None when unclear
+        """
+        row = self.rows.get(bot_id)
+        if row is None or not self.has_target[row]:
+            return None
+        return Position(x=int(self.targets[row, 0]), y=int(self.targets[row, 1]))
+
+    def predict(self, ticks: int) -> np.ndarray:
+        """
+        Where every bot will be in a number of ticks, walking to its target
+        along x first, then y, like game.util.get_direction. Bots without a
+        target keep going the way they last moved.
+        :return: (capacity, 2) x, y, at the rows of self.rows; overwritten
+            by the next call
+        """
+        delta, left, negative = self._delta, self._scratch, self._negative
+        np.subtract(self._goals, self._current, out=delta)
+        np.clip(delta[:, 0], -ticks, ticks, out=delta[:, 0])
+        # Steps left for y after walking along x
+        np.abs(delta[:, 0], out=left)
+        np.subtract(ticks, left, out=left)
+        np.negative(left, out=negative)
+        np.minimum(delta[:, 1], left, out=delta[:, 1])
+        np.maximum(delta[:, 1], negative, out=delta[:, 1])
+        return np.add(self._current, delta, out=self._predicted, casting="unsafe")
+
+    def predicted_position(self, bot_id: int, ticks: int) -> Optional[Position]:
+        row = self.rows.get(bot_id)
+        if row is None:
+            return None
+        x, y = self.predict(ticks)[row]
+        return Position(x=int(x), y=int(y))
+
+    def arrival_time(self, bot: GameObject, position: Position, distances: DistanceTable) -> int:
+        """
+        :return: moves until the bot reaches position: straight there when
+            it is its target or it has none, else by way of its target
+        """
+        row = self.rows.get(bot.id)
+        if row is None or not self.has_target[row]:
+            return distances.distance(bot.position, position)
+        target = Position(x=int(self.targets[row, 0]), y=int(self.targets[row, 1]))
+        direct = distances.distance(bot.position, position)
+        to_target = distances.distance(bot.position, target)
+        # Cells on a shortest way to the target may be walked over
+        if direct + distances.distance(position, target) == to_target:
+            return direct
+        return to_target + distances.distance(target, position)
+
+    def _offset(self, points: np.ndarray, position: Position, out: np.ndarray) -> np.ndarray:
+        """
+        Manhattan distances from every row of int16 points to position, into out
+        """
+        axis = self._offset_axis[: len(out)]
+        np.subtract(points[:, 0], position.x, out=out)
+        np.abs(out, out=out)
+        np.subtract(points[:, 1], position.y, out=axis)
+        np.abs(axis, out=axis)
+        return np.add(out, axis, out=out)
+
+    def _routes_from(self, start: Position, points: np.ndarray, distances: DistanceTable, out: np.ndarray):
+        """
+        DistanceTable.distance from start to every row of points, into out:
+        read from the table when there is one, else the walk or the
+        shortest link start may take
+        """
+        if distances.links and distances.tabulated:
+            index = self._cell_index[: len(out)]
+            np.add(self._point_cells[: len(out)], distances.cell(start) * distances.cells, out=index)
+            return np.take(distances.distances, index, out=out, mode="clip")
+        self._offset(points, start, out)
+        hop = self._hop[: len(out)]
+        for link in distances.links:
+            if any(start.x == p.x and start.y == p.y for p in link.blocked):
+                continue
+            self._offset(points, link.exit, hop)
+            np.add(hop, abs(start.x - link.entry.x) + abs(start.y - link.entry.y) + 1, out=hop)
+            np.minimum(out, hop, out=out)
+        return out
+
+    def _routes_to(self, points: np.ndarray, end: Position, distances: DistanceTable, out: np.ndarray):
+        """
+        DistanceTable.distance from every row of points to end, into out
+        """
+        if distances.links and distances.tabulated:
+            index = self._cell_index[: len(out)]
+            np.multiply(self._point_cells[: len(out)], distances.cells, out=index)
+            np.add(index, distances.cell(end), out=index)
+            return np.take(distances.distances, index, out=out, mode="clip")
+        self._offset(points, end, out)
+        hop = self._hop[: len(out)]
+        blocked, blocked_y = self._blocked[0, : len(out)], self._blocked[1, : len(out)]
+        for link in distances.links:
+            self._offset(points, link.entry, hop)
+            np.add(hop, abs(link.exit.x - end.x) + abs(link.exit.y - end.y) + 1, out=hop)
+            for position in link.blocked:
+                np.equal(points[:, 0], position.x, out=blocked)
+                np.equal(points[:, 1], position.y, out=blocked_y)
+                np.logical_and(blocked, blocked_y, out=blocked)
+                np.copyto(hop, _UNREACHABLE, where=blocked)
+            np.minimum(out, hop, out=out)
+        return out
+
+    def arrival_times(self, bots: List[GameObject], positions: np.ndarray, distances: DistanceTable) -> np.ndarray:
+        """
+        arrival_time of every bot at every position
+        :param positions: (m, 2) int16 x, y
+        :return: (bots, m), overwritten by the next call
+        """
+        count, cells = len(bots), len(positions)
+        if count > len(self.ids):
+            self._grow_bots(max(count, 2 * len(self.ids)))
+        if cells > len(self.diamond_positions):
+            self._grow_diamonds(max(cells, 2 * len(self.diamond_positions)))
+        arrival = self._arrival[:count, :cells]
+        if distances.links and distances.tabulated:
+            point_cells, column = self._point_cells[:cells], self._cell_index[:cells]
+            np.copyto(point_cells, positions[:, 1])
+            np.multiply(point_cells, distances.width, out=point_cells)
+            np.copyto(column, positions[:, 0])
+            np.add(point_cells, column, out=point_cells)
+        onward, detour, on_the_way = self._onward[:cells], self._detour[:cells], self._on_the_way[:cells]
+        for index, bot in enumerate(bots):
+            times = self._routes_from(bot.position, positions, distances, arrival[index])
+            row = self.rows.get(bot.id)
+            if row is None or not self.has_target[row]:
+                continue
+            target = Position(x=int(self.targets[row, 0]), y=int(self.targets[row, 1]))
+            to_target = distances.distance(bot.position, target)
+            # Cells on a shortest way to the target may be walked over
+            self._routes_to(positions, target, distances, detour)
+            np.add(detour, times, out=detour)
+            np.not_equal(detour, to_target, out=on_the_way)
+            self._routes_from(target, positions, distances, onward)
+            np.add(onward, to_target, out=onward)
+            np.copyto(times, onward, where=on_the_way)
+        return arrival
@@ -0,0 +1,191 @@
+import gzip
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional
+
+from decode import decode_into
+from game.board_state import BoardState
+from game.log import get_logger
+from game.logic.base import BaseLogic
+from game.models import Board, Bot
+
+DEFAULT_MAX_PENDING = 4096
+DEFAULT_COMPRESS_LEVEL = 6
+# The writer flushes the gzip stream at most this often, so a crash loses at
+# most about this much of the recording without hurting compression
+FLUSH_INTERVAL = 1.0
+
+logger = get_logger("recorder")
+
+_STOP = object()
+
+
+class Recorder:
+    """
+    Appends events to a gzip compressed JSON lines file. record only puts
+    the event on a bounded queue; a background thread serializes and writes
+    it, so the move loop never waits for the disk. When the queue is full
+    the event is dropped and counted instead of blocking.
+
+    Events are dicts with an "event" name and the wall clock time "t":
+        start: bot, logic, board_id
+        board: source ("get" or "move"), request_ms and the raw board data
+        move: delta, position, decision_ms and valid
+        end: recorded and dropped event counts
+    Every run appends a new gzip member, so one file can hold many sessions.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        compress_level: int = DEFAULT_COMPRESS_LEVEL,
+    ):
+        self.path = path
+        self.dropped = 0
+        self.recorded = 0
+        self._queue = queue.Queue(max_pending)
+        self._file = gzip.open(path, "at", compresslevel=compress_level, encoding="utf-8")
+        self._thread = threading.Thread(
+            target=self._write_loop, name="recorder", daemon=True
+        )
+        self._thread.start()
+        self._closed = False
+
+    @staticmethod
+    def _event(event: str, fields: dict) -> dict:
+        fields["event"] = event
+        fields["t"] = time.time()
+        return fields
+
+    def record(self, event: str, **fields):
+        try:
+            self._queue.put_nowait(self._event(event, fields))
+            self.recorded += 1
+        except queue.Full:
+            if not self.dropped:
+                logger.warning("Recorder cannot keep up, dropping events")
+            self.dropped += 1
+
+    def _write_loop(self):
+        last_flush = time.monotonic()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            self._file.write(json.dumps(item, separators=(",", ":")) + "\n")
+            now = time.monotonic()
+            if self._queue.empty() and now - last_flush >= FLUSH_INTERVAL:
+                self._file.flush()
+                last_flush = now
+        self._file.close()
+
+    def close(self):
+        """
+        Write the end event and everything still queued, then close the file.
+        Unlike record, this waits for room on the queue: the end event holds
+        the counts.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.recorded += 1
+        self._queue.put(self._event("end", {"recorded": self.recorded, "dropped": self.dropped}))
+        self._queue.put(_STOP)
+        self._thread.join()
+
+
+def read_recording(path: str) -> Iterator[dict]:
+    """
+    Yield the events of a recording in order. A recording cut short, e.g. by
+    a crash, ends at its last complete event.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+        except EOFError:
+            return
+
+
+def recording_sessions(path: str) -> Iterator[List[Board]]:
+    """
+    Yield the boards received in every session of a recording
+    """
+    boards = None
+    for event in read_recording(path):
+        if event["event"] == "start":
+            if boards:
+                yield boards
+            boards = []
+        elif event["event"] == "board" and boards is not None:
+            boards.append(decode_into(Board, event["board"]))
+    if boards:
+        yield boards
+
+
+@dataclass
+class ReplayResult:
+    sessions: int = 0
+    boards: int = 0
+    decisions: int = 0
+    # Replayed moves that differ from the recorded ones. Logic that draws
+    # random numbers may differ without anything being wrong.
+    mismatches: int = 0
+    recorded_ms: List[float] = field(default_factory=list)
+    replayed_ms: List[float] = field(default_factory=list)
+
+
+def replay(
+    path: str,
+    logic_factory: Callable[[], BaseLogic],
+    bot_name: Optional[str] = None,
+) -> ReplayResult:
+    """
+    Feed the recorded boards to fresh logic at full speed. Every recorded
+    move is decided again on the board the bot saw at the time; board
+    diffs reach the logic like in the live loop.
+    :param logic_factory: builds the logic for every session in the file,
+        e.g. a class from CONTROLLERS. Each logic is closed when its session
+        ends.
+    :param bot_name: bot to play, by default the one that was recorded
+    """
+    result = ReplayResult()
+    logic = board_state = board = bot = None
+    try:
+        for event in read_recording(path):
+            kind = event["event"]
+            if kind == "start":
+                result.sessions += 1
+                if logic is not None:
+                    logic.close()
+                logic = logic_factory()
+                board_state = BoardState()
+                board_state.subscribe(logic.on_board_diff)
+                board = None
+                bot = Bot(name=bot_name or event["bot"], email="", id="")
+            elif kind == "board" and board_state is not None:
+                board = decode_into(Board, event["board"])
+                board_state.apply(board)
+                result.boards += 1
+            elif kind == "move" and board is not None:
+                board_bot = board.get_bot(bot)
+                if not board_bot:
+                    continue
+                started = time.perf_counter()
+                delta = logic.next_move(board_bot, board)
+                result.replayed_ms.append((time.perf_counter() - started) * 1000)
+                result.recorded_ms.append(event["decision_ms"])
+                result.decisions += 1
+                if list(delta) != event["delta"]:
+                    result.mismatches += 1
+    finally:
+        if logic is not None:
+            logic.close()
+    return result
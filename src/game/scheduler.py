@@ -0,0 +1,72 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# Sleeping wakes up a little late, so a move is only counted as having
+# missed its slot when it goes out later than this.
+SLOT_TOLERANCE = 0.005
+
+
+@dataclass
+class MoveScheduler:
+    """
+    Paces moves on the monotonic clock. The next slot opens one delay after
+    the previous move was sent, so time spent deciding and waiting for the
+    server is taken out of the wait instead of added on top of it.
+    """
+
+    delay: float
+    time_factor: float = 1.0
+    next_slot: Optional[float] = None
+    moves: int = 0
+    missed: int = 0
+    total_lateness: float = 0.0
+    max_lateness: float = 0.0
+
+    @classmethod
+    def from_delay_ms(cls, delay_ms: int, time_factor: float = 1.0) -> "MoveScheduler":
+        return cls(delay_ms / 1000, time_factor)
+
+    @property
+    def interval(self) -> float:
+        return self.delay * self.time_factor
+
+    def set_delay_ms(self, delay_ms: int):
+        self.delay = delay_ms / 1000
+
+    def time_until_slot(self) -> float:
+        if self.next_slot is None:
+            return 0.0
+        return max(0.0, self.next_slot - time.monotonic())
+
+    def sleep(self):
+        time.sleep(self.time_until_slot())
+
+    async def wait(self):
+        await asyncio.sleep(self.time_until_slot())
+
+    def move_sent(self, sent_at: float):
+        """
+        Record a move sent at the given monotonic time and open the next slot
+        :param sent_at: time.monotonic() taken right before sending
+        """
+        if self.next_slot is not None:
+            lateness = sent_at - self.next_slot
+            if lateness > SLOT_TOLERANCE:
+                self.missed += 1
+                self.total_lateness += lateness
+                self.max_lateness = max(self.max_lateness, lateness)
+        self.moves += 1
+        self.next_slot = sent_at + self.interval
+
+    def skip(self):
+        """
+        Push the next slot back one interval without a move, e.g. after an
+        invalid move was dropped
+        """
+        self.next_slot = time.monotonic() + self.interval
+
+    @property
+    def mean_lateness(self) -> float:
+        return self.total_lateness / self.missed if self.missed else 0.0
@@ -0,0 +1,105 @@
+import heapq
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from game.models import Position
+
+DEFAULT_CELL_SIZE = 5
+
+
+def rect_distance(position: Position, x0: int, y0: int, x1: int, y1: int) -> int:
+    """
+    :return: Manhattan distance from position to the nearest cell of the
+        rectangle with corners (x0, y0) and (x1, y1), inclusive
+    """
+    dx = x0 - position.x if position.x < x0 else (position.x - x1 if position.x > x1 else 0)
+    dy = y0 - position.y if position.y < y0 else (position.y - y1 if position.y > y1 else 0)
+    return dx + dy
+
+
+class GridIndex:
+    """
+    Buckets positions in square cells of a grid, built once per board. All
+    queries return indices into the positions it was built from, in
+    ascending order, so callers can keep the tie-breaking of a scan over the
+    original list.
+    """
+
+    def __init__(self, positions: Sequence[Position], cell_size: int = DEFAULT_CELL_SIZE):
+        self.positions = positions
+        self.cell_size = cell_size
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+        for index, position in enumerate(positions):
+            key = (position.x // cell_size, position.y // cell_size)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = [index]
+            else:
+                bucket.append(index)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _bounds(self, key: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return key[0] * size, key[1] * size, key[0] * size + size - 1, key[1] * size + size - 1
+
+    def within(self, position: Position, radius: int) -> List[int]:
+        """
+        :return: indices of the positions at most radius steps away
+        """
+        if radius < 0:
+            return []
+        size = self.cell_size
+        columns = range((position.x - radius) // size, (position.x + radius) // size + 1)
+        rows = range((position.y - radius) // size, (position.y + radius) // size + 1)
+        if len(columns) * len(rows) <= len(self.buckets):
+            keys = [(bx, by) for bx in columns for by in rows if (bx, by) in self.buckets]
+        else:
+            # A wide radius over a sparse grid: cheaper to visit the buckets
+            keys = self.buckets
+        found = []
+        for key in keys:
+            if rect_distance(position, *self._bounds(key)) > radius:
+                continue
+            for index in self.buckets[key]:
+                other = self.positions[index]
+                if abs(other.x - position.x) + abs(other.y - position.y) <= radius:
+                    found.append(index)
+        found.sort()
+        return found
+
+    def best_first(
+        self, lower_bound: Callable[[int, int, int, int], float]
+    ) -> Iterator[Tuple[float, List[int]]]:
+        """
+        Yield the buckets in increasing order of a lower bound on some cost
+        of their positions, for branch and bound: once the bound of the next
+        bucket cannot beat the best found, the rest can be skipped.
+        :param lower_bound: (x0, y0, x1, y1) of a bucket's cells -> bound
+        :return: (bound, indices of the bucket)
+        """
+        queue = [
+            (lower_bound(*self._bounds(key)), key, bucket)
+            for key, bucket in self.buckets.items()
+        ]
+        heapq.heapify(queue)
+        while queue:
+            bound, _, bucket = heapq.heappop(queue)
+            yield bound, bucket
+
+    def nearest(self, position: Position, k: int) -> List[int]:
+        """
+        :return: indices of the k positions nearest by Manhattan distance,
+            ties going to the lower index, nearest first
+        """
+        found: List[Tuple[int, int]] = []
+        for bound, bucket in self.best_first(
+            lambda x0, y0, x1, y1: rect_distance(position, x0, y0, x1, y1)
+        ):
+            if len(found) >= k and bound > found[k - 1][0]:
+                break
+            for index in bucket:
+                other = self.positions[index]
+                found.append((abs(other.x - position.x) + abs(other.y - position.y), index))
+            found.sort()
+        return [index for _, index in found[:k]]
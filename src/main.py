@@ -1,22 +1,29 @@
 import argparse
-from time import sleep
+import os
+from time import monotonic, perf_counter
 
-from colorama import Back, Fore, Style, init
-from game.api import Api
+from colorama import init
+from game.api import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_READ_TIMEOUT,
+    Api,
+)
 from game.board_handler import BoardHandler
+from game.board_state import BoardState
 from game.bot_handler import BotHandler
-from game.logic.garox import Garox
-from game.logic.unused.D import Dlogic   
+from game.controllers import CONTROLLERS
+from game.distance_cache import CACHE_DIR_ENV
 from game.util import *
+from game.log import get_logger, setup_logging
 from game.logic.base import BaseLogic
+from game.recorder import Recorder
+from game.scheduler import MoveScheduler
 
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID =2
-CONTROLLERS = {
-    "Garox": Garox,
-    "D" : Dlogic,
-}
+logger = get_logger("main")
 
 ###############################################################################
 #
@@ -41,7 +48,7 @@ parser.add_argument(
 )
 parser.add_argument(
     "--time-factor",
-    help="A factor to multiply each move command with. If you want to run the bot in a slower mode e.g. use --time-factor=5 to multiply each delay with 5.",
+    help="A factor to multiply the delay between moves with. If you want to run the bot in a slower mode e.g. use --time-factor=5 to move five times less often.",
     default=1,
     action="store",
 )
@@ -56,10 +63,62 @@ group = parser.add_argument_group("API connection")
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--pool-size",
+    help="Maximum number of keep-alive connections kept per host. Default: {}".format(
+        DEFAULT_POOL_MAXSIZE
+    ),
+    default=DEFAULT_POOL_MAXSIZE,
+    action="store",
+)
+group.add_argument(
+    "--connect-timeout",
+    help="Seconds to wait for a connection. Default: {}".format(DEFAULT_CONNECT_TIMEOUT),
+    default=DEFAULT_CONNECT_TIMEOUT,
+    action="store",
+)
+group.add_argument(
+    "--read-timeout",
+    help="Seconds to wait for a response. Default: {}".format(DEFAULT_READ_TIMEOUT),
+    default=DEFAULT_READ_TIMEOUT,
+    action="store",
+)
+parser.add_argument(
+    "--record",
+    help="Append every board received and every move made to this gzip compressed recording, e.g. game.jsonl.gz. Replay it with replay.py.",
+    action="store",
+)
+parser.add_argument(
+    "--distance-cache",
+    help="Directory of precomputed distance tables shared between processes and runs. Default: ${}, off when unset".format(
+        CACHE_DIR_ENV
+    ),
+    action="store",
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    help="Console log level, DEBUG also shows every request. Use OFF to silence the console. Default: INFO",
+    default="INFO",
+    action="store",
+)
+group.add_argument(
+    "--log-json",
+    help="Also write every log record, including request timings, as JSON lines to this file",
+    action="store",
+)
 args = parser.parse_args()
+setup_logging(args.log_level, args.log_json)
+if args.distance_cache:
+    os.environ[CACHE_DIR_ENV] = args.distance_cache
 
-time_factor = int(args.time_factor)
-api = Api(args.host)
+time_factor = float(args.time_factor)
+api = Api(
+    args.host,
+    pool_maxsize=int(args.pool_size),
+    connect_timeout=float(args.connect_timeout),
+    read_timeout=float(args.read_timeout),
+)
 bot_handler = BotHandler(api)
 board_handler = BoardHandler(api)
 
@@ -74,21 +133,10 @@ if not args.token:
     if not recovered_token:
         bot = bot_handler.register(args.name, args.email, args.password, args.team)
         if bot:
-            print("")
-            print(
-                Style.BRIGHT
-                + "Bot registered. Token: {}".format(bot.id)
-                + Style.RESET_ALL
-            )
+            logger.info("Bot registered. Token: %s", bot.id)
             args.token = bot.id
         else:
-            print(
-                Fore.RED
-                + Style.BRIGHT
-                + "Error: "
-                + Style.RESET_ALL
-                + "Unable to register bot"
-            )
+            logger.error("Unable to register bot")
             exit(1)
 
 ###############################################################################
@@ -99,19 +147,13 @@ if not args.token:
 bot = bot_handler.get_my_info(args.token)
 logic_controller = args.logic
 if logic_controller not in CONTROLLERS:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "Error: "
-        + Style.RESET_ALL
-        + "Invalid logic controller"
-    )
+    logger.error("Invalid logic controller")
     exit(1)
 
 if not bot.name:
-    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Bot does not exist")
+    logger.error("Bot does not exist")
     exit(1)
-print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
+logger.info("Welcome back, %s", bot.name)
 
 # Setup variables
 logic_class = CONTROLLERS[logic_controller]
@@ -146,13 +188,7 @@ else:
 
 # Did we manage to join a board?
 if not current_board_id:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "Error: "
-        + Style.RESET_ALL
-        + "Unable to find any boards to join"
-    )
+    logger.error("Unable to find any boards to join")
     exit(1)
 
 ###############################################################################
@@ -160,52 +196,79 @@ if not current_board_id:
 # Prepare state from current board
 #
 ###############################################################################
+board_state = BoardState()
+board_state.subscribe(bot_logic.on_board_diff)
+recorder = Recorder(args.record) if args.record else None
+if recorder:
+    recorder.record("start", bot=bot.name, logic=logic_controller, board_id=current_board_id)
+    api.recorder = recorder
 board = board_handler.get_board(current_board_id)
-move_delay = board.minimum_delay_between_moves / 1000
+board_state.apply(board)
+scheduler = MoveScheduler.from_delay_ms(board.minimum_delay_between_moves, time_factor)
 
 ###############################################################################
 #
 # Game play loop
 #
 ###############################################################################
-while True:
-    # Find our info among the bots on the board
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over
-        break
-
-    # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
-    # delta_x, delta_y = (1, 0)
-    if not board.is_valid_move(board_bot.position, delta_x, delta_y):
-        print(
-            Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
-        )
-        sleep(1)
-        continue
-
-    try:
-        # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
-    except Exception as e:
-        break
-
-    if not board:
-        # Read new board state
-        board = board_handler.get_board(current_board_id)
-
-    # Get new state
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over after move
-        break
-
-    # Don't spam the board more than it allows!
-    # sleep(move_delay * time_factor)
-    sleep(1)
+try:
+    while True:
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
+
+        # Calculate next move
+        decided_at = perf_counter()
+        delta_x, delta_y = bot_logic.next_move(board_bot, board)
+        # delta_x, delta_y = (1, 0)
+        valid = board.is_valid_move(board_bot.position, delta_x, delta_y)
+        if recorder:
+            recorder.record(
+                "move",
+                delta=[delta_x, delta_y],
+                position=[board_bot.position.x, board_bot.position.y],
+                decision_ms=(perf_counter() - decided_at) * 1000,
+                valid=valid,
+            )
+        if not valid:
+            logger.warning(
+                "Invalid move will be ignored. Your move: (%s, %s). Your position: (%s, %s)",
+                delta_x,
+                delta_y,
+                board_bot.position.x,
+                board_bot.position.y,
+            )
+            scheduler.skip()
+            scheduler.sleep()
+            continue
+
+        # Don't spam the board more than it allows!
+        scheduler.sleep()
+
+        try:
+            # Try to perform move
+            sent_at = monotonic()
+            board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
+        except Exception as e:
+            break
+        scheduler.move_sent(sent_at)
+        bot_logic.on_round_trip(monotonic() - sent_at)
+
+        if not board:
+            # Read new board state
+            board = board_handler.get_board(current_board_id)
+        board_state.apply(board)
+
+        # Get new state
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over after move
+            break
+        scheduler.set_delay_ms(board.minimum_delay_between_moves)
+finally:
+    bot_logic.close()
 
 
 ###############################################################################
@@ -213,4 +276,23 @@ while True:
 # Game over!
 #
 ###############################################################################
-print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+logger.info("Game over!")
+logger.info(
+    "Moves: %s sent, %s missed their slot (mean %.1f ms late, max %.1f ms)",
+    scheduler.moves,
+    scheduler.missed,
+    scheduler.mean_lateness * 1000,
+    scheduler.max_lateness * 1000,
+)
+logger.info(
+    "Connections: %s opened, %s reused", api.stats.opened, api.stats.reused
+)
+if recorder:
+    recorder.close()
+    logger.info(
+        "Recorded %s events to %s (%s dropped)",
+        recorder.recorded,
+        recorder.path,
+        recorder.dropped,
+    )
+api.close()
@@ -0,0 +1,80 @@
+import argparse
+import random
+
+from game.controllers import CONTROLLERS
+from game.log import get_logger, setup_logging
+from game.recorder import read_recording, replay
+
+logger = get_logger("replay")
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Replay a recording made with main.py --record through a logic controller"
+)
+parser.add_argument("recording", help="Recorded .jsonl.gz file", action="store")
+parser.add_argument(
+    "--logic",
+    help="The logic controller to replay with, by default the recorded one. Valid options are: {}".format(
+        ", ".join(CONTROLLERS)
+    ),
+    choices=list(CONTROLLERS),
+    action="store",
+)
+parser.add_argument(
+    "--bot", help="Bot to play, by default the recorded one", action="store"
+)
+parser.add_argument(
+    "--seed", help="Seed for logic that draws random numbers", default=0, type=int, action="store"
+)
+parser.add_argument("--log-level", default="INFO", action="store")
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def main(args):
+    logic_name = args.logic
+    if not logic_name:
+        start = next(
+            (e for e in read_recording(args.recording) if e["event"] == "start"), None
+        )
+        if not start or start.get("logic") not in CONTROLLERS:
+            logger.error("Recording does not name a known logic, pass --logic")
+            exit(1)
+        logic_name = start["logic"]
+
+    random.seed(args.seed)
+    result = replay(args.recording, CONTROLLERS[logic_name], args.bot)
+    logger.info(
+        "%s: %s sessions, %s boards, %s decisions, %s differ from the recording",
+        logic_name,
+        result.sessions,
+        result.boards,
+        result.decisions,
+        result.mismatches,
+    )
+    for label, values in (
+        ("recorded", result.recorded_ms),
+        ("replayed", result.replayed_ms),
+    ):
+        logger.info(
+            "  %s decision p50 %.3f ms  p99 %.3f ms  max %.3f ms",
+            label,
+            percentile(values, 0.5),
+            percentile(values, 0.99),
+            max(values, default=0.0),
+        )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+    main(args)
@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import json
+
+from colorama import init
+from game.async_api import AsyncApi
+from game.async_handlers import AsyncBoardHandler, AsyncBotHandler
+from game.controllers import CONTROLLERS
+from game.game_loop import BotStats, join_board, play, setup_bot
+from game.log import get_logger, setup_logging
+
+init()
+BASE_URL = "http://localhost:3000/api"
+DEFAULT_BOARD_ID = 2
+DEFAULT_REPORT_INTERVAL = 10
+logger = get_logger("runner")
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Run every bot of a roster from a single process"
+)
+parser.add_argument(
+    "--roster",
+    help="JSON file with a list of bots. Each entry takes logic, name, email, "
+    "password, team and optionally token and board.",
+    default="roster.json",
+    action="store",
+)
+parser.add_argument(
+    "--time-factor",
+    help="A factor to multiply the delay between moves with.",
+    default=1,
+    action="store",
+)
+parser.add_argument(
+    "--report-interval",
+    help="Seconds between per-bot tick rate and latency reports. Default: {}".format(
+        DEFAULT_REPORT_INTERVAL
+    ),
+    default=DEFAULT_REPORT_INTERVAL,
+    action="store",
+)
+group = parser.add_argument_group("API connection")
+group.add_argument(
+    "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    help="Console log level, DEBUG also shows every request. Use OFF to silence the console. Default: INFO",
+    default="INFO",
+    action="store",
+)
+group.add_argument(
+    "--log-json",
+    help="Also write every log record, including request timings, as JSON lines to this file",
+    action="store",
+)
+
+
+def load_roster(path: str) -> list:
+    with open(path) as f:
+        roster = json.load(f)
+    bots = roster["bots"] if isinstance(roster, dict) else roster
+    for entry in bots:
+        if entry.get("logic") not in CONTROLLERS:
+            raise ValueError(
+                "Invalid logic controller {} for bot {}".format(
+                    entry.get("logic"), entry.get("name")
+                )
+            )
+    return bots
+
+
+def log_report(all_stats: list):
+    logger.info("Bot report")
+    for stats in all_stats:
+        missed = stats.scheduler.missed if stats.scheduler else 0
+        logger.info(
+            "  %-20s %6d ticks %6.2f ticks/s  latency mean %7.1f ms  max %7.1f ms  missed slots %4d",
+            stats.name,
+            stats.ticks,
+            stats.tick_rate,
+            stats.mean_latency * 1000,
+            stats.max_latency * 1000,
+            missed,
+            extra={
+                "event": "bot_report",
+                "bot": stats.name,
+                "ticks": stats.ticks,
+                "tick_rate": stats.tick_rate,
+                "mean_latency_ms": stats.mean_latency * 1000,
+                "max_latency_ms": stats.max_latency * 1000,
+                "missed_slots": missed,
+            },
+        )
+
+
+async def run_bot(
+    entry: dict,
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    time_factor: float,
+    all_stats: list,
+):
+    # One failing bot must not take the others on the event loop down with it
+    try:
+        await _run_bot(entry, bot_handler, board_handler, time_factor, all_stats)
+    except Exception:
+        logger.exception("Bot %s stopped", entry.get("name"))
+
+
+async def _run_bot(
+    entry: dict,
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    time_factor: float,
+    all_stats: list,
+):
+    bot = await setup_bot(
+        bot_handler,
+        entry.get("token"),
+        entry.get("name"),
+        entry.get("email"),
+        entry.get("password"),
+        entry.get("team"),
+    )
+    if not bot:
+        return
+
+    board_id = await join_board(
+        bot_handler, board_handler, bot, int(entry.get("board", DEFAULT_BOARD_ID))
+    )
+    if not board_id:
+        return
+
+    stats = BotStats(bot.name)
+    all_stats.append(stats)
+    logic = CONTROLLERS[entry["logic"]]()
+    try:
+        await play(bot_handler, board_handler, bot, board_id, logic, time_factor, stats)
+    finally:
+        logic.close()
+
+
+async def report_periodically(all_stats: list, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        log_report(all_stats)
+
+
+async def main(args):
+    roster = load_roster(args.roster)
+    # All bots share one connection pool
+    api = AsyncApi(args.host, pool_maxsize=max(len(roster), 1))
+    bot_handler = AsyncBotHandler(api)
+    board_handler = AsyncBoardHandler(api)
+    all_stats = []
+
+    reporter = asyncio.create_task(
+        report_periodically(all_stats, float(args.report_interval))
+    )
+    try:
+        await asyncio.gather(
+            *[
+                run_bot(
+                    entry, bot_handler, board_handler, float(args.time_factor), all_stats
+                )
+                for entry in roster
+            ]
+        )
+    finally:
+        reporter.cancel()
+        await api.close()
+
+    log_report(all_stats)
+    logger.info(
+        "Connections: %s opened, %s reused", api.stats.opened, api.stats.reused
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_json)
+    asyncio.run(main(args))
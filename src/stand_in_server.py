@@ -0,0 +1,482 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+from game.log import get_logger, setup_logging
+
+DEFAULT_PORT = 3000
+DEFAULT_BOARDS = 1
+DEFAULT_WIDTH = 15
+DEFAULT_HEIGHT = 15
+DEFAULT_DELAY_MS = 100
+DEFAULT_SECONDS = 60
+DEFAULT_INVENTORY_SIZE = 5
+DEFAULT_DIAMONDS = 20
+RED_DIAMOND_RATIO = 0.2
+DIRECTIONS = {"NORTH": (0, -1), "SOUTH": (0, 1), "EAST": (1, 0), "WEST": (-1, 0)}
+
+logger = get_logger("stand_in")
+
+
+###############################################################################
+#
+# Game state
+#
+###############################################################################
+@dataclass
+class StandInBot:
+    id: str
+    name: str
+    email: str
+    password: str
+    team: str
+    board_id: Optional[int] = None
+    object_id: int = 0
+    base_object_id: int = 0
+    position: Tuple[int, int] = (0, 0)
+    base: Tuple[int, int] = (0, 0)
+    diamonds: int = 0
+    score: int = 0
+    time_joined: str = ""
+    ends_at: float = 0.0
+    last_move_at: float = 0.0
+
+    def info(self) -> dict:
+        return {"id": self.id, "name": self.name, "email": self.email}
+
+
+class BoardFullError(Exception):
+    pass
+
+
+@dataclass
+class StandInBoard:
+    """
+    A simplified Diamonds board: bots walk one cell per move, pick up
+    diamonds up to their inventory size and score them at their base.
+    Teleporters move a bot to their pair and the diamond button regenerates
+    every diamond. Tackling is not simulated.
+    """
+
+    id: int
+    width: int
+    height: int
+    delay_ms: int
+    seconds: int
+    inventory_size: int
+    diamond_count: int
+    rng: random.Random
+    bots: Dict[str, StandInBot] = field(default_factory=dict)
+    diamonds: Dict[Tuple[int, int], Tuple[int, int]] = field(default_factory=dict)
+    teleporters: List[Tuple[int, Tuple[int, int]]] = field(default_factory=list)
+    button: Tuple[int, Tuple[int, int]] = (0, (0, 0))
+    next_object_id: int = 1
+
+    def __post_init__(self):
+        first, second = self._free_cell(), self._free_cell()
+        self.teleporters = [(self._new_id(), first), (self._new_id(), second)]
+        self.button = (self._new_id(), self._free_cell())
+        self.regenerate_diamonds()
+
+    def _new_id(self) -> int:
+        self.next_object_id += 1
+        return self.next_object_id - 1
+
+    def _occupied(self) -> set:
+        occupied = set(self.diamonds)
+        occupied.update(position for _, position in self.teleporters)
+        occupied.add(self.button[1])
+        for bot in self.bots.values():
+            occupied.add(bot.position)
+            occupied.add(bot.base)
+        return occupied
+
+    def _free_cell(self) -> Tuple[int, int]:
+        occupied = self._occupied()
+        if len(occupied) >= self.width * self.height:
+            raise BoardFullError()
+        while True:
+            cell = (self.rng.randrange(self.width), self.rng.randrange(self.height))
+            if cell not in occupied:
+                return cell
+
+    def regenerate_diamonds(self):
+        self.diamonds = {}
+        for _ in range(self.diamond_count):
+            points = 2 if self.rng.random() < RED_DIAMOND_RATIO else 1
+            try:
+                self.diamonds[self._free_cell()] = (self._new_id(), points)
+            except BoardFullError:
+                break
+
+    def join(self, bot: StandInBot, now: float):
+        bot.base = self._free_cell()
+        bot.board_id = self.id
+        bot.object_id = self._new_id()
+        bot.base_object_id = self._new_id()
+        bot.position = bot.base
+        bot.diamonds = 0
+        bot.score = 0
+        bot.time_joined = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        bot.ends_at = now + self.seconds
+        bot.last_move_at = 0.0
+        self.bots[bot.id] = bot
+
+    def expire(self, now: float):
+        for bot_id in [b.id for b in self.bots.values() if b.ends_at <= now]:
+            self.bots.pop(bot_id).board_id = None
+
+    def move(self, bot: StandInBot, dx: int, dy: int) -> bool:
+        x, y = bot.position[0] + dx, bot.position[1] + dy
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        bot.position = (x, y)
+
+        for index, (_, position) in enumerate(self.teleporters):
+            if position == bot.position:
+                bot.position = self.teleporters[1 - index][1]
+                break
+
+        if bot.position == self.button[1]:
+            self.regenerate_diamonds()
+        elif bot.position in self.diamonds:
+            _, points = self.diamonds[bot.position]
+            if bot.diamonds + points <= self.inventory_size:
+                del self.diamonds[bot.position]
+                bot.diamonds += points
+                try:
+                    self.diamonds[self._free_cell()] = (self._new_id(), points)
+                except BoardFullError:
+                    pass
+
+        if bot.position == bot.base:
+            bot.score += bot.diamonds
+            bot.diamonds = 0
+        return True
+
+    def to_json(self, now: float) -> dict:
+        game_objects = []
+        for bot in self.bots.values():
+            base = {"x": bot.base[0], "y": bot.base[1]}
+            game_objects.append(
+                {
+                    "id": bot.base_object_id,
+                    "position": base,
+                    "type": "BaseGameObject",
+                    "properties": {"name": bot.name},
+                }
+            )
+            game_objects.append(
+                {
+                    "id": bot.object_id,
+                    "position": {"x": bot.position[0], "y": bot.position[1]},
+                    "type": "BotGameObject",
+                    "properties": {
+                        "diamonds": bot.diamonds,
+                        "score": bot.score,
+                        "name": bot.name,
+                        "inventorySize": self.inventory_size,
+                        "canTackle": False,
+                        "millisecondsLeft": max(0, int((bot.ends_at - now) * 1000)),
+                        "timeJoined": bot.time_joined,
+                        "base": base,
+                    },
+                }
+            )
+        for index, (object_id, (x, y)) in enumerate(self.teleporters):
+            game_objects.append(
+                {
+                    "id": object_id,
+                    "position": {"x": x, "y": y},
+                    "type": "TeleportGameObject",
+                    "properties": {"pairId": str(self.teleporters[1 - index][0])},
+                }
+            )
+        button_id, (x, y) = self.button
+        game_objects.append(
+            {
+                "id": button_id,
+                "position": {"x": x, "y": y},
+                "type": "DiamondButtonGameObject",
+            }
+        )
+        for (x, y), (object_id, points) in self.diamonds.items():
+            game_objects.append(
+                {
+                    "id": object_id,
+                    "position": {"x": x, "y": y},
+                    "type": "DiamondGameObject",
+                    "properties": {"points": points},
+                }
+            )
+        return {
+            "id": self.id,
+            "width": self.width,
+            "height": self.height,
+            "minimumDelayBetweenMoves": self.delay_ms,
+            "features": [
+                {"name": "DiamondButtonProvider", "config": None},
+                {"name": "TeleportProvider", "config": {"pairs": 1}},
+                {
+                    "name": "BotProvider",
+                    "config": {
+                        "inventorySize": self.inventory_size,
+                        "canTackle": False,
+                    },
+                },
+                {"name": "GameTimeProvider", "config": {"seconds": self.seconds}},
+            ],
+            "gameObjects": game_objects,
+        }
+
+
+@dataclass
+class StandInGame:
+    boards: Dict[int, StandInBoard]
+    bots: Dict[str, StandInBot] = field(default_factory=dict)
+    enforce_delay: bool = True
+
+    def find_bot_by_email(self, email: str) -> Optional[StandInBot]:
+        return next((b for b in self.bots.values() if b.email == email), None)
+
+    def board_json(self, board: StandInBoard) -> dict:
+        now = time.monotonic()
+        board.expire(now)
+        return board.to_json(now)
+
+
+###############################################################################
+#
+# HTTP endpoints
+#
+###############################################################################
+GAME = web.AppKey("game", StandInGame)
+
+
+def _data(data, status: int = 200) -> web.Response:
+    return web.json_response({"data": data}, status=status)
+
+
+def _error(message: str, status: int) -> web.Response:
+    return web.json_response(
+        {"statusCode": status, "message": message}, status=status
+    )
+
+
+async def _body(request: web.Request) -> dict:
+    text = await request.text()
+    return json.loads(text) if text else {}
+
+
+async def bots_register(request: web.Request) -> web.Response:
+    game = request.app[GAME]
+    body = await _body(request)
+    if game.find_bot_by_email(body.get("email")) or any(
+        b.name == body.get("name") for b in game.bots.values()
+    ):
+        return _error("Email or name already exists", 409)
+    bot = StandInBot(
+        id=str(uuid.uuid4()),
+        name=body.get("name"),
+        email=body.get("email"),
+        password=body.get("password"),
+        team=body.get("team"),
+    )
+    game.bots[bot.id] = bot
+    return _data(bot.info())
+
+
+async def bots_recover(request: web.Request) -> web.Response:
+    game = request.app[GAME]
+    body = await _body(request)
+    bot = game.find_bot_by_email(body.get("email"))
+    if not bot or bot.password != body.get("password"):
+        return _error("Invalid email or password", 404)
+    return _data({"id": bot.id}, status=201)
+
+
+async def bots_get(request: web.Request) -> web.Response:
+    bot = request.app[GAME].bots.get(request.match_info["id"])
+    if not bot:
+        return _error("Bot not found", 404)
+    return _data(bot.info())
+
+
+async def bots_join(request: web.Request) -> web.Response:
+    game = request.app[GAME]
+    bot = game.bots.get(request.match_info["id"])
+    if not bot:
+        return _error("Bot not found", 404)
+    body = await _body(request)
+    # The client keeps using the board id it asked for, so never fall back
+    # to another board when a specific one was requested
+    preferred = body.get("preferredBoardId")
+    board = game.boards.get(preferred) if preferred else next(iter(game.boards.values()))
+    if not board:
+        return _error("Board not found", 404)
+    if bot.board_id is not None:
+        return _error("Bot already on a board", 409)
+    try:
+        board.join(bot, time.monotonic())
+    except BoardFullError:
+        return _error("Board is full", 409)
+    return _data(game.board_json(board))
+
+
+async def bots_move(request: web.Request) -> web.Response:
+    game = request.app[GAME]
+    bot = game.bots.get(request.match_info["id"])
+    if not bot or bot.board_id is None:
+        return _error("Bot not on a board", 404)
+    board = game.boards[bot.board_id]
+    now = time.monotonic()
+    board.expire(now)
+    if bot.board_id is None:
+        return _error("Game over", 403)
+
+    body = await _body(request)
+    delta = DIRECTIONS.get(str(body.get("direction")).upper())
+    if delta is None:
+        return _error("Invalid direction", 400)
+    if game.enforce_delay and now - bot.last_move_at < board.delay_ms / 1000:
+        return _error("Move too fast", 403)
+    if not board.move(bot, *delta):
+        return _error("Invalid move", 403)
+    bot.last_move_at = now
+    return _data(board.to_json(now))
+
+
+async def boards_list(request: web.Request) -> web.Response:
+    game = request.app[GAME]
+    return _data([game.board_json(board) for board in game.boards.values()])
+
+
+async def boards_get(request: web.Request) -> web.Response:
+    game = request.app[GAME]
+    try:
+        board = game.boards[int(request.match_info["id"])]
+    except (KeyError, ValueError):
+        return _error("Board not found", 404)
+    return _data(game.board_json(board))
+
+
+def latency_middleware(latency: float, jitter: float, rng: random.Random):
+    @web.middleware
+    async def middleware(request: web.Request, handler):
+        delay = latency + rng.uniform(-jitter, jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return await handler(request)
+
+    return middleware
+
+
+def create_app(
+    boards: int = DEFAULT_BOARDS,
+    width: int = DEFAULT_WIDTH,
+    height: int = DEFAULT_HEIGHT,
+    delay_ms: int = DEFAULT_DELAY_MS,
+    seconds: int = DEFAULT_SECONDS,
+    inventory_size: int = DEFAULT_INVENTORY_SIZE,
+    diamonds: int = DEFAULT_DIAMONDS,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    enforce_delay: bool = True,
+    seed: Optional[int] = None,
+) -> web.Application:
+    """
+    Build the stand-in server. Endpoints live under /api like the real one.
+    :param latency: seconds added to every response
+    :param jitter: responses are delayed by latency +/- up to jitter seconds
+    """
+    rng = random.Random(seed)
+    game = StandInGame(
+        boards={
+            board_id: StandInBoard(
+                id=board_id,
+                width=width,
+                height=height,
+                delay_ms=delay_ms,
+                seconds=seconds,
+                inventory_size=inventory_size,
+                diamond_count=diamonds,
+                rng=random.Random(rng.random()),
+            )
+            for board_id in range(1, boards + 1)
+        },
+        enforce_delay=enforce_delay,
+    )
+    app = web.Application(middlewares=[latency_middleware(latency, jitter, rng)])
+    app[GAME] = game
+    app.add_routes(
+        [
+            web.post("/api/bots", bots_register),
+            web.post("/api/bots/recover", bots_recover),
+            web.get("/api/bots/{id}", bots_get),
+            web.post("/api/bots/{id}/join", bots_join),
+            web.post("/api/bots/{id}/move", bots_move),
+            web.get("/api/boards", boards_list),
+            web.get("/api/boards/{id}", boards_get),
+        ]
+    )
+    return app
+
+
+###############################################################################
+#
+# Parse command line arguments and serve
+#
+###############################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the Diamonds server, for offline load tests"
+    )
+    parser.add_argument("--port", default=DEFAULT_PORT, type=int, action="store")
+    parser.add_argument("--boards", default=DEFAULT_BOARDS, type=int, action="store")
+    parser.add_argument("--width", default=DEFAULT_WIDTH, type=int, action="store")
+    parser.add_argument("--height", default=DEFAULT_HEIGHT, type=int, action="store")
+    parser.add_argument(
+        "--delay", help="Minimum delay between moves in ms", default=DEFAULT_DELAY_MS, type=int, action="store"
+    )
+    parser.add_argument(
+        "--seconds", help="Game length per bot", default=DEFAULT_SECONDS, type=int, action="store"
+    )
+    parser.add_argument(
+        "--diamonds", default=DEFAULT_DIAMONDS, type=int, action="store"
+    )
+    parser.add_argument(
+        "--latency", help="Seconds added to every response", default=0.0, type=float, action="store"
+    )
+    parser.add_argument(
+        "--jitter", help="Random +/- seconds on top of --latency", default=0.0, type=float, action="store"
+    )
+    parser.add_argument(
+        "--no-enforce-delay",
+        help="Accept moves faster than the minimum delay",
+        action="store_true",
+    )
+    parser.add_argument("--seed", default=None, type=int, action="store")
+    parser.add_argument("--log-level", default="INFO", action="store")
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+
+    app = create_app(
+        boards=args.boards,
+        width=args.width,
+        height=args.height,
+        delay_ms=args.delay,
+        seconds=args.seconds,
+        diamonds=args.diamonds,
+        latency=args.latency,
+        jitter=args.jitter,
+        enforce_delay=not args.no_enforce_delay,
+        seed=args.seed,
+    )
+    logger.info("Stand-in server listening on http://localhost:%s/api", args.port)
+    web.run_app(app, port=args.port, print=None)
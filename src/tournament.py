@@ -0,0 +1,441 @@
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+from game.controllers import CONTROLLERS, DEFAULT_CONTROLLERS
+from game.distance_cache import CACHE_DIR_ENV
+from game.engine import Engine, EngineConfig
+from game.log import get_logger, setup_logging
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject
+
+DEFAULT_GAMES = 20
+DEFAULT_ROUNDS = 5
+DEFAULT_OUTPUT = "tournament.jsonl"
+# Two-sided 95% normal quantile, for the confidence intervals
+Z_95 = 1.96
+logger = get_logger("tournament")
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Play the logic controllers against each other on the simulated engine"
+)
+parser.add_argument(
+    "--controllers",
+    help="Controllers taking part. Default: {}".format(", ".join(DEFAULT_CONTROLLERS)),
+    nargs="+",
+    default=DEFAULT_CONTROLLERS,
+    choices=list(CONTROLLERS),
+)
+parser.add_argument(
+    "--format",
+    help="round-robin plays every pairing, swiss pairs controllers with equal standings each round. Default: round-robin",
+    choices=["round-robin", "swiss"],
+    default="round-robin",
+)
+parser.add_argument(
+    "--games",
+    help="Games per pairing (per round for swiss). Default: {}".format(DEFAULT_GAMES),
+    default=DEFAULT_GAMES,
+    type=int,
+    action="store",
+)
+parser.add_argument(
+    "--rounds",
+    help="Swiss rounds. Default: {}".format(DEFAULT_ROUNDS),
+    default=DEFAULT_ROUNDS,
+    type=int,
+    action="store",
+)
+parser.add_argument(
+    "--self-play",
+    help="Also pair every controller with itself in round-robin",
+    action="store_true",
+)
+parser.add_argument("--seed", default=0, type=int, action="store")
+parser.add_argument(
+    "--workers",
+    help="Worker processes. Default: one per CPU core",
+    default=os.cpu_count() or 1,
+    type=int,
+    action="store",
+)
+parser.add_argument(
+    "--output",
+    help="Every finished game is appended to this JSON lines file. Default: {}".format(
+        DEFAULT_OUTPUT
+    ),
+    default=DEFAULT_OUTPUT,
+    action="store",
+)
+parser.add_argument(
+    "--distance-cache",
+    help="Directory of precomputed distance tables shared between processes and runs. Default: ${}, off when unset".format(
+        CACHE_DIR_ENV
+    ),
+    action="store",
+)
+group = parser.add_argument_group("Game")
+group.add_argument("--seconds", default=EngineConfig.seconds, type=int, action="store")
+group.add_argument("--width", default=EngineConfig.width, type=int, action="store")
+group.add_argument("--height", default=EngineConfig.height, type=int, action="store")
+group.add_argument(
+    "--delay",
+    help="Minimum delay between moves in ms",
+    default=EngineConfig.minimum_delay_between_moves,
+    type=int,
+    action="store",
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    help="Console log level. Use OFF to silence the console. Default: INFO",
+    default="INFO",
+    action="store",
+)
+group.add_argument(
+    "--log-json",
+    help="Also write every log record as JSON lines to this file",
+    action="store",
+)
+
+
+###############################################################################
+#
+# Playing one game, in a worker process
+#
+###############################################################################
+class TimedLogic(BaseLogic):
+    """
+    Wraps a logic and keeps count of how long its decisions take
+    """
+
+    def __init__(self, logic: BaseLogic):
+        self.logic = logic
+        self.decisions = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        started = time.perf_counter()
+        move = self.logic.next_move(board_bot, board)
+        elapsed = time.perf_counter() - started
+        self.decisions += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        return move
+
+    def on_board_diff(self, diff, board: Board):
+        self.logic.on_board_diff(diff, board)
+
+    def on_round_trip(self, seconds: float):
+        self.logic.on_round_trip(seconds)
+
+    def close(self):
+        self.logic.close()
+
+
+@dataclass
+class GameTask:
+    game: int
+    round: int
+    players: List[str]
+    seed: int
+    config: EngineConfig
+
+
+def play_game(task: GameTask) -> dict:
+    """
+    :return: one JSON-ready result line for the game
+    """
+    # Some logic draws from the global random module when it is built
+    random.seed(task.seed)
+    logics = {
+        "{}:{}".format(slot, name): TimedLogic(CONTROLLERS[name]())
+        for slot, name in enumerate(task.players)
+    }
+    engine = Engine(task.config, seed=task.seed)
+    try:
+        scores = engine.run(logics)
+    finally:
+        for logic in logics.values():
+            logic.close()
+    return {
+        "game": task.game,
+        "round": task.round,
+        "seed": task.seed,
+        "players": [
+            {
+                "controller": name.split(":", 1)[1],
+                "score": scores[name],
+                "decisions": logic.decisions,
+                "mean_decision_ms": logic.total / logic.decisions * 1000
+                if logic.decisions
+                else 0.0,
+                "max_decision_ms": logic.max * 1000,
+            }
+            for name, logic in logics.items()
+        ],
+    }
+
+
+###############################################################################
+#
+# Aggregated results
+#
+###############################################################################
+@dataclass
+class Standing:
+    """
+    Running totals for one controller. Only sums are kept, so a long
+    tournament never holds its games in memory.
+    """
+
+    controller: str
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    score_sum: float = 0.0
+    score_squares: float = 0.0
+    decisions: int = 0
+    decision_time: float = 0.0
+    max_decision_ms: float = 0.0
+    opponents: Dict[str, int] = field(default_factory=dict)
+    byes: int = 0
+
+    def add(self, player: dict, result: str, opponent: str):
+        self.games += 1
+        self.wins += result == "win"
+        self.draws += result == "draw"
+        self.score_sum += player["score"]
+        self.score_squares += player["score"] ** 2
+        self.decisions += player["decisions"]
+        self.decision_time += player["mean_decision_ms"] * player["decisions"]
+        self.max_decision_ms = max(self.max_decision_ms, player["max_decision_ms"])
+        self.opponents[opponent] = self.opponents.get(opponent, 0) + 1
+
+    @property
+    def points(self) -> float:
+        return self.wins + self.draws / 2 + self.byes
+
+    @property
+    def mean_score(self) -> float:
+        return self.score_sum / self.games if self.games else 0.0
+
+    @property
+    def score_interval(self) -> float:
+        """
+        :return: half width of the 95% confidence interval of the mean score
+        """
+        if self.games < 2:
+            return float("inf")
+        variance = (self.score_squares - self.games * self.mean_score**2) / (self.games - 1)
+        return Z_95 * math.sqrt(max(variance, 0.0) / self.games)
+
+    @property
+    def win_rate(self) -> float:
+        """
+        Draws count as half a win
+        """
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.0
+
+    @property
+    def win_rate_interval(self) -> Tuple[float, float]:
+        """
+        :return: Wilson 95% confidence interval of the win rate
+        """
+        if not self.games:
+            return 0.0, 1.0
+        n, p = self.games, self.win_rate
+        denominator = 1 + Z_95**2 / n
+        centre = (p + Z_95**2 / (2 * n)) / denominator
+        half = Z_95 * math.sqrt(p * (1 - p) / n + Z_95**2 / (4 * n * n)) / denominator
+        return max(0.0, centre - half), min(1.0, centre + half)
+
+    @property
+    def mean_decision_ms(self) -> float:
+        return self.decision_time / self.decisions if self.decisions else 0.0
+
+    def summary(self) -> dict:
+        low, high = self.win_rate_interval
+        return {
+            "controller": self.controller,
+            "games": self.games,
+            "wins": self.wins,
+            "draws": self.draws,
+            "points": self.points,
+            "mean_score": self.mean_score,
+            "score_ci95": self.score_interval if self.games > 1 else None,
+            "win_rate": self.win_rate,
+            "win_rate_ci95": [low, high],
+            "mean_decision_ms": self.mean_decision_ms,
+            "max_decision_ms": self.max_decision_ms,
+        }
+
+
+def record(standings: Dict[str, Standing], result: dict):
+    first, second = result["players"]
+    for player, opponent in ((first, second), (second, first)):
+        if player["score"] > opponent["score"]:
+            outcome = "win"
+        elif player["score"] == opponent["score"]:
+            outcome = "draw"
+        else:
+            outcome = "loss"
+        standings[player["controller"]].add(player, outcome, opponent["controller"])
+
+
+def log_standings(standings: Dict[str, Standing]):
+    logger.info("Standings")
+    ranked = sorted(standings.values(), key=lambda s: (-s.points, -s.mean_score))
+    for standing in ranked:
+        low, high = standing.win_rate_interval
+        logger.info(
+            "  %-10s %5d games  score %7.2f +/- %5.2f  win rate %5.1f%% [%5.1f%%, %5.1f%%]"
+            "  decision mean %6.2f ms  max %7.2f ms",
+            standing.controller,
+            standing.games,
+            standing.mean_score,
+            standing.score_interval,
+            standing.win_rate * 100,
+            low * 100,
+            high * 100,
+            standing.mean_decision_ms,
+            standing.max_decision_ms,
+            extra={"event": "standing", **standing.summary()},
+        )
+
+
+###############################################################################
+#
+# Pairings
+#
+###############################################################################
+def round_robin(
+    controllers: List[str], games: int, self_play: bool
+) -> List[Tuple[str, str]]:
+    pairs = list(itertools.combinations(controllers, 2))
+    if self_play:
+        pairs += [(name, name) for name in controllers]
+    return [pair for pair in pairs for _ in range(games)]
+
+
+def swiss_pairs(standings: Dict[str, Standing]) -> List[Tuple[str, str]]:
+    """
+    Pair controllers with similar points, preferring opponents they have met
+    the least. With an odd number of controllers the lowest ranked one that
+    has not had a bye yet sits out and gets a point.
+    """
+    ranked = sorted(
+        standings.values(), key=lambda s: (-s.points, -s.mean_score, s.controller)
+    )
+    if len(ranked) % 2:
+        bye = min(reversed(ranked), key=lambda s: s.byes)
+        bye.byes += 1
+        ranked.remove(bye)
+        logger.info("Bye for %s", bye.controller)
+
+    pairs = []
+    while ranked:
+        first = ranked.pop(0)
+        opponent = min(
+            ranked, key=lambda s: (first.opponents.get(s.controller, 0), ranked.index(s))
+        )
+        ranked.remove(opponent)
+        pairs.append((first.controller, opponent.controller))
+    return pairs
+
+
+def tasks_for(
+    pairs: List[Tuple[str, str]], round_number: int, first_game: int, args
+) -> Iterator[GameTask]:
+    config = EngineConfig(
+        width=args.width,
+        height=args.height,
+        seconds=args.seconds,
+        minimum_delay_between_moves=args.delay,
+    )
+    for index, pair in enumerate(pairs):
+        game = first_game + index
+        yield GameTask(game, round_number, list(pair), args.seed * 1_000_003 + game, config)
+
+
+def play_all(pool, tasks: Iterator[GameTask], standings: Dict[str, Standing], output) -> int:
+    """
+    Play tasks on the pool, writing and recording each game as it finishes
+    :return: number of games played
+    """
+    played = 0
+    for result in pool.imap_unordered(play_game, tasks):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        record(standings, result)
+        played += 1
+        logger.debug(
+            "Game %s: %s",
+            result["game"],
+            ", ".join("{} {}".format(p["controller"], p["score"]) for p in result["players"]),
+            extra={"event": "game", **result},
+        )
+    return played
+
+
+def main(args):
+    if args.distance_cache:
+        # Inherited by the workers
+        os.environ[CACHE_DIR_ENV] = args.distance_cache
+    standings = {name: Standing(name) for name in args.controllers}
+    started = time.perf_counter()
+    played = 0
+    with multiprocessing.Pool(args.workers) as pool, open(args.output, "a") as output:
+        if args.format == "round-robin":
+            pairs = round_robin(args.controllers, args.games, args.self_play)
+            logger.info(
+                "Round-robin: %s games on %s workers", len(pairs), args.workers
+            )
+            played += play_all(pool, tasks_for(pairs, 0, 0, args), standings, output)
+        else:
+            for round_number in range(1, args.rounds + 1):
+                pairs = [
+                    pair for pair in swiss_pairs(standings) for _ in range(args.games)
+                ]
+                logger.info(
+                    "Swiss round %s: %s",
+                    round_number,
+                    ", ".join(sorted({"{} vs {}".format(*pair) for pair in pairs})),
+                )
+                played += play_all(
+                    pool, tasks_for(pairs, round_number, played, args), standings, output
+                )
+
+        summary = {
+            "summary": [standings[name].summary() for name in args.controllers],
+            "games": played,
+            "seconds": time.perf_counter() - started,
+        }
+        output.write(json.dumps(summary) + "\n")
+
+    logger.info(
+        "%s games in %.1f s, results in %s",
+        played,
+        time.perf_counter() - started,
+        args.output,
+    )
+    log_standings(standings)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_json)
+    main(args)
@@ -0,0 +1,32 @@
+from typing import List, Tuple
+
+from game.models import BOT_TYPE, DIAMOND_TYPE, Base, Board, GameObject, Position, Properties
+
+
+def make_board(
+    bots: List[Tuple[int, int, int]], diamonds: List[Tuple[int, int]] = (), size: int = 15, delay_ms: int = 100
+) -> Board:
+    """
+    :param bots: id, x, y of every bot, all with their base at 0, 0
+    """
+    objects = [
+        GameObject(
+            id=bot_id,
+            position=Position(x=x, y=y),
+            type=BOT_TYPE,
+            properties=Properties(
+                name=f"bot{bot_id}",
+                diamonds=0,
+                score=0,
+                inventory_size=5,
+                milliseconds_left=60000,
+                base=Base(x=0, y=0),
+            ),
+        )
+        for bot_id, x, y in bots
+    ]
+    objects += [
+        GameObject(id=100 + index, position=Position(x=x, y=y), type=DIAMOND_TYPE, properties=Properties(points=1))
+        for index, (x, y) in enumerate(diamonds)
+    ]
+    return Board(id=1, width=size, height=size, features=[], minimum_delay_between_moves=delay_ms, game_objects=objects)
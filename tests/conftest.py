@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The game package lives in src/, as when running src/main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,72 @@
+import pytest
+
+from boards import make_board
+from game.logic.anytime import (
+    DEADLINE_SAFETY_MARGIN_MS,
+    MIN_DECISION_BUDGET_MS,
+    AnytimeLogic,
+    Deadline,
+    RoundTripEstimator,
+)
+from game.logic.base import BaseLogic
+
+
+class Fixed(BaseLogic):
+    def __init__(self, move):
+        self.move = move
+
+    def next_move(self, board_bot, board):
+        return self.move
+
+
+class Refining(AnytimeLogic):
+    def __init__(self, moves, **kwargs):
+        super().__init__(Fixed((1, 0)), **kwargs)
+        self.moves = moves
+
+    def refine(self, board_bot, board, deadline):
+        yield from self.moves
+
+
+def test_round_trip_estimate():
+    estimator = RoundTripEstimator()
+    assert estimator.estimate == 0.0
+    estimator.add(0.02)
+    assert estimator.estimate == pytest.approx(0.02 + 4 * 0.01)
+    estimator.add(0.02)
+    # The deviation decays while the round trip is steady
+    assert estimator.estimate == pytest.approx(0.02 + 4 * 0.0075)
+
+
+def test_decision_budget_leaves_room_for_the_round_trip():
+    board = make_board([(1, 5, 5)], delay_ms=100)
+    logic = Refining([])
+    assert logic.decision_budget(board) == pytest.approx((100 - DEADLINE_SAFETY_MARGIN_MS) / 1000)
+    logic.on_round_trip(0.02)
+    assert logic.decision_budget(board) == pytest.approx((100 - 60 - DEADLINE_SAFETY_MARGIN_MS) / 1000)
+    logic.on_round_trip(1.0)
+    assert logic.decision_budget(board) == MIN_DECISION_BUDGET_MS / 1000
+    assert Refining([], budget_ms=7).decision_budget(board) == 0.007
+
+
+def test_last_valid_refinement_is_played():
+    board = make_board([(1, 0, 5)], size=10)
+    bot = board.bots[0]
+    logic = Refining([(0, 1), (-1, 0)])
+    assert logic.next_move(bot, board) == (0, 1)
+    assert logic.fallback_move == (1, 0)
+    assert logic.refinements == 1
+
+
+def test_fallback_without_refinements():
+    board = make_board([(1, 5, 5)])
+    logic = Refining([])
+    assert logic.next_move(board.bots[0], board) == (1, 0)
+    assert logic.fallback_moves == 1
+
+
+def test_deadline():
+    assert Deadline.after(-1).expired()
+    deadline = Deadline.after(10)
+    assert not deadline.expired()
+    assert 9 < deadline.remaining <= 10
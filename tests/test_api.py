@@ -0,0 +1,22 @@
+import logging
+
+from game.api import log_response, logger
+
+
+def test_response_body_read_only_when_logged(caplog):
+    reads = []
+
+    def text() -> str:
+        reads.append(1)
+        return "not found"
+
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        log_response("get", "/boards/1", 404, text, 0.01, True)
+    assert not reads
+
+    with caplog.at_level(logging.DEBUG, logger=logger.name):
+        log_response("get", "/boards/1", 200, text, 0.01, True)
+        assert not reads
+        log_response("get", "/boards/1", 404, text, 0.01, True)
+    assert reads == [1]
+    assert "not found" in caplog.text
@@ -0,0 +1,153 @@
+import random
+
+import numpy as np
+import pytest
+
+from decode import decode_into, encode
+from game.batch_engine import BatchEngine
+from game.engine import Engine, EngineConfig
+from game.logic.garox import Garox
+from game.logic.garox_vectorized import garox_policy
+from game.models import COMPACT_POSITIONS, Board
+
+
+def batch_with(bots, diamonds=(), **config) -> BatchEngine:
+    """
+    One game with nothing on the board but the given objects and a button in
+    the far corner
+    :param bots: x, y, base x, base y and diamonds held of every bot
+    :param diamonds: x, y, points
+    """
+    config = EngineConfig(width=10, height=10, teleporter_pairs=0, min_ratio_for_generation=0, **config)
+    engine = BatchEngine(1, len(bots), config, seed=0)
+    engine.diamonds[:] = 0
+    engine.buttons[0] = (9, 9)
+    for bot, (x, y, base_x, base_y, held) in enumerate(bots):
+        engine.positions[0, bot] = (x, y)
+        engine.bases[0, bot] = (base_x, base_y)
+        engine.inventory[0, bot] = held
+    for x, y, points in diamonds:
+        engine.diamonds[0, y, x] = points
+    return engine
+
+
+def state(board: Board):
+    bots = {
+        bot.properties.name: (bot.position.x, bot.position.y, bot.properties.diamonds, bot.properties.score)
+        for bot in board.bots
+    }
+    diamonds = {(d.position.x, d.position.y): d.properties.points for d in board.diamonds}
+    return bots, diamonds
+
+
+def step_both(batch: BatchEngine, bot: int, delta):
+    """
+    Move one bot in the batch and in an Engine continued from the same board
+    :return: the two boards after the move
+    """
+    engine = Engine.from_board(batch.board(0), seed=0)
+    engine.move("bot{}".format(bot), *delta)
+    actions = np.zeros((1, batch.bots, 2), dtype=np.int16)
+    actions[0, bot] = delta
+    batch.step(actions)
+    return batch.board(0), engine.board()
+
+
+@pytest.mark.parametrize(
+    "bots, diamonds, bot, delta",
+    [
+        # Pick up a red diamond
+        ([(2, 2, 0, 0, 0)], [(3, 2, 2)], 0, (1, 0)),
+        # Deliver at the base
+        ([(1, 0, 0, 0, 3)], [], 0, (-1, 0)),
+        # A red diamond does not fit with 4 held
+        ([(2, 2, 0, 0, 4)], [(3, 2, 2)], 0, (1, 0)),
+        # A blue one does
+        ([(2, 2, 0, 0, 4)], [(3, 2, 1)], 0, (1, 0)),
+        # Tackle: take what fits and send the other bot home
+        ([(3, 3, 0, 0, 4), (4, 3, 9, 0, 3)], [], 0, (1, 0)),
+    ],
+    ids=["pickup", "deposit", "red-over-cap", "blue-at-cap", "tackle"],
+)
+def test_step_follows_the_engine(bots, diamonds, bot, delta):
+    batch = batch_with(bots, diamonds)
+    batch_board, engine_board = step_both(batch, bot, delta)
+    assert state(batch_board) == state(engine_board)
+
+
+def test_rejected_moves_leave_the_bot_in_place():
+    batch = batch_with([(0, 5, 0, 0, 0)])
+    for delta in ((-1, 0), (1, 1), (0, 0)):
+        batch.step(np.array([[delta]], dtype=np.int16))
+        assert batch.positions[0, 0].tolist() == [0, 5]
+
+
+def test_tackle_disabled_blocks_the_move():
+    batch = batch_with([(3, 3, 0, 0, 1), (4, 3, 9, 0, 2)], can_tackle=False)
+    batch.step(np.array([[(1, 0), (0, 0)]], dtype=np.int16))
+    assert batch.positions[0].tolist() == [[3, 3], [4, 3]]
+    assert batch.inventory[0].tolist() == [1, 2]
+
+
+def test_board_bridge_round_trip():
+    engine = BatchEngine(3, 4, EngineConfig(teleporter_pairs=2), seed=5)
+    for _ in range(30):
+        engine.step(garox_policy(engine))
+
+    for game in range(engine.games):
+        board = engine.board(game)
+        assert decode_into(Board, encode(board), COMPACT_POSITIONS) == board
+        for bot in range(engine.bots):
+            board_bot = engine.board_bot(board, bot)
+            props = board_bot.properties
+            assert (board_bot.position.x, board_bot.position.y) == tuple(engine.positions[game, bot])
+            assert (props.base.x, props.base.y) == tuple(engine.bases[game, bot])
+            assert (props.diamonds, props.score) == (engine.inventory[game, bot], engine.score[game, bot])
+            assert props.milliseconds_left == engine.milliseconds_left
+        grid = np.zeros_like(engine.diamonds[game])
+        for diamond in board.diamonds:
+            grid[diamond.position.y, diamond.position.x] = diamond.properties.points
+        assert (grid == engine.diamonds[game]).all()
+        teleporters = board.teleporters
+        assert [(t.position.x, t.position.y) for t in teleporters] == [tuple(p) for p in engine.teleporters[game]]
+        for teleporter in teleporters:
+            pair = board.get_object(int(teleporter.properties.pair_id))
+            assert pair in teleporters and pair is not teleporter
+            assert board.get_object(int(pair.properties.pair_id)) is teleporter
+        button = board.diamond_buttons[0]
+        assert (button.position.x, button.position.y) == tuple(engine.buttons[game])
+
+
+def decided(move_of, tries: int = 3):
+    """
+    :return: the move when it is the same on every try, None when it was
+        drawn at random
+    """
+    moves = {tuple(int(v) for v in move_of(attempt)) for attempt in range(tries)}
+    return moves.pop() if len(moves) == 1 else None
+
+
+def test_policy_agrees_with_garox():
+    engine = BatchEngine(8, 4, EngineConfig(seconds=20, teleporter_pairs=0), seed=11)
+    compared = 0
+    while not engine.finished:
+        boards = [engine.board(game) for game in range(engine.games)]
+        policy = [garox_policy(engine) for _ in range(3)]
+        for game, board in enumerate(boards):
+            for bot in range(engine.bots):
+                expected = decided(lambda attempt: policy[attempt][game, bot])
+                if expected is None:
+                    continue
+
+                def scalar(attempt):
+                    random.seed(attempt)
+                    # Fresh logic: the policy keeps no goal between ticks
+                    return Garox().next_move(engine.board_bot(board, bot), board)
+
+                actual = decided(scalar)
+                if actual is None:
+                    continue
+                assert actual == expected, (engine.tick, game, bot)
+                compared += 1
+        engine.step(policy[0])
+    assert compared > engine.ticks * engine.games * engine.bots // 2
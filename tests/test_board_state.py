@@ -0,0 +1,71 @@
+from boards import make_board
+from game.board_state import BoardState
+from game.models import TELEPORTER_TYPE, GameObject, Position, Properties
+
+
+def ids(objects):
+    return sorted(o.id for o in objects)
+
+
+def test_first_board_adds_everything():
+    board = make_board([(1, 1, 1), (2, 3, 3)], [(5, 5)])
+    diff = BoardState().apply(board)
+
+    assert ids(diff.added) == [1, 2, 100]
+    assert not (diff.removed or diff.moved or diff.changed)
+    assert ids(diff.diamonds_spawned) == [100]
+
+
+def test_objects_are_classified_by_id():
+    state = BoardState()
+    state.apply(make_board([(1, 1, 1), (2, 3, 3), (3, 6, 6)], [(5, 5), (7, 7)]))
+    board = make_board([(1, 1, 2), (2, 3, 3), (3, 6, 6)], [(5, 5), (7, 7), (8, 8)])
+    # Bot 2 stayed but picked something up, diamond 101 was taken and
+    # diamond 102 spawned
+    board.bots[1].properties.diamonds = 1
+    board.game_objects = [o for o in board.game_objects if o.id != 101]
+    diff = state.apply(board)
+
+    assert [(o.id, (p.x, p.y)) for o, p in diff.moved] == [(1, (1, 1))]
+    assert [(o.id, (p.x, p.y)) for o, p in diff.bots_moved] == [(1, (1, 1))]
+    assert ids(diff.changed) == [2]
+    assert ids(diff.diamonds_taken) == [101]
+    assert ids(diff.diamonds_spawned) == [102]
+    assert state.board is board
+    assert state.objects[2] is board.bots[1]
+
+
+def test_unchanged_board_gives_an_empty_diff():
+    state = BoardState()
+    state.apply(make_board([(1, 1, 1)], [(5, 5)]))
+    assert state.apply(make_board([(1, 1, 1)], [(5, 5)])).empty
+
+
+def test_reused_id_of_another_type_is_removed_and_added():
+    state = BoardState()
+    board = make_board([(1, 1, 1)], [(5, 5)])
+    state.apply(board)
+    teleporter = GameObject(100, Position(x=5, y=5), TELEPORTER_TYPE, Properties(pair_id="101"))
+    board = make_board([(1, 1, 1)])
+    board.game_objects.append(teleporter)
+    diff = state.apply(board)
+
+    assert ids(diff.diamonds_taken) == [100]
+    assert diff.added == [teleporter]
+    assert not (diff.moved or diff.changed)
+
+
+def test_listeners_get_every_diff_until_unsubscribed():
+    state = BoardState()
+    seen = []
+
+    def listener(diff, board):
+        seen.append((ids(diff.added), board))
+
+    state.subscribe(listener)
+    first = make_board([(1, 1, 1)])
+    state.apply(first)
+    state.unsubscribe(listener)
+    state.apply(make_board([(1, 1, 1)], [(5, 5)]))
+
+    assert seen == [([1], first)]
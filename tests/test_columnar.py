@@ -0,0 +1,27 @@
+import numpy as np
+
+from boards import make_board
+from game.columnar import DEFAULT_MOVE_DELAY_MS, ColumnarReader, ColumnarWriter
+
+
+def test_boards_round_trip(tmp_path):
+    boards = [make_board([(1, x, 2), (2, 7, x)], [(4, 4)], size=10, delay_ms=250) for x in range(3)]
+    with ColumnarWriter(str(tmp_path), width=15, height=15) as writer:
+        assert writer.add_boards(boards, source="test") == 0
+
+    game = ColumnarReader(str(tmp_path)).game(0)
+    assert (game.width, game.height, game.delay, game.ticks) == (10, 10, 250, 3)
+    assert game.bot_names == ["bot1", "bot2"]
+    assert game.bot("bot1")["positions"].tolist() == [[0, 2], [1, 2], [2, 2]]
+    assert game.positions[:, 1].tolist() == [[7, 0], [7, 1], [7, 2]]
+    assert game.diamonds.shape == (3, 10, 10)
+    assert np.all(game.diamonds[:, 4, 4] == 1)
+
+
+def test_board_without_delay_is_stored(tmp_path):
+    board = make_board([(1, 0, 0)])
+    board.minimum_delay_between_moves = None
+    with ColumnarWriter(str(tmp_path)) as writer:
+        writer.add_boards([board])
+
+    assert ColumnarReader(str(tmp_path)).game(0).delay == DEFAULT_MOVE_DELAY_MS
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+import pytest
+from dacite import from_dict
+
+from decode import decode, decode_into, encode
+from game.models import COMPACT_POSITIONS, Board, PackedPosition
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+BOARDS = sorted(FIXTURES.glob("board_*.json"))
+
+
+def load(path: Path) -> dict:
+    with open(path) as f:
+        return json.load(f)["data"]
+
+
+def test_decode_keys_to_snake_case():
+    assert decode({"minimumDelayBetweenMoves": 1, "gameObjects": [{"pairId": "a"}], "HTTPStatus": 2}) == {
+        "minimum_delay_between_moves": 1,
+        "game_objects": [{"pair_id": "a"}],
+        "http_status": 2,
+    }
+    assert decode([{"inventorySize": 5}, {}]) == [{"inventory_size": 5}, {}]
+
+
+@pytest.mark.parametrize("path", BOARDS, ids=lambda path: path.stem)
+def test_decode_into_matches_from_dict(path):
+    data = load(path)
+    assert decode_into(Board, data) == from_dict(Board, decode(data))
+
+
+def test_decode_into_lists_and_unknown_keys():
+    data = load(BOARDS[0])
+    data["someNewField"] = {"nested": 1}
+    boards = decode_into(Board, [data, data])
+    assert len(boards) == 2
+    assert boards[0] == boards[1]
+    assert not hasattr(boards[0], "some_new_field")
+
+
+def test_decode_into_compact_positions():
+    data = load(BOARDS[0])
+    board = decode_into(Board, data, COMPACT_POSITIONS)
+    first = board.game_objects[0]
+    assert isinstance(first.position, PackedPosition)
+    assert (first.position.x, first.position.y) == (
+        data["gameObjects"][0]["position"]["x"],
+        data["gameObjects"][0]["position"]["y"],
+    )
+    # Interned, equal positions are the same object
+    again = decode_into(Board, data, COMPACT_POSITIONS)
+    assert again.game_objects[0].position is first.position
+
+
+@pytest.mark.parametrize("path", BOARDS, ids=lambda path: path.stem)
+def test_encode_round_trip(path):
+    board = decode_into(Board, load(path))
+    assert decode_into(Board, encode(board)) == board
+
+
+def test_encode_leaves_out_none_and_unpacks_positions():
+    board = decode_into(Board, load(BOARDS[0]), COMPACT_POSITIONS)
+    encoded = encode(board)
+    first = encoded["gameObjects"][0]
+    assert set(first["position"]) == {"x", "y"}
+    assert "minimumDelayBetweenMoves" in encoded
+    assert all(value is not None for value in first["properties"].values())
+    assert decode_into(Board, encoded, COMPACT_POSITIONS) == board
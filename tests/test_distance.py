@@ -0,0 +1,126 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from game import distance as distance_module
+from game.distance import DistanceTable, distance_table, link
+from game.distance_cache import CACHE_DIR_ENV
+from game.models import Position
+
+WIDTH, HEIGHT = 7, 5
+ENTRY, EXIT = Position(x=0, y=0), Position(x=6, y=4)
+OTHER_ENTRY, OTHER_EXIT = Position(x=6, y=0), Position(x=0, y=4)
+
+
+@pytest.fixture(autouse=True)
+def no_disk_cache(monkeypatch):
+    monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+
+
+@pytest.fixture(autouse=True, params=["table", "arithmetic"])
+def tabulated(request, monkeypatch):
+    """
+    Every test runs with the table and with the per-link arithmetic of
+    boards too large for one
+    """
+    if request.param == "arithmetic":
+        monkeypatch.setattr(distance_module, "MAX_TABLE_CELLS", 0)
+    return request.param == "table"
+
+
+def cells():
+    return [Position(x=x, y=y) for y in range(HEIGHT) for x in range(WIDTH)]
+
+
+def walk(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+def reference(start: Position, end: Position, links) -> int:
+    best = walk(start, end)
+    for entry, exit, blocked in links:
+        if any(start.x == p.x and start.y == p.y for p in blocked):
+            continue
+        best = min(best, walk(start, entry) + 1 + walk(exit, end))
+    return best
+
+
+def test_without_links_is_manhattan():
+    table = DistanceTable(WIDTH, HEIGHT)
+    for start, end in itertools.product(cells(), repeat=2):
+        assert table.route(start, end) == (walk(start, end), None)
+
+
+def test_routes_match_reference_with_links():
+    links = (
+        link(ENTRY, EXIT, (ENTRY, EXIT)),
+        link(OTHER_ENTRY, OTHER_EXIT, (OTHER_ENTRY, OTHER_EXIT)),
+    )
+    table = DistanceTable(WIDTH, HEIGHT, links)
+    for start, end in itertools.product(cells(), repeat=2):
+        distance, taken = table.route(start, end)
+        assert distance == reference(start, end, links)
+        assert table.distance(start, end) == distance
+        if taken is None:
+            assert distance == walk(start, end)
+        else:
+            assert distance == walk(start, taken.entry) + 1 + walk(taken.exit, end) < walk(start, end)
+
+
+def test_link_is_taken_only_when_strictly_shorter():
+    table = DistanceTable(WIDTH, HEIGHT, (link(ENTRY, EXIT),))
+    start, end = Position(x=1, y=0), Position(x=5, y=4)
+    assert table.route(start, end) == (3, table.links[0])
+    assert (table.waypoint(start, end).x, table.waypoint(start, end).y) == (ENTRY.x, ENTRY.y)
+
+    # Here the hop costs as much as the walk, so the walk stands
+    exit = Position(x=6, y=3)
+    table = DistanceTable(WIDTH, HEIGHT, (link(ENTRY, exit),))
+    end = Position(x=3, y=3)
+    assert walk(start, ENTRY) + 1 + walk(exit, end) == walk(start, end) == 5
+    assert table.route(start, end) == (5, None)
+    assert table.waypoint(start, end) == end
+
+
+def test_blocked_cells_do_not_take_the_link():
+    table = DistanceTable(WIDTH, HEIGHT, (link(ENTRY, EXIT, (ENTRY,)),))
+    assert table.route(ENTRY, Position(x=6, y=3)) == (9, None)
+    assert table.route(Position(x=0, y=1), Position(x=6, y=3)) == (3, table.links[0])
+
+
+def test_between_matches_route():
+    table = DistanceTable(WIDTH, HEIGHT, (link(ENTRY, EXIT, (ENTRY, EXIT)),))
+    positions = cells()
+    xy = np.array([(p.x, p.y) for p in positions], dtype=np.int16)
+    distances, via = table.between(xy, xy[::3])
+    for i, start in enumerate(positions):
+        for j, end in enumerate(positions[::3]):
+            distance, taken = table.route(start, end)
+            assert distances[i, j] == distance
+            assert via[i, j] == (-1 if taken is None else 0)
+
+
+def test_same_layout_shares_a_table():
+    links = (link(ENTRY, EXIT),)
+    assert distance_table(WIDTH, HEIGHT, links) is distance_table(WIDTH, HEIGHT, (link(ENTRY, EXIT),))
+    assert distance_table(WIDTH, HEIGHT, links) is not distance_table(WIDTH, HEIGHT)
+
+
+def test_large_boards_build_no_table(tabulated):
+    links = (
+        link(Position(x=3, y=40), Position(x=45, y=2), (Position(x=3, y=40),)),
+        link(Position(x=49, y=49), Position(x=0, y=0)),
+    )
+    table = DistanceTable(50, 50, links)
+    assert table.tabulated == (tabulated and 50 * 50 <= distance_module.MAX_TABLE_CELLS)
+    rng = np.random.default_rng(0)
+    starts, ends = rng.integers(0, 50, (40, 2)), rng.integers(0, 50, (30, 2))
+    distances, via = table.between(starts, ends)
+    for i, (sx, sy) in enumerate(starts.tolist()):
+        for j, (ex, ey) in enumerate(ends.tolist()):
+            start, end = Position(x=sx, y=sy), Position(x=ex, y=ey)
+            distance, taken = table.route(start, end)
+            assert distance == distances[i, j] == reference(start, end, links)
+            assert via[i, j] == (-1 if taken is None else table.links.index(taken))
+    assert "_tables" not in vars(table)
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pytest
+
+from game import distance_cache
+from game.distance import DistanceTable, link
+from game.distance_cache import CACHE_DIR_ENV, SUFFIX, TABLE_DTYPE, DiskCache, layout_key
+from game.models import Position
+
+CELLS = 6
+
+
+def table(fill: int, cells: int = CELLS) -> np.ndarray:
+    values = np.empty((2, cells * cells), dtype=TABLE_DTYPE)
+    values[0], values[1] = fill, -1
+    return values
+
+
+def cached(cache: DiskCache):
+    return sorted(name[: -len(SUFFIX)] for name in os.listdir(cache.path) if name.endswith(SUFFIX))
+
+
+def test_store_and_load(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.store("a", table(3))
+
+    loaded = cache.load("a", CELLS)
+    assert isinstance(loaded, np.memmap)
+    assert (loaded == table(3)).all()
+    assert cache.load("b", CELLS) is None
+    assert [name for name in os.listdir(tmp_path) if not name.endswith(SUFFIX)] == []
+
+
+def test_wrong_shape_is_ignored(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.store("small", table(1, cells=CELLS - 1))
+    np.save(str(tmp_path / ("plain" + SUFFIX)), np.zeros(2 * CELLS * CELLS, dtype=np.int8))
+    (tmp_path / ("broken" + SUFFIX)).write_bytes(b"not a table")
+
+    assert cache.load("small", CELLS) is None
+    assert cache.load("plain", CELLS) is None
+    assert cache.load("broken", CELLS) is None
+
+
+def test_least_recently_used_tables_are_evicted(tmp_path):
+    np.save(str(tmp_path / "probe.npy"), table(0))
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=2 * os.path.getsize(tmp_path / "probe.npy"))
+    cache.store("a", table(1))
+    cache.store("b", table(2))
+    os.utime(cache._file("a"), (1, 1))
+    os.utime(cache._file("b"), (2, 2))
+    # A hit makes a the most recently used
+    cache.load("a", CELLS)
+
+    cache.store("c", table(3))
+    assert cached(cache) == ["a", "c"]
+
+
+def test_table_over_the_cap_is_not_stored(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_bytes=table(0).nbytes - 1)
+    monkeypatch.setattr(distance_cache.tempfile, "mkstemp", pytest.fail)
+    cache.store("a", table(1))
+    assert cached(cache) == []
+
+
+def test_eviction_skips_files_removed_meanwhile(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path))
+    real_scandir = os.scandir
+
+    class Vanished:
+        name = "gone" + SUFFIX
+        path = str(tmp_path / name)
+
+        def stat(self):
+            raise FileNotFoundError(self.path)
+
+    class Scan(list):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+    cache.store("a", table(1))
+    cache.max_bytes = 0
+    monkeypatch.setattr(distance_cache.os, "scandir", lambda path: Scan([Vanished(), *real_scandir(path)]))
+    cache.evict()
+    assert cached(cache) == []
+
+    def missing(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(distance_cache.os, "scandir", missing)
+    cache.evict()
+
+
+def test_distance_table_reads_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    links = (link(Position(x=0, y=0), Position(x=4, y=4)),)
+    built = DistanceTable(5, 5, links)
+    distances = built.distances.copy()
+    assert os.listdir(tmp_path) == [layout_key(5, 5, links) + SUFFIX]
+
+    loaded = DistanceTable(5, 5, links)
+    assert isinstance(loaded.distances, np.memmap)
+    assert (loaded.distances == distances).all()
@@ -0,0 +1,145 @@
+import pytest
+
+from game.engine import Engine, EngineConfig, InvalidMoveError
+from game.logic.garox import Garox
+from game.models import BASE_TYPE, BOT_TYPE, DIAMOND_BUTTON_TYPE, DIAMOND_TYPE, TELEPORTER_TYPE, Properties, intern_position
+
+
+def empty_engine(**config) -> Engine:
+    return Engine(EngineConfig(width=10, height=10, **config), seed=0, populate=False)
+
+
+def add_bot(engine: Engine, name: str, x: int, y: int):
+    """
+    A bot on its own base at x, y
+    """
+    bot = engine.add_bot(name)
+    session = engine.sessions[name]
+    position = intern_position(x, y)
+    engine._place(bot, position)
+    engine._place(session.base, position)
+    bot.properties.base = position
+    return bot
+
+
+def add_diamond(engine: Engine, x: int, y: int, points: int = 1):
+    return engine._add(DIAMOND_TYPE, intern_position(x, y), Properties(points=points))
+
+
+def test_same_seed_same_game():
+    def play(seed):
+        engine = Engine(EngineConfig(seconds=10), seed=seed)
+        return engine.run({"a": Garox(), "b": Garox()}), engine.clock
+
+    assert play(3) == play(3)
+
+
+def test_diamonds_are_picked_up_and_scored_at_base():
+    engine = empty_engine()
+    bot = add_bot(engine, "a", 0, 0)
+    red = add_diamond(engine, 1, 0, points=2)
+
+    engine.move("a", 1, 0)
+    assert bot.properties.diamonds == 2
+    assert red.id not in engine.objects
+    engine.advance(100)
+    engine.move("a", -1, 0)
+    assert (bot.properties.diamonds, bot.properties.score) == (0, 2)
+
+
+def test_full_inventory_leaves_diamonds():
+    engine = empty_engine(inventory_size=2)
+    bot = add_bot(engine, "a", 0, 0)
+    bot.properties.diamonds = 1
+    red = add_diamond(engine, 1, 0, points=2)
+
+    engine.move("a", 1, 0)
+    assert bot.properties.diamonds == 1
+    assert red.id in engine.objects
+
+
+def test_invalid_moves_are_rejected():
+    engine = empty_engine()
+    add_bot(engine, "a", 0, 0)
+    with pytest.raises(InvalidMoveError):
+        engine.move("a", -1, 0)
+    with pytest.raises(InvalidMoveError):
+        engine.move("a", 1, 1)
+    with pytest.raises(InvalidMoveError):
+        engine.move("b", 1, 0)
+    engine.move("a", 1, 0)
+    with pytest.raises(InvalidMoveError):
+        engine.move("a", 1, 0)
+    engine.advance(100)
+    engine.move("a", 1, 0)
+
+
+def test_teleporter_moves_to_its_pair():
+    engine = empty_engine()
+    bot = add_bot(engine, "a", 0, 0)
+    first = engine._add(TELEPORTER_TYPE, intern_position(1, 0), Properties())
+    second = engine._add(TELEPORTER_TYPE, intern_position(7, 7), Properties())
+    first.properties.pair_id, second.properties.pair_id = str(second.id), str(first.id)
+
+    engine.move("a", 1, 0)
+    assert (bot.position.x, bot.position.y) == (7, 7)
+
+
+def test_tackle_takes_diamonds_and_sends_home():
+    engine = empty_engine(inventory_size=5)
+    attacker = add_bot(engine, "a", 3, 3)
+    target = add_bot(engine, "b", 0, 0)
+    engine._place(target, intern_position(4, 3))
+    attacker.properties.diamonds, target.properties.diamonds = 4, 3
+
+    engine.move("a", 1, 0)
+    assert attacker.properties.diamonds == 5
+    assert target.properties.diamonds == 0
+    assert (target.position.x, target.position.y) == (0, 0)
+    assert (attacker.position.x, attacker.position.y) == (4, 3)
+
+
+def test_no_tackle_when_disabled():
+    engine = empty_engine(can_tackle=False)
+    add_bot(engine, "a", 3, 3)
+    add_bot(engine, "b", 4, 3)
+    with pytest.raises(InvalidMoveError):
+        engine.move("a", 1, 0)
+
+
+def test_button_regenerates_diamonds():
+    engine = empty_engine(generation_ratio=0.1)
+    add_bot(engine, "a", 0, 0)
+    old = add_diamond(engine, 9, 9)
+    engine._add(DIAMOND_BUTTON_TYPE, intern_position(1, 0))
+
+    engine.move("a", 1, 0)
+    diamonds = engine._of_type(DIAMOND_TYPE)
+    assert old.id not in engine.objects
+    assert len(diamonds) == 10
+    button = engine._of_type(DIAMOND_BUTTON_TYPE)[0]
+    assert (button.position.x, button.position.y) != (1, 0)
+
+
+def test_bots_leave_when_their_time_is_over():
+    engine = empty_engine(seconds=1)
+    bot = add_bot(engine, "a", 0, 0)
+    engine.advance(400)
+    assert bot.properties.milliseconds_left == 600
+    engine.advance(600)
+    assert engine.finished
+    assert not engine._of_type(BOT_TYPE) and not engine._of_type(BASE_TYPE)
+    assert engine.scores() == {"a": 0}
+
+
+def test_from_board_continues_the_game():
+    engine = Engine(EngineConfig(seconds=10), seed=1)
+    engine.run({"a": Garox(), "b": Garox()}, max_ticks=20)
+    board = engine.board()
+
+    copy = Engine.from_board(board, seed=2)
+    assert copy.board() == board
+    assert set(copy.sessions) == {"a", "b"}
+    assert copy.sessions["a"].ends_at == board.get_object(engine.sessions["a"].bot.id).properties.milliseconds_left
+    copy.run({"a": Garox(), "b": Garox()})
+    assert copy.finished
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from boards import make_board
+from game.game_loop import play
+from game.logic.base import BaseLogic
+from game.models import Bot
+
+MOVES = 3
+
+
+class FakeHandlers:
+    """
+    Bot and board handler of a game that ends after MOVES moves
+    """
+
+    def __init__(self):
+        self.moves = 0
+
+    async def get_board(self, board_id):
+        return make_board([(1, 0, 0)], delay_ms=1)
+
+    async def move(self, bot_id, board_id, delta_x, delta_y):
+        self.moves += 1
+        if self.moves == MOVES:
+            return make_board([], delay_ms=1)
+        return make_board([(1, self.moves % 2, 0)], delay_ms=1)
+
+
+class SlowLogic(BaseLogic):
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.ticks_while_deciding = []
+        self.round_trips = []
+
+    def next_move(self, board_bot, board):
+        before = self.ticks[0]
+        time.sleep(0.05)
+        self.ticks_while_deciding.append(self.ticks[0] - before)
+        return (-1, 0) if board_bot.position.x else (1, 0)
+
+    def on_round_trip(self, seconds):
+        self.round_trips.append(seconds)
+
+
+def test_deciding_does_not_block_the_event_loop():
+    ticks = [0]
+    logic = SlowLogic(ticks)
+
+    async def tick():
+        while True:
+            await asyncio.sleep(0.001)
+            ticks[0] += 1
+
+    async def main():
+        handlers = FakeHandlers()
+        ticker = asyncio.create_task(tick())
+        await play(handlers, handlers, Bot(name="bot1", email="", id="1"), 1, logic)
+        ticker.cancel()
+        return handlers.moves
+
+    assert asyncio.run(main()) == MOVES
+    assert len(logic.ticks_while_deciding) == MOVES
+    assert all(count > 0 for count in logic.ticks_while_deciding)
+    # The decision is not part of the round trip
+    assert max(logic.round_trips) < 0.05
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from boards import make_board
+from game.distance import distance_table, link
+from game.distance_cache import CACHE_DIR_ENV
+from game.logic.garox import DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION, Garox
+from game.models import Position
+from game.opponents import OpponentModel
+
+SEEDS = range(40)
+
+
+@pytest.fixture(autouse=True)
+def no_disk_cache(monkeypatch):
+    monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+
+
+def scenario(seed: int, links: int, opponent_model: bool):
+    """
+    A random board around bot 1 and the arguments of the scoring paths
+    """
+    rng = random.Random(seed)
+    size = rng.randint(6, 16)
+    cell = lambda: (rng.randrange(size), rng.randrange(size))
+    bots = [(bot_id, *cell()) for bot_id in range(1, rng.randint(1, 10) + 1)]
+    board = make_board(bots, [cell() for _ in range(rng.randint(1, 40))], size=size)
+    for diamond in board.diamonds:
+        diamond.properties.points = rng.choice((1, 1, 2))
+    board_links = tuple(
+        link(Position(*entry), Position(*exit), (Position(*entry), Position(*exit)))
+        for entry, exit in ((cell(), cell()) for _ in range(links))
+        if entry != exit
+    )
+    distances = distance_table(size, size, board_links)
+
+    logic = Garox()
+    if opponent_model:
+        # Two boards, so the model has a heading for every bot
+        logic.opponent_model = OpponentModel()
+        logic.opponent_model.update(make_board([(bot_id, max(x - 1, 0), y) for bot_id, x, y in bots], size=size))
+        logic.opponent_model.update(board)
+    me = board.bots[0]
+    return logic, dict(
+        current_pos=me.position,
+        my_base=Position(*cell()),
+        available_diamonds=board.diamonds,
+        all_other_bots=board.bots[1:],
+        distances=distances,
+    )
+
+
+def choice(candidate):
+    if candidate is None:
+        return None
+    target = candidate["path_target"]
+    return candidate["diamond"].id, (target.x, target.y), candidate["uses_tp"]
+
+
+def reference(logic, diamonds_held, inventory_size, arguments):
+    candidates = logic._evaluate_diamonds(
+        diamonds_held=diamonds_held, inventory_size=inventory_size, **arguments
+    )
+    return choice(logic._choose_diamond(candidates, diamonds_held, inventory_size))
+
+
+@pytest.mark.parametrize("opponent_model", [False, True], ids=["nearest", "predicted"])
+@pytest.mark.parametrize("links", [0, 1, 3])
+@pytest.mark.parametrize("diamonds_held, inventory_size", [(0, 5), (2, 5), (4, 5), (4, 6), (5, 5), (0, 0), (3, 4)])
+def test_scoring_paths_choose_the_same_diamond(diamonds_held, inventory_size, links, opponent_model):
+    for seed in SEEDS:
+        logic, arguments = scenario(seed, links, opponent_model)
+        expected = reference(logic, diamonds_held, inventory_size, arguments)
+
+        vectorized = logic._find_best_diamond_vectorized(
+            diamonds_held=diamonds_held, inventory_size=inventory_size, **arguments
+        )
+        assert choice(vectorized) == expected, seed
+        # Pruning is only exact without links and when every candidate fits
+        if not arguments["distances"].links and diamonds_held != DIAMONDS_BEFORE_CONSIDERING_RED_OPTIMIZATION:
+            pruned = logic._find_best_diamond_pruned(
+                diamonds_held=diamonds_held, inventory_size=inventory_size, **arguments
+            )
+            assert choice(pruned) == expected, seed
+
+
+def test_scenarios_cover_teleporter_routes_and_the_blue_preference():
+    through_links = blue_over_red = 0
+    for seed in SEEDS:
+        logic, arguments = scenario(seed, 3, False)
+        chosen = reference(logic, 0, 5, arguments)
+        through_links += chosen is not None and chosen[2]
+        # With 4 held a blue is taken even when a red scores higher
+        candidates = logic._evaluate_diamonds(diamonds_held=4, inventory_size=6, **arguments)
+        chosen = reference(logic, 4, 6, arguments)
+        blue_over_red += bool(candidates) and candidates[0]["value_raw"] == 2 and chosen[0] != candidates[0]["diamond"].id
+    assert through_links and blue_over_red
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def test_sync_handlers_import_without_aiohttp():
+    # None in sys.modules makes the import fail as if it was not installed
+    code = (
+        "import sys; sys.modules['aiohttp'] = None\n"
+        "import game.bot_handler, game.board_handler\n"
+        "assert 'game.async_api' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=SRC, check=True)
@@ -0,0 +1,58 @@
+from boards import make_board
+from game.models import BOT_TYPE, DIAMOND_TYPE, TELEPORTER_TYPE, Bot, GameObject, Position, Properties
+
+
+def ids(objects):
+    return [o.id for o in objects]
+
+
+def test_objects_of_type_keep_board_order():
+    board = make_board([(2, 1, 1), (1, 3, 3)], [(5, 5), (4, 4)])
+
+    assert ids(board.objects_of_type(BOT_TYPE)) == [2, 1]
+    assert ids(board.diamonds) == [100, 101]
+    assert board.objects_of_type(TELEPORTER_TYPE) == []
+    assert board.teleporters == []
+
+
+def test_get_object_and_get_bot():
+    board = make_board([(1, 1, 1), (2, 3, 3)], [(5, 5)])
+    # The first object with an id wins, like a scan of game_objects
+    board.game_objects.append(GameObject(100, Position(x=6, y=6), DIAMOND_TYPE, Properties(points=2)))
+    board.reindex()
+
+    assert board.get_object(2) is board.game_objects[1]
+    assert board.get_object(100).position == Position(x=5, y=5)
+    assert board.get_object(7) is None
+    assert board.get_bot(Bot(name="bot2", email="", id="")) is board.game_objects[1]
+    assert board.get_bot(Bot(name="nobody", email="", id="")) is None
+
+
+def test_reindex_after_changing_game_objects():
+    board = make_board([(1, 1, 1)], [(5, 5), (4, 4)])
+    board.game_objects = [o for o in board.game_objects if o.id != 100]
+
+    # Stale until reindexed
+    assert ids(board.diamonds) == [100, 101]
+    board.reindex()
+    assert ids(board.diamonds) == [101]
+    assert board.get_object(100) is None
+
+
+def test_bots_and_diamonds_are_shared_lists():
+    board = make_board([(1, 1, 1)], [(5, 5)])
+
+    assert board.bots is board.bots
+    assert board.diamonds is board.objects_of_type(DIAMOND_TYPE)
+
+
+def test_mutating_the_shared_lists_corrupts_the_index():
+    board = make_board([(1, 1, 1), (2, 3, 3)])
+    board.bots.pop()
+
+    # Callers must copy before modifying: the board now disagrees with itself
+    assert ids(board.bots) == [1]
+    assert board.get_object(2) is not None
+    assert ids(o for o in board.game_objects if o.type == BOT_TYPE) == [1, 2]
+    board.reindex()
+    assert ids(board.bots) == [1, 2]
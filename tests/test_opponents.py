@@ -0,0 +1,159 @@
+import random
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from boards import make_board
+from game import distance as distance_module
+from game.controllers import CONTROLLERS
+from game.distance import DistanceTable, link
+from game.engine import Engine, EngineConfig
+from game.models import Position
+from game.opponents import OpponentModel
+
+
+def test_growth_keeps_bots_still_on_the_board():
+    model = OpponentModel(bots=4)
+    for x in (1, 2):
+        model.update(make_board([(bot_id, x, bot_id) for bot_id in (1, 2, 3, 4)]))
+    model.update(make_board([(bot_id, 3, bot_id) for bot_id in (1, 2, 5, 6, 7)]))
+
+    assert set(model.rows) == {1, 2, 5, 6, 7}
+    assert model.seen[model.rows[1]] == 3
+    assert model.seen[model.rows[5]] == 1
+    # The rows of bots 3 and 4 go to new bots before the model grows
+    assert {model.rows[5], model.rows[6]} == {2, 3}
+    assert model.active[[model.rows[bot_id] for bot_id in model.rows]].all()
+
+
+def test_departed_rows_are_reused():
+    model = OpponentModel(bots=2)
+    model.update(make_board([(1, 1, 1), (2, 2, 2)]))
+    model.update(make_board([(1, 2, 1), (3, 5, 5)]))
+
+    assert model.rows == {1: 0, 3: 1}
+    assert len(model.ids) == 2
+    assert model.seen[1] == 1
+    assert model.predicted_position(3, 4) == Position(x=5, y=5)
+
+
+def test_ring_buffer_wraps():
+    model = OpponentModel(history=4)
+    for x in range(10):
+        model.update(make_board([(1, x, 0)]))
+
+    assert model.seen[0] == 10
+    assert sorted(model.positions[0, :, 0].tolist()) == [6, 7, 8, 9]
+    assert model.predicted_position(1, 0) == Position(x=9, y=0)
+
+
+def test_infers_diamond_target_and_walks_to_it():
+    model = OpponentModel()
+    diamonds = [(10, 4), (2, 12)]
+    for x in (4, 5, 6):
+        model.update(make_board([(1, x, 2)], diamonds))
+
+    assert model.target(1) == Position(x=10, y=4)
+    assert model.predicted_position(1, 3) == Position(x=9, y=2)
+    # x first, then y, and no further than the target
+    assert model.predicted_position(1, 5) == Position(x=10, y=3)
+    assert model.predicted_position(1, 20) == Position(x=10, y=4)
+
+
+def test_infers_base_when_full():
+    model = OpponentModel()
+    board = make_board([(1, 8, 8)], [(9, 9)])
+    board.bots[0].properties.diamonds = 5
+    model.update(board)
+    board = make_board([(1, 9, 8)], [(9, 9)])
+    board.bots[0].properties.diamonds = 5
+    model.update(board)
+
+    assert model.target(1) == Position(x=0, y=0)
+
+
+def test_keeps_going_without_target():
+    model = OpponentModel()
+    for y in (5, 6):
+        model.update(make_board([(1, 7, y)], size=10))
+
+    assert model.target(1) is None
+    assert model.predicted_position(1, 2) == Position(x=7, y=8)
+    # Stops at the edge of the board
+    assert model.predicted_position(1, 10) == Position(x=7, y=9)
+
+
+def test_same_board_is_recorded_once():
+    model = OpponentModel()
+    board = make_board([(1, 1, 1)])
+    model.update(board)
+    model.update(board)
+
+    assert model.seen[0] == 1
+
+
+def test_predict_reuses_its_buffer():
+    model = OpponentModel()
+    model.update(make_board([(1, 1, 1), (2, 3, 3)]))
+
+    assert model.predict(1) is model.predict(2)
+
+
+def heading_model(seed: int, size: int, bots: int = 8, diamonds: int = 40):
+    """
+    A model that followed bots walking along x for a few ticks, and the
+    board they are on now
+    """
+    rng = random.Random(seed)
+    cell = lambda: (rng.randrange(size), rng.randrange(size))
+    positions = [(bot_id, *cell()) for bot_id in range(1, bots + 1)]
+    cells = [cell() for _ in range(diamonds)]
+    model = OpponentModel(bots=2, diamonds=4)
+    for step in range(3):
+        model.update(make_board([(bot_id, max(0, x - 3 + step), y) for bot_id, x, y in positions], cells, size=size))
+    board = make_board(positions, cells, size=size)
+    model.update(board)
+    links = (
+        # One way, so routes differ by direction
+        link(Position(*cell()), Position(*cell())),
+        link(Position(*cell()), Position(*cell()), (Position(*cell()),)),
+    )
+    return model, board, np.array(cells, dtype=np.int16), links
+
+
+@pytest.mark.parametrize("tabulated", [True, False], ids=["table", "arithmetic"])
+@pytest.mark.parametrize("with_links", [True, False], ids=["links", "walk"])
+def test_arrival_times_match_arrival_time(tabulated, with_links, monkeypatch):
+    if not tabulated:
+        monkeypatch.setattr(distance_module, "MAX_TABLE_CELLS", 0)
+    for seed in range(20):
+        model, board, cells, links = heading_model(seed, size=12)
+        distances = DistanceTable(12, 12, links if with_links else ())
+        times = model.arrival_times(board.bots, cells, distances)
+        assert model.has_target.any()
+        for i, bot in enumerate(board.bots):
+            for j, (x, y) in enumerate(cells.tolist()):
+                assert times[i, j] == model.arrival_time(bot, Position(x=x, y=y), distances), (seed, i, j)
+
+
+def test_arrival_times_reuse_their_buffers():
+    model, board, cells, links = heading_model(0, size=15, bots=12, diamonds=500)
+    distances = DistanceTable(15, 15, links)
+    first = model.arrival_times(board.bots, cells, distances)
+
+    tracemalloc.start()
+    second = model.arrival_times(board.bots, cells, distances)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert np.shares_memory(first, second)
+    # Less than one (bots, diamonds) array of routes
+    assert peak < second.nbytes
+
+
+def test_garox_predict_plays():
+    engine = Engine(EngineConfig(seconds=5), seed=2)
+    logics = {"a": CONTROLLERS["GaroxPredict"](), "b": CONTROLLERS["Garox"]()}
+    engine.run(logics)
+    assert engine.finished
+    assert logics["a"].opponent_model.rows
@@ -0,0 +1,143 @@
+import threading
+import zlib
+
+from boards import make_board
+from decode import encode
+from game.logic.base import BaseLogic
+from game.recorder import Recorder, read_recording, replay
+
+
+class Recording(BaseLogic):
+    instances = []
+
+    def __init__(self):
+        self.closed = False
+        Recording.instances.append(self)
+
+    def next_move(self, board_bot, board):
+        return 1, 0
+
+    def close(self):
+        self.closed = True
+
+
+def record_session(recorder: Recorder, moves: int = 2):
+    recorder.record("start", bot="bot1", logic="Recording", board_id=1)
+    for x in range(moves):
+        board = make_board([(1, x, 0)])
+        recorder.record("board", source="move", request_ms=1.0, board=encode(board))
+        recorder.record("move", delta=[1, 0], position=[x, 0], decision_ms=0.5, valid=True)
+
+
+def test_replay_closes_every_session(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    recorder = Recorder(path)
+    record_session(recorder)
+    record_session(recorder)
+    recorder.close()
+
+    Recording.instances = []
+    result = replay(path, Recording)
+
+    assert result.sessions == 2 and result.decisions == 4 and result.mismatches == 0
+    assert len(Recording.instances) == 2
+    assert all(logic.closed for logic in Recording.instances)
+
+
+class Gate:
+    """
+    Holds the writer thread in its next write until opened
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.entered = threading.Event()
+        self.opened = threading.Event()
+
+    def write(self, text):
+        self.entered.set()
+        self.opened.wait()
+        return self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def without_time(events):
+    return [{k: v for k, v in event.items() if k != "t"} for event in events]
+
+
+def test_events_round_trip(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    recorder = Recorder(path)
+    record_session(recorder, moves=1)
+    recorder.close()
+
+    events = list(read_recording(path))
+    assert all(isinstance(event["t"], float) for event in events)
+    assert without_time(events) == [
+        {"event": "start", "bot": "bot1", "logic": "Recording", "board_id": 1},
+        {"event": "board", "source": "move", "request_ms": 1.0, "board": encode(make_board([(1, 0, 0)]))},
+        {"event": "move", "delta": [1, 0], "position": [0, 0], "decision_ms": 0.5, "valid": True},
+        {"event": "end", "recorded": 4, "dropped": 0},
+    ]
+
+
+def test_every_run_appends_a_gzip_member(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    for _ in range(2):
+        recorder = Recorder(path)
+        record_session(recorder, moves=1)
+        recorder.close()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    first = zlib.decompressobj(wbits=31)
+    first.decompress(data)
+    assert first.eof and first.unused_data[:2] == b"\x1f\x8b"
+    assert [event["event"] for event in read_recording(path)] == ["start", "board", "move", "end"] * 2
+
+
+def test_truncated_recording_ends_at_the_last_complete_event(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    recorder = Recorder(path, compress_level=0)
+    record_session(recorder, moves=20)
+    recorder.close()
+    events = list(read_recording(path))
+
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[: len(data) // 2])
+    cut = list(read_recording(path))
+
+    assert 0 < len(cut) < len(events)
+    assert cut == events[: len(cut)]
+
+
+def test_full_queue_drops_and_counts_events(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    recorder = Recorder(path, max_pending=1)
+    gate = recorder._file = Gate(recorder._file)
+    recorder.record("first")
+    assert gate.entered.wait(5)
+    recorder.record("queued")
+    recorder.record("dropped")
+    recorder.record("dropped")
+    assert recorder.dropped == 2
+
+    # The queue is still full: the end event waits for room
+    closing = threading.Thread(target=recorder.close)
+    closing.start()
+    gate.opened.set()
+    closing.join(5)
+
+    assert not closing.is_alive()
+    assert without_time(read_recording(path)) == [
+        {"event": "first"},
+        {"event": "queued"},
+        {"event": "end", "recorded": 3, "dropped": 2},
+    ]
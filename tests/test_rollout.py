@@ -0,0 +1,60 @@
+import pytest
+
+from boards import make_board
+from game.logic import rollout as rollout_module
+from game.logic.anytime import Deadline
+from game.logic.rollout import RolloutLogic, SharedBoard, _read_board
+
+
+@pytest.fixture
+def shared_board():
+    shared = SharedBoard(size=256)
+    yield shared
+    shared.close()
+    if rollout_module._attached is not None:
+        rollout_module._attached.close()
+        rollout_module._attached = None
+    rollout_module._board_read = (None, 0, None)
+
+
+def test_shared_board_round_trip(shared_board):
+    board = make_board([(1, 2, 3)], [(4, 5)])
+    name, tick = shared_board.write(board)
+
+    read = _read_board(name, tick)
+    assert read.bots[0].position == board.bots[0].position
+    assert read.diamonds[0].position == board.diamonds[0].position
+    # Read once per tick
+    assert _read_board(name, tick) is read
+
+
+def test_shared_board_grows(shared_board):
+    name, tick = shared_board.write(make_board([(1, 0, 0)]))
+    big = make_board([(1, 0, 0)], [(x, y) for x in range(10) for y in range(10)])
+    big_name, big_tick = shared_board.write(big)
+
+    assert big_name != name and big_tick == tick + 1
+    assert len(_read_board(big_name, big_tick).diamonds) == 100
+
+
+def test_overwritten_board_is_not_read(shared_board):
+    name, tick = shared_board.write(make_board([(1, 0, 0)]))
+    shared_board.write(make_board([(1, 1, 1)]))
+
+    with pytest.raises(RuntimeError):
+        _read_board(name, tick)
+
+
+def test_pool_rollouts_and_close():
+    logic = RolloutLogic(workers=1, horizon=3)
+    board = make_board([(1, 5, 5), (2, 9, 9)], [(6, 5), (3, 3)], delay_ms=1000)
+    moves = [(1, 0), (-1, 0)]
+    try:
+        for _ in range(2):
+            results = list(logic._rollouts(board, "bot1", moves, Deadline.after(2.0)))
+            assert results
+            assert {move for move, _ in results} <= set(moves)
+            assert len(logic.stale) <= logic.workers
+    finally:
+        logic.close()
+    assert logic.pool is None and logic.shared_board is None
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from game.scheduler import SLOT_TOLERANCE, MoveScheduler
+
+
+def test_first_move_goes_out_at_once():
+    scheduler = MoveScheduler.from_delay_ms(100)
+    assert scheduler.time_until_slot() == 0.0
+
+
+def test_slot_opens_one_interval_after_the_move():
+    scheduler = MoveScheduler.from_delay_ms(100, time_factor=2)
+    scheduler.move_sent(10.0)
+    assert scheduler.interval == pytest.approx(0.2)
+    assert scheduler.next_slot == pytest.approx(10.2)
+
+
+def test_missed_slots_are_counted_beyond_the_tolerance():
+    scheduler = MoveScheduler.from_delay_ms(100)
+    scheduler.move_sent(0.0)
+    # On time, and late within the tolerance
+    scheduler.move_sent(0.1)
+    scheduler.move_sent(0.2 + SLOT_TOLERANCE / 2)
+    assert scheduler.missed == 0
+    # 50 ms late, then 20 ms late
+    scheduler.move_sent(0.35 + SLOT_TOLERANCE / 2)
+    scheduler.move_sent(0.47 + SLOT_TOLERANCE / 2)
+
+    assert scheduler.moves == 5
+    assert scheduler.missed == 2
+    assert scheduler.max_lateness == pytest.approx(0.05)
+    assert scheduler.mean_lateness == pytest.approx(0.035)
+
+
+def test_skip_pushes_the_slot_back():
+    scheduler = MoveScheduler.from_delay_ms(50)
+    before = time.monotonic()
+    scheduler.skip()
+    assert before + 0.05 <= scheduler.next_slot <= time.monotonic() + 0.05
+    assert scheduler.moves == 0
+
+
+def test_set_delay_applies_to_the_next_slot():
+    scheduler = MoveScheduler.from_delay_ms(100)
+    scheduler.set_delay_ms(250)
+    scheduler.move_sent(1.0)
+    assert scheduler.next_slot == pytest.approx(1.25)
+
+
+def test_sleep_waits_for_the_slot():
+    scheduler = MoveScheduler.from_delay_ms(20)
+    scheduler.move_sent(time.monotonic())
+    scheduler.sleep()
+    assert scheduler.time_until_slot() == 0.0
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from game.models import Position
+from game.spatial import GridIndex, rect_distance
+
+
+def walk(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+@pytest.fixture
+def positions():
+    rng = random.Random(0)
+    # Duplicates included, to check ties go to the lower index
+    points = [Position(x=rng.randrange(30), y=rng.randrange(20)) for _ in range(80)]
+    return points + points[:5]
+
+
+def test_rect_distance():
+    assert rect_distance(Position(x=2, y=2), 0, 0, 4, 4) == 0
+    assert rect_distance(Position(x=7, y=2), 0, 0, 4, 4) == 3
+    assert rect_distance(Position(x=7, y=9), 0, 0, 4, 4) == 8
+
+
+@pytest.mark.parametrize("cell_size", [1, 3, 5, 40])
+def test_within_matches_a_scan(positions, cell_size):
+    index = GridIndex(positions, cell_size)
+    for center in (Position(x=0, y=0), Position(x=15, y=10), Position(x=29, y=19), Position(x=-5, y=30)):
+        for radius in (-1, 0, 1, 4, 9, 60):
+            expected = [i for i, p in enumerate(positions) if walk(p, center) <= radius]
+            assert index.within(center, radius) == expected
+
+
+@pytest.mark.parametrize("cell_size", [1, 5, 40])
+def test_nearest_matches_a_sort(positions, cell_size):
+    index = GridIndex(positions, cell_size)
+    for center in (Position(x=3, y=17), Position(x=22, y=4)):
+        for k in (1, 6, len(positions), len(positions) + 3):
+            expected = sorted(range(len(positions)), key=lambda i: (walk(positions[i], center), i))[:k]
+            assert index.nearest(center, k) == expected
+
+
+def test_best_first_yields_buckets_by_bound(positions):
+    index = GridIndex(positions, 5)
+    center = Position(x=12, y=8)
+    bounds = []
+    seen = []
+    for bound, bucket in index.best_first(lambda x0, y0, x1, y1: rect_distance(center, x0, y0, x1, y1)):
+        bounds.append(bound)
+        seen.extend(bucket)
+        assert all(walk(positions[i], center) >= bound for i in bucket)
+    assert bounds == sorted(bounds)
+    assert sorted(seen) == list(range(len(positions)))
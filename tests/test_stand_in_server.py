@@ -0,0 +1,65 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from decode import decode_into
+from game.models import BOT_TYPE, Board, Bot, Position
+from stand_in_server import DIRECTIONS, create_app
+
+REGISTRATION = {"email": "bot1@example.com", "name": "bot1", "password": "secret", "team": "a"}
+
+
+async def data(response, status: int = 200):
+    assert response.status == status, await response.text()
+    return (await response.json())["data"]
+
+
+def step(board: Board, position: Position) -> str:
+    """
+    :return: a direction onto a plain cell of the board
+    """
+    special = {(o.position.x, o.position.y) for o in board.teleporters + board.diamond_buttons}
+    for direction, (dx, dy) in DIRECTIONS.items():
+        x, y = position.x + dx, position.y + dy
+        if 0 <= x < board.width and 0 <= y < board.height and (x, y) not in special:
+            return direction
+
+
+def test_register_join_move_and_read_the_board():
+    async def main():
+        async with TestClient(TestServer(create_app(diamonds=5, seconds=30, seed=3))) as client:
+            bot = decode_into(Bot, await data(await client.post("/api/bots", json=REGISTRATION)))
+            assert bot.name == "bot1" and bot.id
+            response = await client.post("/api/bots", json=REGISTRATION)
+            assert response.status == 409
+
+            board = decode_into(
+                Board, await data(await client.post("/api/bots/{}/join".format(bot.id), json={"preferredBoardId": 1}))
+            )
+            assert (board.id, board.width, board.height, board.minimum_delay_between_moves) == (1, 15, 15, 100)
+            board_bot = board.get_bot(bot)
+            assert board_bot.type == BOT_TYPE
+            properties = board_bot.properties
+            assert properties.inventory_size == 5 and properties.can_tackle is False
+            assert 0 < properties.milliseconds_left <= 30000 and properties.time_joined
+            assert (properties.base.x, properties.base.y) == (board_bot.position.x, board_bot.position.y)
+            assert len(board.diamonds) == 5
+            assert [t.properties.pair_id for t in board.teleporters] == [str(t.id) for t in reversed(board.teleporters)]
+            assert [f.name for f in board.features][:2] == ["DiamondButtonProvider", "TeleportProvider"]
+
+            direction = step(board, board_bot.position)
+            dx, dy = DIRECTIONS[direction]
+            moved = decode_into(
+                Board, await data(await client.post("/api/bots/{}/move".format(bot.id), json={"direction": direction}))
+            )
+            position = moved.get_bot(bot).position
+            assert (position.x, position.y) == (board_bot.position.x + dx, board_bot.position.y + dy)
+            # Within the move delay
+            response = await client.post("/api/bots/{}/move".format(bot.id), json={"direction": direction})
+            assert response.status == 403
+
+            fetched = decode_into(Board, await data(await client.get("/api/boards/1")))
+            assert fetched.get_bot(bot).position == position
+            assert fetched.get_object(board.teleporters[0].id).position == board.teleporters[0].position
+
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+from boards import make_board
+from game.logic.anytime import Deadline
+from game.logic.base import BaseLogic
+from game.logic.tour import TOUR_SAFETY_MARGIN_MOVES, TourPlanner
+
+
+class Fixed(BaseLogic):
+    def __init__(self, move):
+        self.move = move
+
+    def next_move(self, board_bot, board):
+        return self.move
+
+
+def planner() -> TourPlanner:
+    # Long enough for the whole search on these boards
+    return TourPlanner(budget_ms=1000, fallback=Fixed((0, -1)))
+
+
+def stops(logic: TourPlanner):
+    return [(p.x, p.y) for p in logic.plan]
+
+
+def test_two_diamond_tour_beats_two_single_trips():
+    board = make_board([(1, 0, 0)], [(5, 0), (6, 0), (0, 9)])
+    logic = planner()
+
+    assert logic.next_move(board.bots[0], board) == (1, 0)
+    # 2 points in 12 moves, against 1 point in 10 for the nearest alone
+    assert stops(logic) == [(5, 0), (6, 0)]
+    assert logic.refinements >= 2
+
+
+def test_tours_fit_the_room_left():
+    board = make_board([(1, 6, 0)], [(1, 0), (2, 0), (3, 0)])
+    bot = board.bots[0]
+    bot.properties.diamonds = 3
+    logic = planner()
+
+    # All three are on the way home, but only two fit
+    logic.next_move(bot, board)
+    assert len(logic.plan) == 2
+
+
+def test_red_diamonds_over_the_room_are_skipped():
+    board = make_board([(1, 6, 0)], [(4, 0), (2, 0)])
+    board.diamonds[0].properties.points = 2
+    bot = board.bots[0]
+    bot.properties.diamonds = 4
+    logic = planner()
+
+    logic.next_move(bot, board)
+    assert stops(logic) == [(2, 0)]
+
+
+def test_full_inventory_heads_home():
+    board = make_board([(1, 3, 4)], [(3, 5)])
+    bot = board.bots[0]
+    bot.properties.diamonds = bot.properties.inventory_size
+    logic = planner()
+
+    assert logic.next_move(bot, board) == (-1, 0)
+    assert logic.plan == []
+
+
+def test_tours_end_before_the_game_does():
+    board = make_board([(1, 0, 0)], [(5, 0), (6, 0)])
+    bot = board.bots[0]
+    logic = planner()
+
+    # 11 moves left: the pair takes 12, the nearest alone 10
+    bot.properties.milliseconds_left = (11 + TOUR_SAFETY_MARGIN_MOVES) * board.minimum_delay_between_moves
+    logic.next_move(bot, board)
+    assert stops(logic) == [(5, 0)]
+
+    bot.properties.milliseconds_left = (9 + TOUR_SAFETY_MARGIN_MOVES) * board.minimum_delay_between_moves
+    assert logic.next_move(bot, board) == (0, -1)
+    assert logic.plan == []
+    assert logic.fallback_moves == 1
+
+
+def test_previous_plan_is_kept_on_ties():
+    board = make_board([(1, 0, 0)], [(3, 0), (0, 3)])
+    bot = board.bots[0]
+
+    logic = planner()
+    assert logic.next_move(bot, board) == (1, 0)
+    assert stops(logic) == [(3, 0)]
+
+    logic = planner()
+    logic.plan = [board.diamonds[1].position]
+    assert logic.next_move(bot, board) == (0, 1)
+    assert stops(logic) == [(0, 3)]
+
+
+def test_expired_deadline_keeps_the_fallback_move():
+    board = make_board([(1, 5, 5)], [(9, 5), (9, 6)])
+    bot = board.bots[0]
+    bot.properties.diamonds = 2
+    logic = planner()
+
+    # Not even the way home, the search did not rule the tours out
+    assert list(logic.refine(bot, board, Deadline.after(-1))) == []
+
+    logic.budget_ms = 0
+    assert logic.next_move(bot, board) == (0, -1)
+    assert logic.fallback_moves == 1
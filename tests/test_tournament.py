@@ -0,0 +1,138 @@
+import io
+import json
+import math
+
+import pytest
+
+import tournament
+from game.engine import EngineConfig
+from tournament import GameTask, Standing, play_all, play_game, record, swiss_pairs
+
+
+def player(controller: str, score: int, decisions: int = 10) -> dict:
+    return {
+        "controller": controller,
+        "score": score,
+        "decisions": decisions,
+        "mean_decision_ms": 1.0,
+        "max_decision_ms": 2.0,
+    }
+
+
+def result(game: int, first: tuple, second: tuple) -> dict:
+    return {"game": game, "round": 0, "seed": game, "players": [player(*first), player(*second)]}
+
+
+def standing_with(wins: int, draws: int, losses: int) -> Standing:
+    standing = Standing("a")
+    for outcome, count in (("win", wins), ("draw", draws), ("loss", losses)):
+        for _ in range(count):
+            standing.add(player("a", 0), outcome, "b")
+    return standing
+
+
+def test_wilson_interval():
+    low, high = standing_with(7, 0, 3).win_rate_interval
+    assert low == pytest.approx(0.3968, abs=1e-4)
+    assert high == pytest.approx(0.8922, abs=1e-4)
+
+    # Exact at the edges, without leaving [0, 1]
+    low, high = standing_with(5, 0, 0).win_rate_interval
+    assert low == pytest.approx(5 / (5 + tournament.Z_95**2))
+    assert high == pytest.approx(1.0)
+    assert standing_with(0, 0, 4).win_rate_interval[0] == pytest.approx(0.0)
+    assert Standing("a").win_rate_interval == (0.0, 1.0)
+
+
+def test_draws_count_half():
+    standing = standing_with(1, 2, 1)
+    assert standing.win_rate == 0.5
+    assert standing.points == 2.0
+    assert standing.win_rate_interval == standing_with(2, 0, 2).win_rate_interval
+
+
+def test_score_interval():
+    standing = Standing("a")
+    for score in (1, 2, 3, 4):
+        standing.add(player("a", score), "win", "b")
+
+    assert standing.mean_score == 2.5
+    # Sample standard deviation over the square root of the games
+    assert standing.score_interval == pytest.approx(tournament.Z_95 * math.sqrt((5 / 3) / 4))
+    assert math.isinf(standing_with(1, 0, 0).score_interval)
+    assert standing.summary()["score_ci95"] == standing.score_interval
+    assert standing_with(1, 0, 0).summary()["score_ci95"] is None
+
+
+def test_record_scores_both_players():
+    standings = {name: Standing(name) for name in ("a", "b")}
+    record(standings, result(0, ("a", 5), ("b", 3)))
+    record(standings, result(1, ("b", 4), ("a", 4)))
+
+    assert (standings["a"].wins, standings["a"].draws, standings["a"].games) == (1, 1, 2)
+    assert (standings["b"].wins, standings["b"].draws, standings["b"].games) == (0, 1, 2)
+    assert standings["a"].opponents == {"b": 2}
+    assert standings["a"].mean_decision_ms == 1.0
+
+
+def test_swiss_pairs_by_standing_then_rematches():
+    standings = {name: Standing(name) for name in ("a", "b", "c", "d")}
+    assert swiss_pairs(standings) == [("a", "b"), ("c", "d")]
+
+    record(standings, result(0, ("a", 5), ("b", 3)))
+    record(standings, result(1, ("c", 5), ("d", 3)))
+    # The two winners meet, then the two losers
+    assert swiss_pairs(standings) == [("a", "c"), ("b", "d")]
+
+    record(standings, result(2, ("a", 5), ("c", 3)))
+    record(standings, result(3, ("b", 5), ("d", 3)))
+    # a has met b and c already, d is the one opponent left
+    assert swiss_pairs(standings) == [("a", "d"), ("b", "c")]
+
+
+def test_swiss_bye_goes_to_the_lowest_without_one():
+    standings = {name: Standing(name) for name in ("a", "b", "c")}
+    record(standings, result(0, ("a", 5), ("b", 3)))
+
+    # c has no score yet, so it ranks below b
+    assert swiss_pairs(standings) == [("a", "b")]
+    assert standings["c"].byes == 1 and standings["c"].points == 1
+    # c ranks above b on points now, and b has not had a bye
+    assert swiss_pairs(standings) == [("a", "c")]
+    assert standings["b"].byes == 1 and standings["c"].byes == 1
+
+
+class Pool:
+    """
+    Plays in order in this process, checking that every finished game was
+    written out before the next one starts
+    """
+
+    def __init__(self, results, output):
+        self.results = results
+        self.output = output
+
+    def imap_unordered(self, function, tasks):
+        for index, _ in enumerate(tasks):
+            assert self.output.getvalue().count("\n") == index
+            yield self.results[index]
+
+
+def test_every_game_is_written_as_it_finishes():
+    results = [result(0, ("a", 5), ("b", 3)), result(1, ("b", 2), ("a", 2))]
+    standings = {name: Standing(name) for name in ("a", "b")}
+    output = io.StringIO()
+    tasks = (GameTask(game, 0, ["a", "b"], game, EngineConfig()) for game in range(2))
+
+    assert play_all(Pool(results, output), tasks, standings, output) == 2
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == results
+    assert standings["a"].games == 2
+
+
+def test_play_game_result_is_json_ready():
+    task = GameTask(3, 1, ["Garox", "D"], 7, EngineConfig(seconds=2))
+    line = json.loads(json.dumps(play_game(task)))
+
+    assert (line["game"], line["round"], line["seed"]) == (3, 1, 7)
+    assert [p["controller"] for p in line["players"]] == ["Garox", "D"]
+    assert all(p["decisions"] > 0 and p["max_decision_ms"] >= p["mean_decision_ms"] for p in line["players"])